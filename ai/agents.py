@@ -1,10 +1,11 @@
 import json
-from asyncio import Queue
 
+from langchain_core.caches import BaseCache
+from langchain_core.language_models import BaseChatModel
 from langchain_core.runnables import RunnableConfig
-from langchain_core.tools import Tool
-from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_core.tools import BaseTool, Tool
 from langchain_openai import ChatOpenAI
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.prebuilt import create_react_agent
 from langgraph.store.memory import InMemoryStore
 
@@ -12,37 +13,52 @@ from ai.prompts import create_code_review_prompt
 from ai.tools.get_file_content import get_file_content
 from ai.tools.memory import mark_file_reviewed, get_reviewed_files
 from ai.tools.regex_file_search import regex_file_search
+from ai.tools.symbol_lookup import symbol_lookup
 from config import Config
 from views.views import CodeReviewOutput
 
 
-def create_llm(config: Config):
+def create_llm(config: Config, cache: BaseCache = None):
     """Create and configure LLM instance"""
+    if config.chat_model is not None:
+        if cache is None:
+            return config.chat_model
+        return config.chat_model.model_copy(update={"cache": cache})
+
     return ChatOpenAI(
         model=config.model_name,
         openai_api_key=config.api_key,
-        temperature=0
+        temperature=0,
+        cache=cache
     )
 
 
+def with_streaming(llm: BaseChatModel) -> BaseChatModel:
+    """Copy of the LLM that reports its tokens to callbacks while they arrive, when the model supports it."""
+    if isinstance(llm, ChatOpenAI):
+        return llm.model_copy(update={"streaming": True, "stream_usage": True})
+    return llm
+
+
 async def create_code_review_agent(
         store: InMemoryStore,
-        mcp_client: MultiServerMCPClient,
-        config: Config,
-        retriever_tool=Tool
+        mcp_tools: list[BaseTool],
+        llm: BaseChatModel,
+        retriever_tool=Tool,
+        checkpointer: BaseCheckpointSaver = None
 ):
-    mcp_tools = await mcp_client.get_tools()
-
     code_review_agent = create_react_agent(
-        create_llm(config),
+        llm,
         tools=[
               regex_file_search,
+              symbol_lookup,
               get_file_content,
               retriever_tool,
               mark_file_reviewed,
               get_reviewed_files
         ] + mcp_tools,
         store=store,
+        checkpointer=checkpointer,
         response_format=CodeReviewOutput,
         name='code_reviewer',
         prompt=create_code_review_prompt()
@@ -53,16 +69,10 @@ async def create_code_review_agent(
 
 async def summarize_review_result(
         llm,
-        structured_messages_queue: Queue,
+        structured_messages: list,
         config: RunnableConfig
 ) -> str:
-    local_structured_messages = []
-
-    while not structured_messages_queue.empty():
-        message = structured_messages_queue.get()
-        local_structured_messages.append(message)
-
-    messages_str = json.dumps(local_structured_messages)
+    messages_str = json.dumps(structured_messages)
 
     summary = await llm.ainvoke(
         input="Summarize the changes and give the output: " + messages_str,
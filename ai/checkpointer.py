@@ -0,0 +1,55 @@
+import time
+from pathlib import Path
+
+import aiosqlite
+from langgraph.checkpoint.base.id import UUID
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from loguru import logger as log
+
+RETENTION_DAYS = 14
+FILE_NAME = "agent_checkpoints.sqlite"
+# 100 ns intervals between the UUID epoch (1582-10-15) and the Unix epoch
+UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+
+def default_path(cache_dir) -> Path:
+    return Path(cache_dir) / FILE_NAME
+
+
+def _checkpoint_time(checkpoint_id: str) -> float:
+    """Unix time of a checkpoint, from the timestamp in its UUIDv6 id."""
+    return (UUID(checkpoint_id).time - UUID_EPOCH_OFFSET) / 10_000_000
+
+
+async def open_checkpointer(db_path: Path, retention_days: float = RETENTION_DAYS) -> AsyncSqliteSaver:
+    """
+    LangGraph's async SQLite checkpointer on a local file, with threads older
+    than `retention_days` dropped.
+
+    Every step of a review agent is saved under the thread of its file, so an
+    interrupted run can continue each agent from its last step. A thread is
+    deleted once its file is reviewed. It must be opened and closed on the
+    event loop that uses it.
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    checkpointer = AsyncSqliteSaver(aiosqlite.connect(db_path))
+    await checkpointer.setup()
+    await prune(checkpointer, retention_days)
+    return checkpointer
+
+
+async def prune(checkpointer: AsyncSqliteSaver, retention_days: float):
+    """Drop threads without a new checkpoint in the last `retention_days`."""
+    cutoff = time.time() - retention_days * 24 * 3600
+    async with checkpointer.conn.execute(
+            "SELECT thread_id, MAX(checkpoint_id) FROM checkpoints GROUP BY thread_id") as cursor:
+        latest = await cursor.fetchall()
+
+    stale = [thread_id for thread_id, checkpoint_id in latest if _checkpoint_time(checkpoint_id) < cutoff]
+    for thread_id in stale:
+        await checkpointer.adelete_thread(thread_id)
+
+    if stale:
+        log.info(f"Pruned checkpoints of {len(stale)} agent threads older than {retention_days} days")
@@ -0,0 +1,130 @@
+import ast
+from dataclasses import dataclass
+from typing import Optional
+
+from ai.prompts import create_review_request_prompt
+from utils.diff_parser import changed_line_ranges
+from utils.tokens import count_tokens
+from views.views import ChangedFile
+
+WINDOW_LINES = 20
+
+
+@dataclass
+class ReviewContext:
+    """Prompt for one file with its token cost compared to sending the whole file."""
+    prompt: str
+    tokens: int
+    full_file_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(self.full_file_tokens - self.tokens, 0)
+
+
+def _python_scopes(content: str) -> Optional[list[tuple[int, int]]]:
+    """Line ranges of every function and class, or None if the file does not parse."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    return [
+        (node.decorator_list[0].lineno if node.decorator_list else node.lineno, node.end_lineno)
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    ]
+
+
+def _window(start: int, end: int, line_count: int) -> tuple[int, int]:
+    return max(start - WINDOW_LINES, 1), min(end + WINDOW_LINES, line_count)
+
+
+def _enclosing_range(start: int, end: int, scopes: list[tuple[int, int]], line_count: int) -> tuple[int, int]:
+    """Innermost scope containing the changed lines, or a window around them at module level."""
+    enclosing = [scope for scope in scopes if scope[0] <= start and end <= scope[1]]
+    if enclosing:
+        return min(enclosing, key=lambda scope: scope[1] - scope[0])
+    return _window(start, end, line_count)
+
+
+def _hunk_range(start: int, end: int, scopes: list[tuple[int, int]], lines: list[str], token_budget: int,
+                model_name: str) -> tuple[int, int]:
+    """Enclosing range of a hunk, or the window around it when that range alone does not fit `token_budget`."""
+    scope_start, scope_end = _enclosing_range(start, end, scopes, len(lines))
+    if count_tokens(_numbered(lines, scope_start, scope_end), model_name) <= token_budget:
+        return scope_start, scope_end
+    return _window(start, end, len(lines))
+
+
+def _merge(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _numbered(lines: list[str], start: int, end: int) -> str:
+    return "\n".join(f"{number:>5} | {lines[number - 1]}" for number in range(start, end + 1))
+
+
+def build_review_context(changed_file: ChangedFile, token_budget: int, model_name: str) -> ReviewContext:
+    """
+    Build the review prompt for a file within `token_budget` tokens.
+
+    The diff is always included. If the whole file fits in the remaining
+    budget it is included as is, otherwise only the functions and classes
+    enclosing each hunk (or a window around module-level hunks, and around
+    hunks whose enclosing scope alone exceeds the budget) are added, smallest
+    first, and the agent is told which lines it can fetch with its tools.
+    """
+    changes = changed_file.changes or ""
+    content = changed_file.content or ""
+    full_prompt = create_review_request_prompt(changed_file.file_path, changes, content, changed_file.knowledge)
+    full_file_tokens = count_tokens(full_prompt, model_name)
+
+    if full_file_tokens <= token_budget or not content:
+        return ReviewContext(full_prompt, full_file_tokens, full_file_tokens)
+
+    lines = content.splitlines()
+    if changed_file.file_path.endswith(".py"):
+        scopes = _python_scopes(content) or []
+    else:
+        scopes = []
+
+    excerpt_prompt = create_review_request_prompt(changed_file.file_path, changes, "", changed_file.knowledge)
+    used_tokens = count_tokens(excerpt_prompt, model_name)
+
+    # Ranges are capped before merging, so one large class cannot swallow the context of the hunks inside it
+    ranges = _merge([
+        _hunk_range(start, min(end, len(lines)), scopes, lines, token_budget - used_tokens, model_name)
+        for start, end in changed_line_ranges(changes)
+        if start <= len(lines)
+    ])
+
+    included, omitted = [], []
+
+    for start, end in sorted(ranges, key=lambda scope: scope[1] - scope[0]):
+        excerpt = _numbered(lines, start, end)
+        excerpt_tokens = count_tokens(excerpt, model_name)
+        if used_tokens + excerpt_tokens > token_budget:
+            omitted.append((start, end))
+            continue
+        included.append((start, end, excerpt))
+        used_tokens += excerpt_tokens
+
+    sections = [excerpt for _, _, excerpt in sorted(included)]
+    sections.append(
+        f"The file has {len(lines)} lines. Only the excerpts above are included; "
+        "use get_file_content to read other parts of the file."
+    )
+    if omitted:
+        sections.append("Changed lines not included due to size: " + ", ".join(
+            f"{start}-{end}" for start, end in sorted(omitted)))
+
+    prompt = create_review_request_prompt(
+        changed_file.file_path, changes, "\n...\n".join(sections), changed_file.knowledge)
+    return ReviewContext(prompt, count_tokens(prompt, model_name), full_file_tokens)
@@ -0,0 +1,250 @@
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from loguru import logger as log
+
+from ai.llm_cache import is_cache_hit
+from config import Config
+from utils.errors import BudgetExceededError
+
+SUMMARY_KEY = "__summary__"
+
+# USD per million prompt and completion tokens.
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+
+@dataclass
+class ToolCallMetrics:
+    name: str
+    duration_seconds: float
+    output_bytes: int
+    error: bool = False
+
+
+@dataclass
+class FileMetrics:
+    file_path: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_calls: int = 0
+    cached_llm_calls: int = 0
+    llm_seconds: float = 0.0
+    agent_steps: int = 0
+    duration_seconds: float = 0.0
+    throttles: int = 0
+    throttled_seconds: float = 0.0
+    cached_review: bool = False
+    error: Optional[str] = None
+    tool_calls: list[ToolCallMetrics] = field(default_factory=list)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records LLM usage and tool calls of one file's agent into its FileMetrics."""
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, run_metrics: "RunMetrics", file_metrics: FileMetrics):
+        self.run_metrics = run_metrics
+        self.file_metrics = file_metrics
+        self._llm_starts: dict[UUID, float] = {}
+        self._tool_starts: dict[UUID, tuple[str, float]] = {}
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, **kwargs: Any):
+        self._llm_starts[run_id] = time.perf_counter()
+        self.file_metrics.agent_steps += 1
+
+    def on_llm_start(self, serialized: dict, prompts: list[str], *, run_id: UUID, **kwargs: Any):
+        self._llm_starts[run_id] = time.perf_counter()
+        self.file_metrics.agent_steps += 1
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        started_at = self._llm_starts.pop(run_id, None)
+        if started_at is not None:
+            self.file_metrics.llm_seconds += time.perf_counter() - started_at
+
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or usage
+
+        # Cache hits carry their original usage, which was already paid for.
+        if is_cache_hit(response):
+            self.file_metrics.cached_llm_calls += 1
+            return
+
+        self.file_metrics.llm_calls += 1
+        self.file_metrics.prompt_tokens += usage.get("input_tokens", 0)
+        self.file_metrics.completion_tokens += usage.get("output_tokens", 0)
+        self.run_metrics.check_budget()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._llm_starts.pop(run_id, None)
+
+    def on_tool_start(self, serialized: dict, input_str: str, *, run_id: UUID, **kwargs: Any):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._tool_starts[run_id] = (name, time.perf_counter())
+
+    def _finish_tool(self, run_id: UUID, output: Any, error: bool):
+        name, started_at = self._tool_starts.pop(run_id, ("unknown", time.perf_counter()))
+        content = getattr(output, "content", output)
+        self.file_metrics.tool_calls.append(ToolCallMetrics(
+            name=name,
+            duration_seconds=time.perf_counter() - started_at,
+            output_bytes=len(str(content).encode("utf-8")),
+            error=error
+        ))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self._finish_tool(run_id, output, error=False)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish_tool(run_id, error, error=True)
+
+
+class RunMetrics:
+    """Token, latency and tool-call accounting for a whole review run."""
+
+    def __init__(self, config: Config):
+        self.model_name = config.model_name
+        self.token_budget = config.token_budget
+        self.cost_budget = config.cost_budget
+        self.started_at = time.time()
+        self.files: dict[str, FileMetrics] = {}
+        self.caches: dict[str, dict] = {}
+        self.stages: dict[str, float] = {}
+
+        if self.cost_budget and self.model_name not in MODEL_PRICES:
+            log.warning(f"No prices known for model {self.model_name}, the cost budget will not be enforced")
+
+    def file(self, file_path: str) -> FileMetrics:
+        if file_path not in self.files:
+            self.files[file_path] = FileMetrics(file_path=file_path)
+        return self.files[file_path]
+
+    def callback(self, file_path: str) -> MetricsCallbackHandler:
+        return MetricsCallbackHandler(self, self.file(file_path))
+
+    @contextmanager
+    def stage(self, name: str):
+        """Add the wall-clock time of the enclosed block to the run stage `name`."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start_time
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(metrics.prompt_tokens for metrics in self.files.values())
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(metrics.completion_tokens for metrics in self.files.values())
+
+    @property
+    def cost(self) -> Optional[float]:
+        prices = MODEL_PRICES.get(self.model_name)
+        if prices is None:
+            return None
+        return (self.prompt_tokens * prices[0] + self.completion_tokens * prices[1]) / 1_000_000
+
+    def check_budget(self):
+        """Raise BudgetExceededError once the run spends more than its budgets."""
+        total_tokens = self.prompt_tokens + self.completion_tokens
+        if self.token_budget and total_tokens > self.token_budget:
+            raise BudgetExceededError(f"Token budget exceeded: {total_tokens} > {self.token_budget}")
+
+        cost = self.cost
+        if self.cost_budget and cost is not None and cost > self.cost_budget:
+            raise BudgetExceededError(f"Cost budget exceeded: ${cost:.4f} > ${self.cost_budget:.4f}")
+
+    def to_dict(self) -> dict:
+        tool_calls = [call for metrics in self.files.values() for call in metrics.tool_calls]
+        return {
+            "model_name": self.model_name,
+            "started_at": self.started_at,
+            "duration_seconds": time.time() - self.started_at,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": self.cost,
+            "llm_calls": sum(metrics.llm_calls for metrics in self.files.values()),
+            "cached_llm_calls": sum(metrics.cached_llm_calls for metrics in self.files.values()),
+            "tool_calls": len(tool_calls),
+            "caches": self.caches,
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "files": [asdict(metrics) for metrics in self.files.values()],
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the run in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name: str, metric_type: str, help_text: str, samples: list[tuple[dict, float]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                label_str = ",".join(f'{key}="{_escape_label(str(label))}"' for key, label in labels.items())
+                lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+        files = list(self.files.values())
+        metric("revai_prompt_tokens_total", "counter", "Prompt tokens sent per file.",
+               [({"file": m.file_path}, m.prompt_tokens) for m in files])
+        metric("revai_completion_tokens_total", "counter", "Completion tokens received per file.",
+               [({"file": m.file_path}, m.completion_tokens) for m in files])
+        metric("revai_llm_calls_total", "counter", "LLM calls sent to the provider per file.",
+               [({"file": m.file_path}, m.llm_calls) for m in files])
+        metric("revai_llm_cached_calls_total", "counter", "LLM calls answered from the cache per file.",
+               [({"file": m.file_path}, m.cached_llm_calls) for m in files])
+        metric("revai_llm_seconds_total", "counter", "Time spent waiting for the LLM per file.",
+               [({"file": m.file_path}, round(m.llm_seconds, 6)) for m in files])
+        metric("revai_agent_steps_total", "counter", "Agent model turns per file.",
+               [({"file": m.file_path}, m.agent_steps) for m in files])
+        metric("revai_throttles_total", "counter", "LLM calls that waited for the rate limits per file.",
+               [({"file": m.file_path}, m.throttles) for m in files])
+        metric("revai_throttled_seconds_total", "counter", "Time LLM calls waited for the rate limits per file.",
+               [({"file": m.file_path}, round(m.throttled_seconds, 6)) for m in files])
+        metric("revai_file_review_seconds", "gauge", "Wall-clock review time per file.",
+               [({"file": m.file_path}, round(m.duration_seconds, 6)) for m in files])
+
+        tool_samples: dict[tuple[str, str], list[ToolCallMetrics]] = {}
+        for m in files:
+            for call in m.tool_calls:
+                tool_samples.setdefault((m.file_path, call.name), []).append(call)
+
+        metric("revai_tool_calls_total", "counter", "Tool calls per file and tool.",
+               [({"file": f, "tool": t}, len(calls)) for (f, t), calls in tool_samples.items()])
+        metric("revai_tool_seconds_total", "counter", "Time spent in tools per file and tool.",
+               [({"file": f, "tool": t}, round(sum(c.duration_seconds for c in calls), 6))
+                for (f, t), calls in tool_samples.items()])
+        metric("revai_tool_output_bytes_total", "counter", "Tool output returned to the agent per file and tool.",
+               [({"file": f, "tool": t}, sum(c.output_bytes for c in calls)) for (f, t), calls in tool_samples.items()])
+
+        metric("revai_failed_files", "gauge", "Files whose review failed.",
+               [({}, sum(1 for m in files if m.error))])
+
+        metric("revai_stage_seconds", "gauge", "Wall-clock time per stage of the run.",
+               [({"stage": name}, round(seconds, 6)) for name, seconds in self.stages.items()])
+
+        cost = self.cost
+        if cost is not None:
+            metric("revai_run_cost_usd", "gauge", "Estimated provider cost of the run.", [({}, round(cost, 6))])
+        metric("revai_run_duration_seconds", "gauge", "Wall-clock duration of the run.",
+               [({}, round(time.time() - self.started_at, 6))])
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
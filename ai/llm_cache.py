@@ -0,0 +1,173 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import LLMResult
+from loguru import logger as log
+
+from config import Config
+
+# Message fields that are never sent to the provider and differ between runs.
+VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+# Set in the generation_info of every generation answered from the cache.
+CACHE_HIT_KEY = "llm_cache_hit"
+
+
+def _strip_volatile_fields(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_strip_volatile_fields(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    stripped = {key: _strip_volatile_fields(item) for key, item in value.items()}
+    kwargs = stripped.get("kwargs")
+    if stripped.get("type") == "constructor" and isinstance(kwargs, dict):
+        stripped["kwargs"] = {key: item for key, item in kwargs.items() if key not in VOLATILE_MESSAGE_FIELDS}
+    return stripped
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Drop message ids and provider metadata so identical conversations share a key."""
+    try:
+        return json.dumps(_strip_volatile_fields(json.loads(prompt)), sort_keys=True)
+    except ValueError:
+        return prompt
+
+
+def is_cache_hit(response: LLMResult) -> bool:
+    """Whether an LLM call was answered by SQLiteLLMCache instead of the provider."""
+    return any((generation.generation_info or {}).get(CACHE_HIT_KEY)
+               for generations in response.generations for generation in generations)
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Exact-match LLM response cache persisted in SQLite.
+
+    LangChain passes the serialized messages as `prompt` and the model name,
+    parameters and bound tool schemas as `llm_string`, so both together form
+    the key once per-run message ids are normalized away. Entries expire after
+    `ttl_seconds` and the least recently used ones are evicted once the stored
+    responses exceed `max_bytes`.
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS llm_responses_accessed_at ON llm_responses (accessed_at)")
+        self._connection.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._connection.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._connection.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._connection.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+
+        try:
+            generations = loads(row[0], allowed_objects="core")
+        except Exception as e:
+            log.warning(f"Could not deserialize cached LLM response, ignoring it: {e}")
+            return None
+
+        for generation in generations:
+            generation.generation_info = {**(generation.generation_info or {}), CACHE_HIT_KEY: True}
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        response = dumps(list(return_val))
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self._key(prompt, llm_string), response, len(response), now, now)
+            )
+            self._evict(now)
+            self._connection.commit()
+
+    def _evict(self, now: float):
+        if self.ttl_seconds:
+            self._connection.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        total_size = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        rows = self._connection.execute("SELECT key, size FROM llm_responses ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if total_size <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            total_size -= size
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM llm_responses")
+            self._connection.commit()
+
+    def report(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def create_llm_cache(config: Config) -> Optional[BaseCache]:
+    """Create the LLM response cache configured for the run, if enabled."""
+    if not config.llm_cache:
+        return None
+
+    return SQLiteLLMCache(
+        config.cache_dir / "llm_cache.sqlite",
+        max_bytes=config.llm_cache_max_mb * 1024 * 1024,
+        ttl_seconds=config.llm_cache_ttl_hours * 3600 if config.llm_cache_ttl_hours else None
+    )
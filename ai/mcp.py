@@ -1,14 +1,17 @@
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
-def create_mcp_client():
-    return MultiServerMCPClient(
-        {
-            "context7": {
-                "command": "npx",
-                "args": ["-y", "@upstash/context7-mcp"],
-                "transport": "stdio"
-            }
-        }
-    )
+from config import Config
+
+DEFAULT_MCP_SERVERS = {
+    "context7": {
+        "command": "npx",
+        "args": ["-y", "@upstash/context7-mcp"],
+        "transport": "stdio"
+    }
+}
 
 
+def create_mcp_client(config: Config):
+    return MultiServerMCPClient(
+        config.mcp_servers if config.mcp_servers is not None else DEFAULT_MCP_SERVERS
+    )
@@ -1,99 +1,212 @@
-import asyncio
 from datetime import datetime
-from queue import Queue
+from typing import Any, Awaitable, Callable
 
-from langgraph.store.memory import InMemoryStore
 from loguru import logger as log
 
-from ai.agents import create_code_review_agent, summarize_review_result, create_llm
-from ai.mcp import create_mcp_client
-from ai.tools.retriever import get_retriever_tool
+from ai.context_builder import build_review_context
+from ai.instrumentation import RunMetrics, SUMMARY_KEY
+from ai.prompts import create_code_review_prompt
+from ai.resources import ReviewResources
+from ai.scheduler import RateLimitCallbackHandler, ReviewJob, ReviewScheduler
+from ai.summarizer import HierarchicalSummarizer
+from ai.tools.cache import ToolResultCache
 from config import Config
-from views.views import CodeReviewRequest
+from services.git_object_reader import GitObjectReader
+from services.symbol_index import SymbolIndex
+from utils.tokens import count_tokens
+from views.views import CodeReviewRequest, ChangedFile
 
 
 class CodeReviewOrchestrator:
     """Main orchestrator for code review workflow"""
 
-    def __init__(self, config: Config):
-        self.raw_messages = Queue()
-        self.structured_messages = Queue()
+    def __init__(self, config: Config, object_reader: GitObjectReader = None, symbol_index: SymbolIndex = None,
+                 metrics: RunMetrics = None, resources: ReviewResources = None,
+                 on_file_reviewed: Callable[[str, Any, bool], Awaitable[None]] = None,
+                 on_summary_token: Callable[[str], None] = None):
         self.config = config
         self.task_id = config.task_id
         self.thread_id = config.thread_id
+        self.object_reader = object_reader
+        self.symbol_index = symbol_index
+        self.tool_cache = ToolResultCache()
+        self.file_results = {}
+        self.failed_files: dict[str, Exception] = {}
+        self.on_file_reviewed = on_file_reviewed
         self.default_config = {
             "configurable": {
                 "thread_id": self.thread_id,
             }
         }
 
-        self.store = InMemoryStore()
-        log.info("Created memory store.")
+        self.metrics = metrics or RunMetrics(config)
+        self.resources = resources or ReviewResources(config)
+        self.llm_cache = self.resources.llm_cache
+        self.vectorstore = self.resources.vectorstore
+        self.summarizer = HierarchicalSummarizer(
+            llm=self.resources.llm,
+            config={**self.default_config, "callbacks": self._callbacks(SUMMARY_KEY)},
+            model_name=config.model_name,
+            token_budget=config.summary_token_budget,
+            max_concurrency=config.max_concurrency,
+            on_token=on_summary_token
+        )
+
+        self.scheduler = ReviewScheduler(max_concurrency=config.max_concurrency)
+
+    def _callbacks(self, file_name: str) -> list:
+        """Metrics and rate limiting for every LLM call made for `file_name`."""
+        return [
+            self.metrics.callback(file_name),
+            RateLimitCallbackHandler(self.resources.rate_limiter, self.config.model_name, self.metrics.file(file_name))
+        ]
 
-        self.mcp_client = create_mcp_client()
-        log.info("MCP client created.")
+    async def get_code_review_agent(self):
+        """The review agent shared between all files of the run."""
+        return await self.resources.get_code_review_agent()
 
-        self.retriever_tool  = get_retriever_tool(self.config)
-        log.info("Init vector db with tools.")
+    def _file_thread_id(self, file_name) -> str:
+        return f"{self.thread_id}:{file_name}"
 
+    async def discard_checkpoint(self, file_name):
+        """Drop the saved agent state of a file so its next review starts over."""
+        checkpointer = await self.resources.get_checkpointer()
+        if checkpointer is not None:
+            await checkpointer.adelete_thread(self._file_thread_id(file_name))
 
     async def _start_analyzing(self, agent, file_name, request_content):
         config = {
-            **self.default_config,
+            "configurable": {
+                "thread_id": self._file_thread_id(file_name),
+            },
             "task_id": self.task_id,
-            "project_path": self.config.project_path
+            "project_path": self.config.project_path,
+            "object_reader": self.object_reader,
+            "symbol_index": self.symbol_index,
+            "tool_cache": self.tool_cache,
+            "callbacks": self._callbacks(file_name)
         }
 
         start_time = datetime.now()
-        messages = await agent.ainvoke(
-            input={
-                "messages": {
-                    "role": "user",
-                    "content": request_content,
-                }
-            },
-            config=config
-        )
+        messages = await self._resume_agent(agent, file_name, config)
+        if messages is None:
+            messages = await agent.ainvoke(
+                input={
+                    "messages": {
+                        "role": "user",
+                        "content": request_content,
+                    }
+                },
+                config=config
+            )
 
         structured_response = messages['structured_response']
 
-        self.raw_messages.put(messages)
-        self.structured_messages.put(structured_response)
+        await self.discard_checkpoint(file_name)
+
+        self.file_results[file_name] = structured_response
+        self.summarizer.add(file_name, structured_response)
 
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
+        self.metrics.file(file_name).duration_seconds = duration
 
         log.info(f"File {file_name} was analyzed for {duration}s")
 
-    async def review_code(self, request: CodeReviewRequest) -> str:
-        """Start a new code review"""
+        if self.on_file_reviewed is not None:
+            await self.on_file_reviewed(file_name, structured_response, False)
+
+    async def _resume_agent(self, agent, file_name, config):
+        """Continue the agent of a file from the last checkpoint of an interrupted run, None when there is none."""
+        if await self.resources.get_checkpointer() is None:
+            return None
+
+        state = await agent.aget_state(config)
+        if not state.values:
+            return None
 
-        async with (
-            asyncio.TaskGroup() as tg
-        ):
-            log.info("Created task group.")
+        if "structured_response" in state.values and not state.next:
+            log.info(f"Agent for file {file_name} had already finished, reusing its response")
+            return state.values
+        if state.next:
+            log.info(f"Resuming agent for file {file_name} from its last checkpoint ({len(state.values['messages'])} messages)")
+            return await agent.ainvoke(None, config=config)
 
-            for changed_file in request.changed_files:
-                code_review_agent = await create_code_review_agent(
-                    store=self.store,
-                    mcp_client=self.mcp_client,
-                    config=self.config,
-                    retriever_tool=self.retriever_tool
-                )
+        # A thread without pending steps or a response cannot be continued, start the file over
+        await self.discard_checkpoint(file_name)
+        return None
 
-                content = "Analyze this file. Changes: " + changed_file.changes + " File content: " + changed_file.content
+    async def add_cached_review(self, file_name, structured_response):
+        """Include findings of a file reviewed in an earlier run in the summary."""
+        self.metrics.file(file_name).cached_review = True
+        self.file_results[file_name] = structured_response
+        self.summarizer.add(file_name, structured_response)
 
-                tg.create_task(self._start_analyzing(
-                    agent=code_review_agent,
-                    file_name=changed_file.file_path,
-                    request_content=content
-                ))
+        if self.on_file_reviewed is not None:
+            await self.on_file_reviewed(file_name, structured_response, True)
 
-                log.info(f"Task for file {changed_file.file_path} started")
+    async def _review_file(self, changed_file: ChangedFile, request_content: str):
+        code_review_agent = await self.get_code_review_agent()
+
+        log.info(f"Task for file {changed_file.file_path} started")
+
+        await self._start_analyzing(
+            agent=code_review_agent,
+            file_name=changed_file.file_path,
+            request_content=request_content
+        )
+
+    async def review_code(self, request: CodeReviewRequest) -> str:
+        """Start a new code review"""
+        await self.review_files(request)
+        return await self.summarize()
+
+    async def review_files(self, request: CodeReviewRequest):
+        """Run the review agents over every changed file of the request."""
+        prompt_tokens = count_tokens(create_code_review_prompt(), self.config.model_name)
+        jobs = []
+        full_file_tokens = 0
+        context_tokens = 0
+
+        self.summarizer.expect(
+            list(self.file_results) + [changed_file.file_path for changed_file in request.changed_files])
+
+        for changed_file in request.changed_files:
+            context = build_review_context(changed_file, self.config.context_token_budget, self.config.model_name)
+            full_file_tokens += context.full_file_tokens
+            context_tokens += context.tokens
+            log.info(
+                f"Context for file {changed_file.file_path}: {context.tokens} tokens "
+                f"({context.saved_tokens} saved of {context.full_file_tokens})"
+            )
+
+            jobs.append(ReviewJob(
+                name=changed_file.file_path,
+                size=len(changed_file.changes or ""),
+                tokens=prompt_tokens + context.tokens,
+                metrics=self.metrics.file(changed_file.file_path),
+                run=lambda changed_file=changed_file, content=context.prompt: self._review_file(changed_file, content)
+            ))
+
+        log.info(
+            f"Review contexts: {context_tokens} tokens instead of {full_file_tokens} "
+            f"({full_file_tokens - context_tokens} saved per agent turn)"
+        )
+
+        self.failed_files = await self.scheduler.run(jobs)
 
         log.info('Agents finished the tasks!')
 
-        return await summarize_review_result(
-            llm=create_llm(self.config),
-            structured_messages_queue=self.structured_messages,
-            config=self.default_config)
+    async def summarize(self) -> str:
+        """Summarize the findings of all reviewed files."""
+        summary = await self.summarizer.summarize()
+
+        if self.llm_cache is not None:
+            report = self.llm_cache.report()
+            self.metrics.caches["llm"] = report
+            log.info(f"LLM cache: {report['hits']} hits, {report['misses']} misses ({report['hit_rate']:.0%} hit rate)")
+
+        self.metrics.caches["tools"] = self.tool_cache.report()
+        self.tool_cache.log_report()
+
+        return summary
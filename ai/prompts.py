@@ -1,3 +1,4 @@
+from typing import Optional
 
 
 def create_code_review_prompt():
@@ -14,7 +15,8 @@ Your task is to conduct **two levels of code review**: a detailed **line-by-line
 You will be provided with:
 
 * `git_diff`: the unified diff of a modified Python file
-* `file_content`: full content of that file
+* `file_content`: full content of that file, or for large files the line-numbered functions and classes enclosing each change. Read other parts of the file with `get_file_content`, by line range or by function or class name, when you need them
+* `internal_knowledge` (optional): internal conventions retrieved for this change in advance. Call `retrieve_internal_knowledge` only for conventions they do not cover
 
 ---
 
@@ -72,6 +74,8 @@ Your goal is to **ensure code modifications are compatible across the entire cod
 * Verifying those changes **do not break references** in other files
 * Ensuring all usage points follow **updated parameters, return values, or behaviors**
 
+Use `symbol_lookup` to find definitions and references of Python symbols, and `regex_file_search` for other patterns.
+
 ---
 
 ### Output Format
@@ -98,4 +102,29 @@ Respond with a **structured list of issues**, one object per issue in the follow
 
 ### Before you start
 Check if the file you are checking was already reviewed, if it is, skip it
-"""
\ No newline at end of file
+"""
+
+
+def create_group_summary_prompt(group_name: str):
+    return f"""
+Summarize the following code review findings for `{group_name}`.
+Keep every issue with its file path, severity and recommendation, merge duplicates and drop nothing important.
+
+Findings:
+"""
+
+
+def create_final_summary_prompt():
+    return """
+Combine the following partial code review summaries into one final summary.
+Group the issues by file, order them by severity and keep every recommendation.
+
+Partial summaries:
+"""
+
+
+def create_review_request_prompt(file_path: str, changes: str, content: str, knowledge: Optional[list[str]] = None):
+    prompt = "Analyze this file: " + file_path + " Changes: " + changes + " File content: " + content
+    if knowledge:
+        prompt += " Internal knowledge: " + "\n\n".join(knowledge)
+    return prompt
@@ -0,0 +1,128 @@
+import asyncio
+from contextlib import AsyncExitStack
+
+from langchain_mcp_adapters.tools import load_mcp_tools
+from langgraph.store.memory import InMemoryStore
+from loguru import logger as log
+
+from ai.agents import create_code_review_agent, create_llm
+from ai import checkpointer
+from ai.llm_cache import create_llm_cache
+from ai.mcp import create_mcp_client
+from ai.retrieval import FlatVectorStore, create_retriever, create_vectorstore
+from ai.scheduler import RateLimiter
+from ai.tools.retriever import create_cached_retriever_tool
+from config import Config
+
+
+class ReviewResources:
+    """
+    Clients that are expensive to create and do not depend on the reviewed project.
+
+    Holds the LLM with its response cache and rate limiter, the vector store
+    with the retriever tool, the MCP client, the checkpointer and the review
+    agent. Runs that share an instance also share the per-minute budgets. Every per-run value reaches the
+    agent tools through the runtime config, so one instance can serve any
+    number of runs, one after the other or at the same time.
+
+    Used as an async context manager, it also keeps one session open per MCP
+    server for all tool calls instead of starting a new server process for
+    each of them.
+
+    Runs of the same project share its on-disk symbol index, so they should
+    hold `project_lock` while they run.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.llm_cache = create_llm_cache(config)
+        self.llm = create_llm(config, cache=self.llm_cache)
+        self.rate_limiter = RateLimiter(config.requests_per_minute, config.tokens_per_minute)
+
+        self.store = InMemoryStore()
+        log.info("Created memory store.")
+
+        # Opened on first use, on the event loop of the runs
+        self.checkpointer = None
+
+        self.mcp_client = create_mcp_client(config)
+        log.info("MCP client created.")
+
+        self.vectorstore = create_vectorstore(config)
+        self.retriever = create_retriever(config, self.vectorstore)
+        self.retriever_tool = create_cached_retriever_tool(self.retriever)
+        log.info("Init vector db with tools.")
+
+        self._mcp_sessions = None
+        self._mcp_tools = []
+        self._code_review_agent = None
+        self._agent_lock = asyncio.Lock()
+        self._checkpointer_lock = asyncio.Lock()
+        self._project_locks: dict[str, asyncio.Lock] = {}
+
+    async def __aenter__(self) -> "ReviewResources":
+        self._mcp_sessions = AsyncExitStack()
+        try:
+            for server_name in self.mcp_client.connections:
+                session = await self._mcp_sessions.enter_async_context(self.mcp_client.session(server_name))
+                self._mcp_tools += await load_mcp_tools(session, server_name=server_name)
+        except BaseException:
+            await self.__aexit__()
+            raise
+        log.info(f"Opened {len(self.mcp_client.connections)} MCP sessions.")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._mcp_sessions.aclose()
+        self._mcp_sessions = None
+        self._mcp_tools = []
+        self._code_review_agent = None
+        await self.close()
+
+    async def close(self):
+        """Close the caches, the lexical index and the vector store; also for instances not used as a context manager."""
+        if self.llm_cache is not None:
+            self.llm_cache.close()
+        if self.checkpointer is not None:
+            await self.checkpointer.conn.close()
+            self.checkpointer = None
+        self.retriever.close()
+        if isinstance(self.vectorstore, FlatVectorStore):
+            self.vectorstore.close()
+
+    def forget_run(self, task_id: str):
+        """Drop what the agents of a finished run kept in the shared memory store."""
+        for namespace in self.store.list_namespaces():
+            self.store.delete(namespace, task_id)
+
+    def project_lock(self, project_path) -> asyncio.Lock:
+        """Lock serializing the runs of one project."""
+        return self._project_locks.setdefault(str(project_path), asyncio.Lock())
+
+    async def get_mcp_tools(self) -> list:
+        if self._mcp_sessions is not None:
+            return self._mcp_tools
+        return await self.mcp_client.get_tools()
+
+    async def get_checkpointer(self):
+        """The agent checkpointer, None when checkpoints are disabled."""
+        async with self._checkpointer_lock:
+            if self.config.checkpoints and self.checkpointer is None:
+                self.checkpointer = await checkpointer.open_checkpointer(
+                    checkpointer.default_path(self.config.cache_dir))
+        return self.checkpointer
+
+    async def get_code_review_agent(self):
+        """Build the review agent once and share it between all files and runs."""
+        async with self._agent_lock:
+            if self._code_review_agent is None:
+                self._code_review_agent = await create_code_review_agent(
+                    store=self.store,
+                    mcp_tools=await self.get_mcp_tools(),
+                    llm=self.llm,
+                    retriever_tool=self.retriever_tool,
+                    checkpointer=await self.get_checkpointer()
+                )
+                log.info("Created code review agent.")
+
+        return self._code_review_agent
@@ -0,0 +1,242 @@
+import asyncio
+from typing import Any, Iterable, Optional
+
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
+from langchain_chroma import Chroma
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from langchain_openai import OpenAIEmbeddings
+from loguru import logger as log
+from pydantic import ConfigDict, Field
+
+from config import Config
+from services.flat_index import FlatVectorIndex
+from services.lexical_index import LexicalHit, LexicalIndex, query_terms
+from utils.errors import ValidationError
+from views.views import ChangedFile
+
+PREFETCH_DIFF_CHARS = 6000
+
+
+def create_embeddings(config: Config) -> Embeddings:
+    """Embeddings of the knowledge base, with query embeddings persisted under the cache directory."""
+    embeddings = config.embeddings or OpenAIEmbeddings(
+        model=config.embedding_model,
+        api_key=config.api_key
+    )
+
+    if not config.query_embedding_cache:
+        return embeddings
+
+    return CacheBackedEmbeddings.from_bytes_store(
+        embeddings,
+        LocalFileStore(str(config.cache_dir / "embeddings")),
+        namespace=config.embedding_model,
+        query_embedding_cache=True,
+        key_encoder="sha256",
+    )
+
+
+class FlatVectorStore(VectorStore):
+    """Read-only vector store over a memory-mapped FlatVectorIndex exported by the knowledge ETL."""
+
+    def __init__(self, index: FlatVectorIndex, embedding: Embeddings):
+        self.index = index
+        self._embedding = embedding
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @classmethod
+    def from_texts(cls, texts: list[str], embedding: Embeddings, metadatas: Optional[list[dict]] = None,
+                   **kwargs: Any) -> "FlatVectorStore":
+        raise ValidationError("The flat index is read-only, export it with the knowledge ETL")
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[list[dict]] = None, **kwargs: Any) -> list[str]:
+        raise ValidationError("The flat index is read-only, export it with the knowledge ETL")
+
+    def close(self):
+        self.index.close()
+
+    def _documents(self, results: list[tuple[int, float]]) -> list[tuple[Document, float]]:
+        documents = []
+        for index, score in results:
+            row = self.index.row(index)
+            documents.append((Document(page_content=row["text"], metadata=row["metadata"], id=row["id"]), score))
+        return documents
+
+    def search_by_vectors(self, vectors: list[list[float]], k: int) -> list[list[Document]]:
+        """Top `k` documents for each of several vectors, searched in one pass."""
+        return [
+            [document for document, _ in self._documents(results)]
+            for results in self.index.search(vectors, k)
+        ]
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        return self.search_by_vectors([embedding], k)[0]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> list[tuple[Document, float]]:
+        return self._documents(self.index.search([self._embedding.embed_query(query)], k)[0])
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        vector = await self._embedding.aembed_query(query)
+        return await asyncio.to_thread(self.similarity_search_by_vector, vector, k)
+
+
+def create_vectorstore(config: Config) -> VectorStore:
+    if config.vector_backend == "flat":
+        index_path = FlatVectorIndex.default_path(config.vector_db_path)
+        if not index_path.exists():
+            raise ValidationError(f"Flat vector index not found at {index_path}, "
+                                  "export it with `python -m scripts.load_knowledge --export_flat`")
+        return FlatVectorStore(FlatVectorIndex(index_path), create_embeddings(config))
+
+    return Chroma(
+        collection_name=config.vector_db_collection_name,
+        persist_directory=config.vector_db_path,
+        embedding_function=create_embeddings(config),
+    )
+
+
+def _chunk_key(document: Document) -> str:
+    return document.metadata.get("chunk_id") or document.id or document.page_content
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retrieves knowledge chunks by fusing BM25 and vector search with reciprocal rank fusion.
+
+    Queries whose best lexical hit contains every query term and clearly
+    outscores the runner-up, like lookups of a named convention, are answered
+    from the lexical index alone, without embedding the query.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: VectorStore
+    lexical_index: Optional[LexicalIndex] = None
+    mode: str = "hybrid"
+    k: int = 4
+    candidates: int = 20
+    rrf_k: int = 60
+    confidence_ratio: float = 1.5
+    stats: dict = Field(default_factory=lambda: {"lexical_only": 0, "fused": 0, "vector": 0})
+
+    def _use_lexical(self) -> bool:
+        return self.mode != "vector" and self.lexical_index is not None
+
+    def _is_confident(self, query: str, hits: list[LexicalHit]) -> bool:
+        if not hits or len(query_terms(query)) < 2:
+            return False
+        if len(hits) > 1 and hits[0].score < self.confidence_ratio * hits[1].score:
+            return False
+        return self.lexical_index.contains_all_terms(hits[0].chunk_id, query)
+
+    def _lexical_documents(self, hits: list[LexicalHit]) -> list[Document]:
+        return [Document(page_content=hit.text, metadata=hit.metadata, id=hit.chunk_id) for hit in hits]
+
+    def _fuse(self, hits: list[LexicalHit], vector_documents: list[Document]) -> list[Document]:
+        scores: dict[str, float] = {}
+        documents: dict[str, Document] = {}
+
+        for ranking in (self._lexical_documents(hits), vector_documents):
+            for rank, document in enumerate(ranking):
+                key = _chunk_key(document)
+                scores[key] = scores.get(key, 0.0) + 1 / (self.rrf_k + rank + 1)
+                documents.setdefault(key, document)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        return [documents[key] for key in ranked[:self.k]]
+
+    def _lexical_answer(self, query: str, hits: list[LexicalHit]) -> Optional[list[Document]]:
+        """Documents to return without a vector search, or None when one is needed."""
+        if self.mode == "lexical" or self._is_confident(query, hits):
+            self.stats["lexical_only"] += 1
+            return self._lexical_documents(hits[:self.k])
+        return None
+
+    def _vector_answer(self, hits: list[LexicalHit], vector_documents: list[Document]) -> list[Document]:
+        if not self._use_lexical():
+            self.stats["vector"] += 1
+            return vector_documents[:self.k]
+        self.stats["fused"] += 1
+        return self._fuse(hits, vector_documents)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        hits = self.lexical_index.search(query, self.candidates) if self._use_lexical() else []
+        if (documents := self._lexical_answer(query, hits)) is not None:
+            return documents
+
+        vector_documents = self.vectorstore.similarity_search(query, k=self.candidates if hits else self.k)
+        return self._vector_answer(hits, vector_documents)
+
+    def close(self):
+        """Close the lexical index; the vector store belongs to the caller."""
+        if self.lexical_index is not None:
+            self.lexical_index.close()
+
+    async def _aget_relevant_documents(
+            self,
+            query: str,
+            *,
+            run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        hits = await asyncio.to_thread(self.lexical_index.search, query, self.candidates) \
+            if self._use_lexical() else []
+        if (documents := self._lexical_answer(query, hits)) is not None:
+            return documents
+
+        vector_documents = await self.vectorstore.asimilarity_search(query, k=self.candidates if hits else self.k)
+        return self._vector_answer(hits, vector_documents)
+
+
+def create_retriever(config: Config, vectorstore: VectorStore) -> HybridRetriever:
+    lexical_index = None
+    if config.retrieval_mode != "vector":
+        lexical_index = LexicalIndex.open_existing(config.vector_db_path)
+        if lexical_index is None:
+            log.warning("No lexical index found next to the vector database, run the knowledge ETL to create it. "
+                        "Falling back to vector search.")
+
+    mode = config.retrieval_mode if lexical_index is not None else "vector"
+    return HybridRetriever(vectorstore=vectorstore, lexical_index=lexical_index, mode=mode)
+
+
+def _query_many(vectorstore: VectorStore, vectors: list[list[float]], k: int) -> list[list[str]]:
+    if isinstance(vectorstore, FlatVectorStore):
+        return [[document.page_content for document in documents]
+                for documents in vectorstore.search_by_vectors(vectors, k)]
+
+    collection = getattr(vectorstore, "_collection", None)
+    if collection is None:
+        return [[document.page_content for document in vectorstore.similarity_search_by_vector(vector, k)]
+                for vector in vectors]
+
+    # langchain_chroma has no public batched search, so all vectors go to its Chroma collection in one query
+    return collection.query(query_embeddings=vectors, n_results=k, include=["documents"])["documents"]
+
+
+async def prefetch_knowledge(vectorstore: VectorStore, changed_files: list[ChangedFile], k: int) -> dict[str, list[str]]:
+    """
+    Top `k` knowledge chunks for each changed file, keyed by file path.
+
+    The diffs of all files are embedded in one batched call and searched in
+    one query against the collection instead of one round trip per file.
+    Vector stores without a batched search are queried once per file.
+    """
+    texts = [f"{changed_file.file_path}\n{(changed_file.changes or '')[:PREFETCH_DIFF_CHARS]}"
+             for changed_file in changed_files]
+    vectors = await vectorstore.embeddings.aembed_documents(texts)
+
+    results = await asyncio.to_thread(_query_many, vectorstore, vectors, k)
+    return {
+        changed_file.file_path: [document for document in documents if document]
+        for changed_file, documents in zip(changed_files, results)
+    }
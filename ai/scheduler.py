@@ -0,0 +1,201 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import get_buffer_string
+from langchain_core.outputs import LLMResult
+from loguru import logger as log
+
+from ai.instrumentation import FileMetrics
+from ai.llm_cache import is_cache_hit
+from utils.errors import BudgetExceededError
+from utils.tokens import count_tokens
+
+WINDOW_SECONDS = 60.0
+
+
+class RateLimiter:
+    """
+    Sliding one-minute window over request and token budgets. A budget of 0 disables it.
+
+    One limiter is shared by all runs that use the same provider account.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._events: deque[tuple[float, int]] = deque()
+        self._lock = asyncio.Lock()
+
+    def _prune(self, now: float):
+        while self._events and now - self._events[0][0] >= WINDOW_SECONDS:
+            self._events.popleft()
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a request of `tokens` fits in the window, 0 if it fits now."""
+        if not self._events:
+            # An empty window always admits, so requests larger than the budget still run.
+            return 0.0
+
+        waits = []
+        if self.requests_per_minute and len(self._events) >= self.requests_per_minute:
+            timestamp, _ = self._events[len(self._events) - self.requests_per_minute]
+            waits.append(WINDOW_SECONDS - (now - timestamp))
+
+        if self.tokens_per_minute:
+            excess = sum(event_tokens for _, event_tokens in self._events) + tokens - self.tokens_per_minute
+            freed = 0
+            for timestamp, event_tokens in self._events:
+                if freed >= excess:
+                    break
+                freed += event_tokens
+                expires_in = WINDOW_SECONDS - (now - timestamp)
+            if excess > 0:
+                waits.append(expires_in)
+
+        return max(waits, default=0.0)
+
+    async def acquire(self, tokens: int) -> tuple[tuple[float, int], int, float]:
+        """
+        Wait until the budgets allow the request.
+        Returns (its charge in the window, throttle events, seconds throttled).
+        """
+        throttles = 0
+        throttled_seconds = 0.0
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    charge = (now, tokens)
+                    self._events.append(charge)
+                    return charge, throttles, throttled_seconds
+
+                throttles += 1
+                throttled_seconds += wait
+                log.warning(f"Rate limit reached, throttling for {wait:.2f}s")
+                await asyncio.sleep(wait)
+
+    def release(self, charge: tuple[float, int]):
+        """Give back a charge for a request that never reached the provider."""
+        try:
+            self._events.remove(charge)
+        except ValueError:
+            pass
+
+
+class RateLimitCallbackHandler(AsyncCallbackHandler):
+    """
+    Takes every LLM call from the rate limiter before it is sent, with the
+    tokens of its whole prompt, so the budgets hold for each agent turn and
+    not only for the first one. Calls answered from the response cache are
+    given back once they end.
+    """
+    raise_error = True
+
+    def __init__(self, rate_limiter: RateLimiter, model_name: str, file_metrics=None):
+        self.rate_limiter = rate_limiter
+        self.model_name = model_name
+        self.file_metrics = file_metrics
+        self._charges: dict[UUID, tuple[float, int]] = {}
+
+    async def _acquire(self, run_id: UUID, prompt: str):
+        tokens = count_tokens(prompt, self.model_name)
+        charge, throttles, throttled_seconds = await self.rate_limiter.acquire(tokens)
+        self._charges[run_id] = charge
+        if self.file_metrics is not None:
+            self.file_metrics.throttles += throttles
+            self.file_metrics.throttled_seconds += throttled_seconds
+
+    async def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, **kwargs: Any):
+        await self._acquire(run_id, "\n".join(get_buffer_string(batch) for batch in messages))
+
+    async def on_llm_start(self, serialized: dict, prompts: list[str], *, run_id: UUID, **kwargs: Any):
+        await self._acquire(run_id, "\n".join(prompts))
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        charge = self._charges.pop(run_id, None)
+        if charge is not None and is_cache_hit(response):
+            self.rate_limiter.release(charge)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._charges.pop(run_id, None)
+
+
+@dataclass
+class ReviewJob:
+    """A unit of work for the scheduler, ordered by `size`."""
+    name: str
+    size: int
+    tokens: int
+    run: Callable[[], Awaitable[None]]
+    metrics: Optional[FileMetrics] = None
+    enqueued_at: Optional[float] = None
+
+
+class ReviewScheduler:
+    """
+    Runs review jobs largest first with a concurrency cap. The per-minute
+    request and token budgets are enforced per LLM call by
+    RateLimitCallbackHandler.
+
+    A failing job does not stop the others; `run` returns the failures by
+    job name. Only an exceeded budget ends the whole run.
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        self.max_concurrency = max(1, max_concurrency)
+
+    async def run(self, jobs: list[ReviewJob]) -> dict[str, Exception]:
+        failures: dict[str, Exception] = {}
+        queue: asyncio.Queue[ReviewJob] = asyncio.Queue()
+        now = time.monotonic()
+        for job in sorted(jobs, key=lambda job: job.size, reverse=True):
+            job.enqueued_at = now
+            queue.put_nowait(job)
+
+        workers = min(self.max_concurrency, len(jobs))
+        log.info(f"Scheduling {len(jobs)} jobs on {workers} workers")
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for _ in range(workers):
+                    tg.create_task(self._worker(queue, failures))
+        except ExceptionGroup as e:
+            # Surface the failure that ended the run with its own type, e.g. BudgetExceededError.
+            raise e.exceptions[0]
+
+        if failures:
+            log.warning(f"{len(failures)} of {len(jobs)} jobs failed: {', '.join(failures)}")
+        return failures
+
+    async def _worker(self, queue: asyncio.Queue, failures: dict[str, Exception]):
+        while not queue.empty():
+            job = queue.get_nowait()
+
+            started_at = time.monotonic()
+            queue_wait = started_at - job.enqueued_at
+
+            try:
+                await job.run()
+            except BudgetExceededError:
+                raise
+            except Exception as e:
+                failures[job.name] = e
+                log.error(f"Job {job.name} failed after {time.monotonic() - started_at:.2f}s: "
+                          f"{type(e).__name__}: {e}")
+                continue
+
+            run_time = time.monotonic() - started_at
+            metrics = job.metrics or FileMetrics(file_path=job.name)
+            log.info(
+                f"Job {job.name}: queue wait {queue_wait:.2f}s, run time {run_time:.2f}s, "
+                f"throttle events {metrics.throttles} ({metrics.throttled_seconds:.2f}s), "
+                f"~{job.tokens} tokens in the first prompt"
+            )
@@ -0,0 +1,179 @@
+import asyncio
+import json
+from collections import defaultdict
+from pathlib import PurePosixPath
+from typing import Any, Callable
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.runnables import RunnableConfig
+from loguru import logger as log
+
+from ai.agents import summarize_review_result, with_streaming
+from ai.prompts import create_final_summary_prompt, create_group_summary_prompt
+from utils.tokens import count_tokens
+
+
+class _TokenStream(AsyncCallbackHandler):
+    def __init__(self, on_token: Callable[[str], None]):
+        self.on_token = on_token
+        self.streamed = False
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token:
+            self.streamed = True
+            self.on_token(token)
+
+
+class HierarchicalSummarizer:
+    """
+    Map-reduce summarization of per-file findings.
+
+    Findings that fit the token budget together are summarized in a single
+    call. Beyond that, findings are grouped by directory and a group is
+    summarized as soon as all of its expected files are reviewed or its
+    findings reach the budget, while other files are still under review. The
+    group summaries are then reduced, in several rounds if they do not fit
+    one prompt.
+
+    With `on_token`, the tokens of the final summary are passed on while the
+    model produces them, or all at once when it comes from the cache.
+    """
+
+    def __init__(self, llm, config: RunnableConfig, model_name: str, token_budget: int = 8000, max_concurrency: int = 4,
+                 on_token: Callable[[str], None] = None):
+        self.llm = llm
+        self.config = config
+        self.on_token = on_token
+        self._token_stream = None
+        self.model_name = model_name
+        self.token_budget = token_budget
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        self._expected = defaultdict(set)
+        self._pending = defaultdict(list)
+        self._pending_tokens = defaultdict(int)
+        self._received = defaultdict(set)
+        self._group_tasks: list[asyncio.Task] = []
+
+    @staticmethod
+    def group_name(file_path: str) -> str:
+        return str(PurePosixPath(file_path).parent)
+
+    def expect(self, file_paths: list[str]):
+        """Register the files of the run so complete groups can be summarized early."""
+        for file_path in file_paths:
+            self._expected[self.group_name(file_path)].add(file_path)
+
+        self._flush_complete_groups()
+
+    def add(self, file_path: str, findings: Any):
+        """Add the findings of a reviewed file."""
+        group = self.group_name(file_path)
+        entry = {"file_path": file_path, "findings": findings}
+        tokens = count_tokens(json.dumps(entry), self.model_name)
+
+        if self._pending[group] and self._pending_tokens[group] + tokens > self.token_budget:
+            self._flush(group)
+
+        self._pending[group].append(entry)
+        self._pending_tokens[group] += tokens
+        self._received[group].add(file_path)
+        self._flush_complete_groups()
+
+    def _flush_complete_groups(self):
+        # While all findings still fit one budget they are summarized together at the end
+        if not self._group_tasks and sum(self._pending_tokens.values()) <= self.token_budget:
+            return
+
+        for group in list(self._pending):
+            expected = self._expected.get(group)
+            if expected and expected <= self._received[group]:
+                self._flush(group)
+
+    def _flush(self, group: str):
+        entries = self._pending.pop(group, [])
+        self._pending_tokens.pop(group, None)
+        if not entries:
+            return
+
+        log.info(f"Summarizing {len(entries)} reviewed files in {group}")
+        self._group_tasks.append(asyncio.create_task(self._summarize_group(group, entries)))
+
+    def _final_call(self) -> tuple:
+        """LLM and config of the call that produces the final summary."""
+        if self._token_stream is None:
+            return self.llm, self.config
+        callbacks = [*self.config.get("callbacks", []), self._token_stream]
+        return with_streaming(self.llm), {**self.config, "callbacks": callbacks}
+
+    async def _invoke(self, prompt: str, final: bool = False) -> str:
+        llm, config = self._final_call() if final else (self.llm, self.config)
+        async with self._semaphore:
+            response = await llm.ainvoke(input=prompt, config=config)
+        return response.content
+
+    async def _summarize_group(self, group: str, entries: list) -> str:
+        return await self._invoke(create_group_summary_prompt(group) + json.dumps(entries))
+
+    def _batches(self, summaries: list[str]) -> list[list[str]]:
+        """
+        Split summaries into batches within the token budget. Every batch holds
+        at least two summaries, even over the budget, so each reduce round
+        shrinks their number and the reduction always ends.
+        """
+        batches, batch, batch_tokens = [], [], 0
+        for summary in summaries:
+            tokens = count_tokens(summary, self.model_name)
+            if len(batch) >= 2 and batch_tokens + tokens > self.token_budget:
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(summary)
+            batch_tokens += tokens
+        if len(batch) == 1 and batches:
+            batches[-1].append(batch[0])
+        elif batch:
+            batches.append(batch)
+        return batches
+
+    async def _reduce(self, summaries: list[str]) -> str:
+        if not summaries:
+            return ""
+
+        while True:
+            batches = self._batches(summaries)
+            if len(batches) == 1 and len(batches[0]) == 1:
+                return batches[0][0]
+
+            log.info(f"Reducing {len(summaries)} summaries in {len(batches)} batches")
+            summaries = list(await asyncio.gather(*(
+                self._invoke(create_final_summary_prompt() + "\n\n---\n\n".join(batch), final=len(batches) == 1)
+                for batch in batches
+            )))
+
+            if len(batches) == 1:
+                return summaries[0]
+
+    async def summarize(self) -> str:
+        """Summarize the remaining groups and reduce everything into the final summary."""
+        self._token_stream = _TokenStream(self.on_token) if self.on_token is not None else None
+        summary = await self._summarize()
+        if self._token_stream is not None and not self._token_stream.streamed and summary:
+            self.on_token(summary)
+        self._token_stream = None
+        return summary
+
+    async def _summarize(self) -> str:
+        if not self._group_tasks:
+            entries = [entry for group in self._pending.values() for entry in group]
+            if sum(self._pending_tokens.values()) <= self.token_budget:
+                self._pending.clear()
+                self._pending_tokens.clear()
+                llm, config = self._final_call()
+                return await summarize_review_result(llm, [entry["findings"] for entry in entries], config)
+
+        for group in list(self._pending):
+            self._flush(group)
+
+        group_summaries = await asyncio.gather(*self._group_tasks)
+        self._group_tasks.clear()
+        return await self._reduce(list(group_summaries))
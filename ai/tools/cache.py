@@ -0,0 +1,74 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Hashable
+
+from loguru import logger as log
+
+
+class ToolResultCache:
+    """
+    Run-scoped cache of tool results shared by all review agents.
+
+    Concurrent identical calls are coalesced: the first one executes and the
+    others wait for its result instead of running the tool again.
+    """
+
+    def __init__(self):
+        self._results: dict[tuple[str, Hashable], Any] = {}
+        self._in_flight: dict[tuple[str, Hashable], asyncio.Future] = {}
+        self._stats = defaultdict(lambda: {"hits": 0, "coalesced": 0, "misses": 0})
+
+    async def get_or_compute(
+            self,
+            tool_name: str,
+            key: Hashable,
+            compute: Callable[[], Awaitable[Any]],
+            should_cache: Callable[[Any], bool] = lambda result: True
+    ) -> Any:
+        cache_key = (tool_name, key)
+        stats = self._stats[tool_name]
+
+        if cache_key in self._results:
+            stats["hits"] += 1
+            return self._results[cache_key]
+
+        if cache_key in self._in_flight:
+            stats["coalesced"] += 1
+            return await asyncio.shield(self._in_flight[cache_key])
+
+        stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = future
+
+        try:
+            result = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case no other call was waiting for it.
+            future.exception()
+            raise
+        else:
+            if should_cache(result):
+                self._results[cache_key] = result
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(cache_key, None)
+
+    def report(self) -> dict:
+        """Hit rates per tool, counting coalesced calls as hits."""
+        report = {}
+        for tool_name, stats in self._stats.items():
+            calls = stats["hits"] + stats["coalesced"] + stats["misses"]
+            report[tool_name] = {
+                **stats,
+                "hit_rate": round((stats["hits"] + stats["coalesced"]) / calls, 3) if calls else 0.0,
+            }
+        return report
+
+    def log_report(self):
+        for tool_name, stats in self.report().items():
+            log.info(
+                f"Tool cache {tool_name}: {stats['hits']} hits, {stats['coalesced']} coalesced, "
+                f"{stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)"
+            )
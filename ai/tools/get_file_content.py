@@ -1,41 +1,214 @@
+import ast
+import asyncio
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Hashable, Optional
 
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
+from utils.files import BINARY_SNIFF_BYTES, is_binary
+
+MAX_FILE_BYTES = 2 * 1024 * 1024
+MAX_OUTPUT_CHARS = 40_000
+LINE_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class FileNotReadableError(Exception):
+    """The file is binary or too large to return, the message is shown to the agent."""
+
+
+class _LineCache:
+    """LRU of decoded file lines keyed by blob SHA, or by path, mtime and size for working tree files."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[Optional[list[str]], int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, lines: Optional[list[str]], size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (lines, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+
+_line_cache = _LineCache(LINE_CACHE_BYTES)
+
+
+def _decode(content: bytes) -> Optional[list[str]]:
+    """Lines of a text file, or None for binary content."""
+    if is_binary(content):
+        return None
+    return content.decode("utf-8", errors="replace").splitlines()
+
+
+def _resolve_path(file_path: str, configurable: dict) -> Path:
+    path_obj = Path(file_path)
+    if path_obj.is_absolute():
+        return path_obj
+
+    try:
+        project_path = configurable.get("project_path")
+        return project_path / path_obj
+    except BaseException as e:
+        raise ValueError("Project path not found in configuration. Ensure 'project_path' is set in the agent's config.") from e
+
+
+def read_file_lines(file_path: str, configurable: dict, whole_file: bool = True) -> list[str]:
+    """
+    Lines of a file at the reviewed branch, or of the working tree without an object reader.
+
+    Sizes are checked before reading, so whole-file reads of large files fail
+    without loading them, and binary files are detected without being decoded.
+    """
+    object_reader = configurable.get("object_reader")
+
+    if object_reader is not None:
+        entry = object_reader.entry(file_path)
+        if entry is None:
+            raise FileNotFoundError(f"{file_path} does not exist at {object_reader.ref}")
+        key, size = ("blob", entry.sha), entry.size
+    else:
+        full_file_path = _resolve_path(file_path, configurable).resolve()
+        stat = full_file_path.stat()
+        key, size = ("file", str(full_file_path), stat.st_mtime_ns, stat.st_size), stat.st_size
+
+    cached = _line_cache.get(key)
+    if cached is None:
+        if whole_file and size > MAX_FILE_BYTES:
+            raise FileNotReadableError(
+                f"{file_path} has {size} bytes, which is too large to read at once. "
+                "Request a line range or a symbol instead.")
+
+        if object_reader is not None:
+            lines = _decode(object_reader.read_blob(entry.sha))
+        else:
+            with open(full_file_path, "rb") as f:
+                head = f.read(BINARY_SNIFF_BYTES)
+                lines = None if is_binary(head) else _decode(head + f.read())
+        _line_cache.put(key, lines, size)
+    else:
+        lines, _ = cached
+
+    if lines is None:
+        raise FileNotReadableError(f"{file_path} is a binary file of {size} bytes.")
+    return lines
+
+
+def _symbol_ranges(lines: list[str], symbol: str) -> list[tuple[int, int]]:
+    """Line ranges of the functions and classes named `symbol`, decorators included."""
+    tree = ast.parse("\n".join(lines))
+    name = symbol.split(".")[-1]
+    return sorted(
+        (node.decorator_list[0].lineno if node.decorator_list else node.lineno, node.end_lineno)
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node.name == name
+    )
+
+
+def _numbered_slice(file_path: str, lines: list[str], start: int, end: int) -> str:
+    """Lines `start` to `end` prefixed with their numbers, cut off at MAX_OUTPUT_CHARS."""
+    output = [f"{file_path} lines {start}-{end} of {len(lines)}:"]
+    output_chars = len(output[0])
+
+    for number in range(start, end + 1):
+        line = f"{number:>5} | {lines[number - 1]}"
+        if output_chars + len(line) + 1 > MAX_OUTPUT_CHARS:
+            output.append(f"... output truncated, call again with start_line={number} to read the rest.")
+            break
+        output.append(line)
+        output_chars += len(line) + 1
+
+    return "\n".join(output)
+
+
+def get_file_slice(
+        file_path: str,
+        configurable: dict,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        symbol: Optional[str] = None
+) -> str:
+    whole_file = start_line is None and end_line is None and symbol is None
+
+    try:
+        lines = read_file_lines(file_path, configurable, whole_file=whole_file)
+    except FileNotReadableError as e:
+        return str(e)
+
+    if not lines:
+        return f"{file_path} is empty."
+
+    if symbol:
+        if not file_path.endswith(".py"):
+            return "Symbols can only be read from Python files, request a line range instead."
+        try:
+            ranges = _symbol_ranges(lines, symbol)
+        except (SyntaxError, ValueError):
+            return f"{file_path} could not be parsed, request a line range instead."
+        if not ranges:
+            return f"No function or class named `{symbol}` in {file_path}."
+        return "\n...\n".join(_numbered_slice(file_path, lines, start, end) for start, end in ranges)
+
+    start = max(start_line or 1, 1)
+    end = min(end_line or len(lines), len(lines))
+    if start > end:
+        return f"{file_path} has {len(lines)} lines, the requested range is outside of the file."
+
+    return _numbered_slice(file_path, lines, start, end)
+
 
 @tool(parse_docstring=True)
-def get_file_content(file_path: str, config: RunnableConfig):
+async def get_file_content(
+        file_path: str,
+        config: RunnableConfig,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        symbol: Optional[str] = None
+):
     """
-    Read the full contents of a specified source code file.
+    Read a source code file at the reviewed branch, whole or in part, with line numbers.
     Use this to investigate file-level logic when regex-based search doesn't provide enough context.
+    Prefer reading a symbol or a line range over the whole file; long outputs are truncated.
 
     Args:
         file_path (str): Absolute or relative path to the file.
         config: Agent runtime config (RunnableConfig).
+        start_line (int): First line to read, 1-based. Defaults to the start of the file.
+        end_line (int): Last line to read, inclusive. Defaults to the end of the file.
+        symbol (str): Name of a Python function or class to read instead of a line range.
 
     Returns:
-        str: Full contents of the file.
+        str: The requested lines, each prefixed with its line number.
     """
-    path_obj = Path(file_path)
-    if path_obj.is_absolute():
-        full_file_path = path_obj
-    else:
-        try:
-            configurable = config["configurable"]
-            project_path = configurable.get("project_path")
-            full_file_path = project_path / path_obj
-        except BaseException as e:
-            raise ValueError("Project path not found in configuration. Ensure 'project_path' is set in the agent's config.") from e
+    configurable = config.get("configurable", {})
+    read = lambda: asyncio.to_thread(get_file_slice, file_path, configurable, start_line, end_line, symbol)
 
-    return read_file(full_file_path)
-
-
-def get_file_content_with_project_oath(file_path: str, project_path: str):
-    path_obj = Path(project_path) / file_path
-    return read_file(path_obj)
+    tool_cache = configurable.get("tool_cache")
+    if tool_cache is None:
+        return await read()
 
+    object_reader = configurable.get("object_reader")
+    if object_reader is not None:
+        path_key = object_reader.relative_path(file_path)
+    else:
+        path_key = str(_resolve_path(file_path, configurable).resolve())
 
-def read_file(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
\ No newline at end of file
+    return await tool_cache.get_or_compute("get_file_content", (path_key, start_line, end_line, symbol), read)
@@ -1,43 +1,187 @@
-import subprocess
+import asyncio
 
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
+from loguru import logger as log
+
+SEARCH_TIMEOUT_SECONDS = 20
+MAX_MATCHES_PER_FILE = 20
+MAX_LINE_CHARS = 300
+MAX_OUTPUT_BYTES = 2 * 1024 * 1024
+PAGE_BYTES = 8 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+
+
+def _ripgrep_command(query: str, lines_of_code: int) -> list[str]:
+    command = [
+        "rg",
+        "--line-number",
+        "--no-heading",
+        "--color=never",
+        f"--max-count={MAX_MATCHES_PER_FILE}",
+        f"--max-columns={MAX_LINE_CHARS}",
+        "--max-columns-preview",
+    ]
+
+    if lines_of_code:
+        command.append(f'-C{lines_of_code}')
+
+    return command + ["--", query, "."]
+
+
+def _git_grep_command(query: str, lines_of_code: int, ref: str, perl_regexp: bool = True) -> list[str]:
+    command = [
+        "git", "grep",
+        "--line-number",
+        "--no-color",
+        "-I",
+        "--full-name",
+        f"--max-count={MAX_MATCHES_PER_FILE}",
+        "--perl-regexp" if perl_regexp else "--extended-regexp",
+    ]
+
+    if lines_of_code:
+        command.append(f'-C{lines_of_code}')
+
+    # `:/` searches the whole tree at the ref, like the object reader, whatever the project directory
+    return command + ["-e", query, ref, "--", ":/"]
+
+
+def _strip_path_prefix(output: str, prefix: str) -> str:
+    return "\n".join(line.removeprefix(prefix) for line in output.split("\n"))
+
+
+async def _run_search(command: list[str], cwd, query: str, path_prefix: str) -> str:
+    """
+    Run rg or git grep in `cwd` and return its output with `path_prefix` removed
+    from every line, so both report paths relative to the searched tree.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        return f"Error:\n{command[0]} is not installed."
+
+    # stderr is drained alongside stdout, so the search never blocks on a full stderr pipe
+    stderr_task = asyncio.create_task(process.stderr.read())
+    chunks = []
+    total_bytes = 0
+    truncated = False
+
+    async def read_output():
+        nonlocal total_bytes, truncated
+        while chunk := await process.stdout.read(READ_CHUNK_BYTES):
+            chunks.append(chunk)
+            total_bytes += len(chunk)
+            if total_bytes >= MAX_OUTPUT_BYTES:
+                truncated = True
+                process.kill()
+                break
+
+    try:
+        await asyncio.wait_for(read_output(), timeout=SEARCH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        log.warning(f"Search for {query!r} timed out after {SEARCH_TIMEOUT_SECONDS}s")
+        if not chunks:
+            return f"Error:\nSearch timed out after {SEARCH_TIMEOUT_SECONDS}s, use a more specific pattern."
+        truncated = True
+
+    stderr = await stderr_task
+    return_code = await process.wait()
+    output = _strip_path_prefix(b"".join(chunks)[:MAX_OUTPUT_BYTES].decode("utf-8", errors="replace"), path_prefix)
+
+    if truncated:
+        return output + "\n... search output truncated, use a more specific pattern."
+    elif return_code == 0:
+        return output
+    elif return_code == 1:
+        return "No matches found."
+    else:
+        return f"Error:\n{stderr.decode('utf-8', errors='replace')}"
+
+
+async def _search_source(query: str, lines_of_code: int, configurable: dict) -> str:
+    """
+    Search the reviewed ref with git grep, the tree the symbol index and the
+    file tools read, or the working tree with ripgrep when there is no ref.
+    """
+    object_reader = configurable.get("object_reader")
+    if object_reader is None:
+        return await _run_search(
+            _ripgrep_command(query, lines_of_code), configurable.get("project_path"), query, "./")
+
+    async def git_grep(perl_regexp: bool) -> str:
+        return await _run_search(
+            _git_grep_command(query, lines_of_code, object_reader.ref, perl_regexp),
+            object_reader.project_path, query, f"{object_reader.ref}:")
+
+    output = await git_grep(perl_regexp=True)
+    if output.startswith("Error:") and "USE_LIBPCRE" in output:
+        # git built without PCRE
+        output = await git_grep(perl_regexp=False)
+    return output
+
+
+def _page(output: str, cursor: int) -> str:
+    """Return at most PAGE_BYTES of output lines, each capped at MAX_LINE_CHARS, starting at line `cursor`."""
+    lines = output.splitlines()
+    page = []
+    page_bytes = 0
+
+    for number in range(cursor, len(lines)):
+        line = lines[number][:MAX_LINE_CHARS]
+        line_bytes = len(line.encode("utf-8")) + 1
+        if page and page_bytes + line_bytes > PAGE_BYTES:
+            page.append(f"... {len(lines) - number} more lines, call again with cursor={number}.")
+            break
+        page.append(line)
+        page_bytes += line_bytes
+
+    return "\n".join(page) if page else "No more results."
 
 
 @tool(parse_docstring=True)
-def regex_file_search(query: str, lines_of_code: int, config: RunnableConfig):
+async def regex_file_search(query: str, lines_of_code: int, config: RunnableConfig, cursor: int = 0):
     """
     Search the codebase using a regular expression and return matching lines with context.
-    This tool uses ripgrep to find symbols like functions, classes, or variables
+    This tool searches the reviewed branch to find symbols like functions, classes, or variables
     that may have been changed and are referenced elsewhere.
+    Large results are paginated: pass the cursor from the end of a page to get the next one.
 
     Args:
         query (str): The regex pattern to search for.
         lines_of_code (int): Number of context lines to include before and after each match.
         config: Agent runtime config (RunnableConfig).
+        cursor (int): Line offset of the page to return, 0 for the first page.
 
     Returns:
         list[str]: Matching lines with surrounding context.
     """
-    pass
-    args = [query]
+    configurable = config["configurable"]
 
-    if lines_of_code:
-        args.append(f'-C{lines_of_code}')
+    async def search():
+        output = None
+        symbol_index = configurable.get("symbol_index")
+        if symbol_index is not None:
+            output = await asyncio.to_thread(symbol_index.search, query, lines_of_code)
 
-    configurable = config["configurable"]
-    project_path = configurable.get("project_path")
-    args.append(project_path)
-
-    result = subprocess.run(
-        ['rg'] + args,
-        capture_output=True,
-        encoding='utf-8',
-    )
-
-    if result.returncode == 0:
-        return result.stdout
-    elif result.returncode == 1:
-        return "No matches found."
+        if output is None:
+            output = await _search_source(query, lines_of_code, configurable)
+        return output
+
+    tool_cache = configurable.get("tool_cache")
+    if tool_cache is None:
+        output = await search()
     else:
-        return f"Error:\n{result.stderr}"
\ No newline at end of file
+        output = await tool_cache.get_or_compute(
+            "regex_file_search", (query, lines_of_code), search,
+            should_cache=lambda result: not result.startswith("Error:")
+        )
+
+    return _page(output, cursor)
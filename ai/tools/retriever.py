@@ -1,9 +1,15 @@
-from langchain_chroma import Chroma
-from langchain_core.tools import create_retriever_tool, Tool
-from langchain_openai import OpenAIEmbeddings
-
+from langchain_core.callbacks import Callbacks
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import Tool
+from langchain_core.tools.retriever import RetrieverInput
+from langchain_core.vectorstores import VectorStore
+
+from ai.retrieval import create_retriever, create_vectorstore
 from config import Config
 
+RETRIEVER_TOOL_NAME = "retrieve_internal_knowledge"
+
 
 def get_retriever_tool_description():
     return """
@@ -18,23 +24,40 @@ def get_retriever_tool_description():
             str: Closest matching convention, example, or suggestion.
     """
 
-def get_retriever_tool(config: Config) -> Tool:
+def get_retriever_tool(config: Config, vectorstore: VectorStore = None) -> Tool:
 
-    vectorstore = Chroma(
-        collection_name=config.vector_db_collection_name,
-        persist_directory=config.vector_db_path,
-        embedding_function=OpenAIEmbeddings(
-            model=config.embedding_model,
-            api_key=config.api_key
-        ),
-    )
+    if vectorstore is None:
+        vectorstore = create_vectorstore(config)
 
-    retriever = vectorstore.as_retriever()
+    retriever = create_retriever(config, vectorstore)
+
+    return create_cached_retriever_tool(retriever)
 
-    retriever_tool = create_retriever_tool(
-        retriever,
-        "retrieve_internal_knowledge",
-        get_retriever_tool_description(),
-    )
 
-    return retriever_tool
\ No newline at end of file
+def create_cached_retriever_tool(retriever: BaseRetriever) -> Tool:
+    """
+    Like `create_retriever_tool`, but identical queries of the run are answered
+    from the shared tool cache in the runtime config, when there is one.
+    """
+
+    def retrieve(query: str, callbacks: Callbacks = None) -> str:
+        docs = retriever.invoke(query, config={"callbacks": callbacks})
+        return "\n\n".join(doc.page_content for doc in docs)
+
+    async def aretrieve(query: str, config: RunnableConfig, callbacks: Callbacks = None) -> str:
+        async def compute():
+            docs = await retriever.ainvoke(query, config={"callbacks": callbacks})
+            return "\n\n".join(doc.page_content for doc in docs)
+
+        tool_cache = config.get("configurable", {}).get("tool_cache")
+        if tool_cache is None:
+            return await compute()
+        return await tool_cache.get_or_compute(RETRIEVER_TOOL_NAME, query, compute)
+
+    return Tool(
+        name=RETRIEVER_TOOL_NAME,
+        description=get_retriever_tool_description(),
+        func=retrieve,
+        coroutine=aretrieve,
+        args_schema=RetrieverInput,
+    )
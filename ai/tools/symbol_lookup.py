@@ -0,0 +1,32 @@
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+
+MAX_RESULTS = 200
+
+
+@tool(parse_docstring=True)
+def symbol_lookup(name: str, config: RunnableConfig):
+    """
+    Find where a Python function, class, variable or attribute is defined and referenced.
+    Prefer this over regex search for cross-file consistency checks of Python symbols:
+    it answers from a prebuilt index instead of scanning the project.
+
+    Args:
+        name (str): Exact symbol name, e.g. `fetch_user_profile`.
+        config: Agent runtime config (RunnableConfig).
+
+    Returns:
+        str: One `path:line: kind` entry per definition or reference.
+    """
+    symbol_index = config.get("configurable", {}).get("symbol_index")
+    if symbol_index is None:
+        return "Symbol index is not available, use regex_file_search instead."
+
+    results = symbol_index.lookup_symbol(name)
+    if not results:
+        return f"No definitions or references of `{name}` found."
+
+    lines = [f"{path}:{line}: {kind}" for path, line, kind in results[:MAX_RESULTS]]
+    if len(results) > MAX_RESULTS:
+        lines.append(f"... {len(results) - MAX_RESULTS} more results omitted.")
+    return "\n".join(lines)
@@ -0,0 +1,53 @@
+"""
+Benchmark review agent setup cost against the number of changed files.
+
+Compares building the agent graph for every file with building it once per run.
+The MCP client and retriever tool are replaced by local stubs so no network is used.
+
+Usage:
+    python -m benchmarks.agent_setup --files 10 50 100
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from langgraph.store.memory import InMemoryStore
+
+from ai.agents import create_code_review_agent, create_llm
+from benchmarks.fakes import StubMCPClient, create_bench_config, retrieve_internal_knowledge
+
+
+async def build_agents(count: int) -> float:
+    config = create_bench_config()
+    store = InMemoryStore()
+    mcp_client = StubMCPClient()
+
+    start_time = time.perf_counter()
+    for _ in range(count):
+        await create_code_review_agent(store, await mcp_client.get_tools(), create_llm(config),
+                                       retrieve_internal_knowledge)
+    return time.perf_counter() - start_time
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark review agent setup")
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 50, 100])
+    args = parser.parse_args()
+
+    # Warm up imports and pydantic schema caches before measuring.
+    await build_agents(1)
+
+    for changed_files in args.files:
+        per_file_seconds = await build_agents(changed_files)
+        once_seconds = await build_agents(1)
+        print(json.dumps({
+            "changed_files": changed_files,
+            "per_file_setup_seconds": round(per_file_seconds, 4),
+            "per_run_setup_seconds": round(once_seconds, 4),
+            "saved_seconds": round(per_file_seconds - once_seconds, 4),
+        }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
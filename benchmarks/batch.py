@@ -0,0 +1,91 @@
+"""
+Compare reviewing several branch pairs in separate runs and in one batch.
+
+Creates `--jobs` synthetic repositories and reviews each of them once with a
+fresh CodeDiffAnalyzer per job, like one `python main.py` per pull request,
+and once with BatchReviewRunner, which shares the vector store, MCP sessions,
+LLM client and agent across jobs. Uses FakeReviewChatModel, FakeEmbeddings
+and the local stdio MCP stub, so the difference is the per-run setup cost.
+
+Usage:
+    python -m benchmarks.batch --jobs 8 --parallelism 4
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from benchmarks.fakes import FakeEmbeddings, FakeReviewChatModel, create_bench_config
+from benchmarks.mcp_stub import stub_mcp_servers
+from benchmarks.retrieval import build_knowledge_db, knowledge_chunks
+from benchmarks.synthetic_repo import SOURCE_BRANCH, TARGET_BRANCH, SyntheticRepoSpec, create_synthetic_repo
+from config import BatchJob
+from services.batch_runner import BatchReviewRunner
+from services.code_diff_analyzer import CodeDiffAnalyzer
+
+
+async def run_separately(config, jobs: list[BatchJob]) -> float:
+    start_time = time.perf_counter()
+    for job in jobs:
+        await CodeDiffAnalyzer(replace(
+            config,
+            project_path=job.project_path,
+            source_branch=job.source_branch,
+            target_branch=job.target_branch,
+            output_file=job.output_file,
+        )).execute()
+    return time.perf_counter() - start_time
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch review against separate runs")
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--files", type=int, default=5, help="Changed files per job")
+    parser.add_argument("--parallelism", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated provider latency per LLM call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        spec = SyntheticRepoSpec(changed_files=args.files, unchanged_files=20)
+        jobs = [
+            BatchJob(
+                project_path=create_synthetic_repo(tmp / f"repo_{index}", spec),
+                source_branch=SOURCE_BRANCH,
+                target_branch=TARGET_BRANCH,
+                output_file=tmp / "out" / f"review_{index}.md",
+            )
+            for index in range(args.jobs)
+        ]
+        (tmp / "out").mkdir()
+
+        config = create_bench_config(
+            vector_db_path=str(tmp / "knowledge_db"),
+            cache_dir=tmp / "cache",
+            review_cache=False,
+            llm_cache=False,
+            chat_model=FakeReviewChatModel(latency=args.latency),
+            embeddings=FakeEmbeddings(),
+            mcp_servers=stub_mcp_servers(),
+        )
+        build_knowledge_db(config, knowledge_chunks(200))
+
+        separate_seconds = await run_separately(config, jobs)
+        report = await BatchReviewRunner(config, jobs, parallelism=args.parallelism).run()
+
+    print(json.dumps({
+        "jobs": args.jobs,
+        "files_per_job": args.files,
+        "parallelism": args.parallelism,
+        "separate_seconds": round(separate_seconds, 3),
+        "batch_seconds": report["total_seconds"],
+        "batch_setup_seconds": report["setup_seconds"],
+        "failed": report["failed"],
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
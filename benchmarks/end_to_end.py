@@ -0,0 +1,119 @@
+"""
+Time every stage of a complete offline review run.
+
+Generates a synthetic git repository, a knowledge base indexed with
+FakeEmbeddings and runs CodeDiffAnalyzer end to end with FakeReviewChatModel
+and a local stdio MCP stub, so only RevAI's own overhead and the simulated
+provider latency are measured. Stage timings come from the run metrics:
+git extraction, symbol index, orchestrator setup, review cache, knowledge
+prefetch, agent runs, summarization and writing.
+
+Results are written as JSON, tagged with the current commit, so they can be
+compared across commits.
+
+Usage:
+    python -m benchmarks.end_to_end --files 20 --file_lines 400 --changed_lines 10 --output e2e.json
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from benchmarks.fakes import FakeEmbeddings, FakeReviewChatModel, create_bench_config
+from benchmarks.mcp_stub import stub_mcp_servers
+from benchmarks.retrieval import build_knowledge_db, knowledge_chunks
+from benchmarks.synthetic_repo import SOURCE_BRANCH, TARGET_BRANCH, SyntheticRepoSpec, create_synthetic_repo
+from services.code_diff_analyzer import CodeDiffAnalyzer
+
+
+def current_revision() -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else "unknown"
+
+
+async def run_once(spec: SyntheticRepoSpec, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        project = create_synthetic_repo(tmp / "repo", spec)
+        chat_model = FakeReviewChatModel(latency=args.llm_latency)
+        embeddings = FakeEmbeddings(latency=args.embedding_latency)
+
+        config = create_bench_config(
+            project_path=project,
+            source_branch=SOURCE_BRANCH,
+            target_branch=TARGET_BRANCH,
+            output_file=tmp / "review.md",
+            vector_db_path=str(tmp / "knowledge_db"),
+            cache_dir=tmp / "cache",
+            max_concurrency=args.concurrency,
+            review_cache=False,
+            llm_cache=False,
+            chat_model=chat_model,
+            embeddings=embeddings,
+            mcp_servers=stub_mcp_servers(),
+        )
+        build_knowledge_db(config, knowledge_chunks(args.knowledge_chunks))
+        embeddings.stats.update(calls=0, texts=0)
+
+        analyzer = CodeDiffAnalyzer(config)
+        start_time = time.perf_counter()
+        await analyzer.run()
+        total_seconds = time.perf_counter() - start_time
+
+        report = analyzer.metrics.to_dict()
+        return {
+            "total_seconds": round(total_seconds, 4),
+            "stages": report["stages"],
+            "provider_calls": chat_model.stats["calls"],
+            "embedding_calls": embeddings.stats["calls"],
+            "prompt_tokens": report["prompt_tokens"],
+            "completion_tokens": report["completion_tokens"],
+            "tool_calls": report["tool_calls"],
+        }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark a complete offline review run")
+    parser.add_argument("--files", type=int, default=20, help="Changed files in the synthetic repository")
+    parser.add_argument("--unchanged_files", type=int, default=100)
+    parser.add_argument("--file_lines", type=int, default=400)
+    parser.add_argument("--changed_lines", type=int, default=10)
+    parser.add_argument("--knowledge_chunks", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm_latency", type=float, default=0.0, help="Simulated provider latency per LLM call")
+    parser.add_argument("--embedding_latency", type=float, default=0.0, help="Simulated latency per embedding call")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file as well")
+    args = parser.parse_args()
+
+    spec = SyntheticRepoSpec(
+        changed_files=args.files,
+        unchanged_files=args.unchanged_files,
+        file_lines=args.file_lines,
+        changed_lines=args.changed_lines,
+    )
+    runs = [await run_once(spec, args) for _ in range(args.repeat)]
+
+    results = {
+        "revision": current_revision(),
+        "spec": asdict(spec),
+        "settings": {
+            "knowledge_chunks": args.knowledge_chunks,
+            "concurrency": args.concurrency,
+            "llm_latency": args.llm_latency,
+            "embedding_latency": args.embedding_latency,
+        },
+        "runs": runs,
+    }
+
+    print(json.dumps(results))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field
+
+from config import Config
+
+FAKE_VALUES = {"string": "fake", "integer": 0, "number": 0.0, "boolean": False, "array": [], "object": {}}
+
+
+class FakeReviewChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model that behaves like a tool-calling provider.
+
+    It calls `tool_name` once per conversation when that tool is bound, answers
+    structured output requests with placeholder values, and counts every call
+    that would have reached a provider in `stats["calls"]`.
+    """
+    latency: float = 0.0
+    tool_name: Optional[str] = "get_reviewed_files"
+    stats: dict = Field(default_factory=lambda: {"calls": 0})
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-review"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": "fake-review", "tool_name": self.tool_name}
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], tool_choice=tool_choice, **kwargs)
+
+    def _respond(self, messages: list[BaseMessage], tools: list[dict], tool_choice: Any) -> AIMessage:
+        message = self._choose_response(messages, tools, tool_choice)
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        output_tokens = len(str(message.content)) // 4 + 10 * len(message.tool_calls)
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return message
+
+    def _choose_response(self, messages: list[BaseMessage], tools: list[dict], tool_choice: Any) -> AIMessage:
+        self.stats["calls"] += 1
+        call_id = hashlib.sha256(str(messages[-1].content).encode("utf-8")).hexdigest()[:12]
+
+        if tool_choice and tools:
+            function = tools[0]["function"]
+            properties = function.get("parameters", {}).get("properties", {})
+            args = {name: FAKE_VALUES.get(schema.get("type"), "fake") for name, schema in properties.items()}
+            return AIMessage(content="", tool_calls=[{"name": function["name"], "args": args, "id": call_id}])
+
+        tool_names = {t["function"]["name"] for t in tools}
+        used_tools = any(isinstance(message, ToolMessage) for message in messages)
+        if self.tool_name in tool_names and not used_tools:
+            return AIMessage(content="", tool_calls=[{"name": self.tool_name, "args": {}, "id": call_id}])
+
+        return AIMessage(content=f"No issues found ({call_id}).")
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=(), tool_choice=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        message = self._respond(messages, list(tools or []), tool_choice)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tools=(), tool_choice=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        message = self._respond(messages, list(tools or []), tool_choice)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic offline embeddings: a hashed bag of words, normalized.
+
+    Each call sleeps `latency` seconds like a provider round trip and is
+    counted in `stats["calls"]`, with the number of embedded texts in `stats["texts"]`.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+        self.stats = {"calls": 0, "texts": 0}
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.size
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.size] += 1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    def _count(self, texts: list[str]):
+        self.stats["calls"] += 1
+        self.stats["texts"] += len(texts)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self._count(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self._count(texts)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class StubMCPClient:
+    """Stand-in for MultiServerMCPClient without any servers."""
+
+    async def get_tools(self):
+        return []
+
+
+@tool
+def retrieve_internal_knowledge(query: str) -> str:
+    """Retrieve internal knowledge for a query."""
+    return ""
+
+
+def create_bench_config(**overrides) -> Config:
+    """Config with placeholder credentials for offline benchmarks."""
+    config = Config(
+        project_path=Path("."),
+        source_branch="feature",
+        target_branch="main",
+        output_file=Path("bench_output.md"),
+        thread_id=str(uuid.uuid4()),
+        task_id=str(uuid.uuid4()),
+        model_name="gpt-4.1-mini",
+        embedding_model="text-embedding-3-small",
+        api_key="sk-bench",
+        vector_db_path="knowledge_db",
+        vector_db_collection_name="knowledge_base"
+    )
+    return replace(config, **overrides)
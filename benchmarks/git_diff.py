@@ -0,0 +1,68 @@
+"""
+Benchmark diff extraction setup time versus the number of changed files.
+
+Compares the per-file path (`get_diff_names_only` + `get_diff_for_file` per file,
+one fetch and one diff process each) with the single-pass `iter_file_diffs`.
+
+Usage:
+    python -m benchmarks.git_diff --files 10 50 100 300
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic_repo import SOURCE_BRANCH, TARGET_BRANCH, SyntheticRepoSpec, create_synthetic_repo
+from services.git_manager import GitManager
+
+
+def run_per_file(project: Path) -> int:
+    git_manager = GitManager(project)
+    file_paths = git_manager.get_diff_names_only(SOURCE_BRANCH, TARGET_BRANCH)
+    for file_path in file_paths:
+        git_manager.get_diff_for_file(file_path, SOURCE_BRANCH, TARGET_BRANCH)
+    return len(file_paths)
+
+
+def run_single_pass(project: Path, offline: bool) -> int:
+    git_manager = GitManager(project, offline=offline)
+    return sum(1 for _ in git_manager.iter_file_diffs(SOURCE_BRANCH, TARGET_BRANCH))
+
+
+def measure(function, *args) -> tuple[float, int]:
+    start_time = time.perf_counter()
+    count = function(*args)
+    return time.perf_counter() - start_time, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark git diff extraction")
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 50, 100, 300])
+    parser.add_argument("--file_lines", type=int, default=200)
+    args = parser.parse_args()
+
+    results = []
+    for changed_files in args.files:
+        with tempfile.TemporaryDirectory() as tmp:
+            project = create_synthetic_repo(
+                Path(tmp), SyntheticRepoSpec(changed_files=changed_files, file_lines=args.file_lines))
+
+            per_file_seconds, per_file_count = measure(run_per_file, project)
+            single_pass_seconds, single_pass_count = measure(run_single_pass, project, False)
+            offline_seconds, offline_count = measure(run_single_pass, project, True)
+
+            assert per_file_count == single_pass_count == offline_count == changed_files
+
+            results.append({
+                "changed_files": changed_files,
+                "per_file_seconds": round(per_file_seconds, 4),
+                "single_pass_seconds": round(single_pass_seconds, 4),
+                "single_pass_offline_seconds": round(offline_seconds, 4),
+                "speedup": round(per_file_seconds / single_pass_seconds, 1),
+            })
+            print(json.dumps(results[-1]))
+
+
+if __name__ == "__main__":
+    main()
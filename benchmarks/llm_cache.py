@@ -0,0 +1,78 @@
+"""
+Show that a repeated review run is answered from the LLM response cache.
+
+Runs the review agent and the summary call over the same prompts twice with the
+offline FakeReviewChatModel, each time with a fresh cache object on the same
+SQLite file, and reports how many calls reached the model. Exits with an
+AssertionError unless the repeated run makes zero provider calls and answers
+every call from the cache.
+
+Usage:
+    python -m benchmarks.llm_cache --files 20
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from langgraph.store.memory import InMemoryStore
+
+from ai.agents import create_code_review_agent, create_llm, summarize_review_result
+from ai.llm_cache import create_llm_cache
+from benchmarks.fakes import FakeReviewChatModel, StubMCPClient, create_bench_config, retrieve_internal_knowledge
+
+
+async def review_run(config, files: int) -> dict:
+    llm_cache = create_llm_cache(config)
+    agent = await create_code_review_agent(
+        InMemoryStore(), await StubMCPClient().get_tools(), create_llm(config, cache=llm_cache),
+        retrieve_internal_knowledge)
+
+    calls_before = config.chat_model.stats["calls"]
+    start_time = time.perf_counter()
+
+    structured_messages = []
+    for index in range(files):
+        messages = await agent.ainvoke(
+            input={"messages": {"role": "user", "content": f"Analyze this file. Changes: +line {index}"}},
+            config={"configurable": {"thread_id": f"{config.thread_id}:{index}", "task_id": config.task_id}}
+        )
+        structured_messages.append(messages["structured_response"])
+
+    await summarize_review_result(create_llm(config, cache=llm_cache), structured_messages, config={})
+
+    result = {
+        "provider_calls": config.chat_model.stats["calls"] - calls_before,
+        "seconds": round(time.perf_counter() - start_time, 4),
+        **llm_cache.report(),
+    }
+    llm_cache.close()
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM response cache")
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated provider latency per call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = create_bench_config(
+            cache_dir=Path(tmp),
+            chat_model=FakeReviewChatModel(latency=args.latency)
+        )
+
+        first_run = await review_run(config, args.files)
+        second_run = await review_run(config, args.files)
+
+    print(json.dumps({"first_run": first_run, "repeated_run": second_run}))
+    assert first_run["provider_calls"] > 0, "first run never reached the provider"
+    assert second_run["provider_calls"] == 0, "repeated run reached the provider"
+    assert second_run["misses"] == 0 and second_run["hits"] == first_run["misses"], \
+        "repeated run was not fully answered from the cache"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
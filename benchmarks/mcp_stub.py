@@ -0,0 +1,32 @@
+"""
+Local stdio MCP server standing in for context7 in offline benchmarks.
+
+Usage (spawned by the MCP client):
+    python -m benchmarks.mcp_stub
+"""
+import sys
+
+from mcp.server.fastmcp import FastMCP
+
+server = FastMCP("revai-bench-stub")
+
+
+@server.tool()
+def get_library_docs(library: str, topic: str = "") -> str:
+    """Return documentation for a library."""
+    return f"No documentation for {library} {topic} in the benchmark stub."
+
+
+def stub_mcp_servers() -> dict:
+    """MCP client configuration that runs this stub instead of the real servers."""
+    return {
+        "stub": {
+            "command": sys.executable,
+            "args": ["-m", "benchmarks.mcp_stub"],
+            "transport": "stdio"
+        }
+    }
+
+
+if __name__ == "__main__":
+    server.run("stdio")
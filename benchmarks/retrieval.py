@@ -0,0 +1,148 @@
+"""
+Compare latency and embedding calls of the knowledge retrieval modes.
+
+Indexes the markdown files of `dummy_knowledge` plus synthetic filler chunks
+into a temporary Chroma collection and lexical index, using FakeEmbeddings
+with a simulated provider latency, then runs the same queries twice in each
+mode: vector search without a query cache, vector search with the persistent
+query cache, hybrid BM25 and vector fusion, and BM25 alone. The vector modes
+are also run against the flat index backend, in float32 and int8, and the
+time to open each vector store is reported.
+
+Usage:
+    python -m benchmarks.retrieval --chunks 2000 --latency 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import chromadb
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from ai.retrieval import FlatVectorStore, create_retriever, create_vectorstore
+from benchmarks.fakes import FakeEmbeddings, create_bench_config
+from services.flat_index import FlatVectorIndex, export_collection
+from services.lexical_index import LexicalIndex
+
+KNOWLEDGE_DIR = Path("dummy_knowledge")
+FILLER_WORDS = (
+    "service repository handler request response model field queryset serializer cache session "
+    "middleware template context signal task queue worker settings migration schema index"
+).split()
+QUERIES = [
+    "django.urls path function",
+    "capitalized class fields convention",
+    "ALL_CAPS instance variables",
+    "how should views be organised",
+    "error handling in background workers",
+    "naming of test files",
+]
+
+
+def knowledge_chunks(count: int, seed: int = 7) -> list[tuple[str, str]]:
+    """(chunk_id, text) of the real knowledge files followed by synthetic filler chunks."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    chunks = []
+    for path in sorted(KNOWLEDGE_DIR.glob("**/*.md")):
+        for index, text in enumerate(splitter.split_text(path.read_text(encoding="utf-8"))):
+            chunks.append((f"{path.name}_{index}", text))
+
+    rng = random.Random(seed)
+    for index in range(max(count - len(chunks), 0)):
+        words = " ".join(rng.choice(FILLER_WORDS) for _ in range(120))
+        chunks.append((f"filler_{index}", f"Guideline {index}: {words}."))
+    return chunks
+
+
+def build_knowledge_db(config, chunks: list[tuple[str, str]]):
+    """Write `chunks` to the Chroma collection and lexical index of `config`, like the knowledge ETL."""
+    vectorstore = create_vectorstore(config)
+    for i in range(0, len(chunks), 500):
+        batch = chunks[i:i + 500]
+        vectorstore.add_texts(
+            texts=[text for _, text in batch],
+            metadatas=[{"chunk_id": chunk_id} for chunk_id, _ in batch],
+            ids=[chunk_id for chunk_id, _ in batch],
+        )
+
+    lexical_index = LexicalIndex(LexicalIndex.default_path(config.vector_db_path))
+    lexical_index.upsert([chunk_id for chunk_id, _ in chunks], [text for _, text in chunks],
+                         [{"chunk_id": chunk_id} for chunk_id, _ in chunks])
+    lexical_index.close()
+    return vectorstore
+
+
+async def run_queries(retriever, embeddings: FakeEmbeddings, passes: int = 2) -> dict:
+    calls_before = embeddings.stats["calls"]
+    latencies = []
+    for _ in range(passes):
+        for query in QUERIES:
+            start_time = time.perf_counter()
+            await retriever.ainvoke(query)
+            latencies.append(time.perf_counter() - start_time)
+
+    return {
+        "queries": len(latencies),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 2),
+        "max_ms": round(1000 * max(latencies), 2),
+        "embedding_calls": embeddings.stats["calls"] - calls_before,
+        **getattr(retriever, "stats", {}),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark knowledge retrieval modes")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.1, help="Simulated embedding latency per call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        chunks = knowledge_chunks(args.chunks)
+        embeddings = FakeEmbeddings()
+
+        base_config = create_bench_config(
+            vector_db_path=str(tmp / "knowledge_db"),
+            cache_dir=tmp / "cache",
+            embeddings=embeddings,
+            query_embedding_cache=False,
+        )
+        build_knowledge_db(base_config, chunks)
+
+        collection = chromadb.PersistentClient(path=base_config.vector_db_path).get_collection(
+            base_config.vector_db_collection_name)
+        export_collection(collection, FlatVectorIndex.default_path(tmp / "knowledge_db"))
+        export_collection(collection, tmp / "int8_db" / FlatVectorIndex.DIRECTORY_NAME, quantize=True)
+
+        embeddings.latency = args.latency
+
+        results = {}
+        for name, overrides in (
+                ("vector", {"retrieval_mode": "vector"}),
+                ("vector_cached", {"retrieval_mode": "vector", "query_embedding_cache": True}),
+                ("hybrid", {"retrieval_mode": "hybrid", "query_embedding_cache": True, "cache_dir": tmp / "hybrid"}),
+                ("lexical", {"retrieval_mode": "lexical"}),
+                ("flat", {"retrieval_mode": "vector", "vector_backend": "flat"}),
+                ("flat_int8", {"retrieval_mode": "vector", "vector_backend": "flat",
+                               "vector_db_path": str(tmp / "int8_db")}),
+        ):
+            config = replace(base_config, **overrides)
+            start_time = time.perf_counter()
+            mode_store = create_vectorstore(config)
+            open_ms = round(1000 * (time.perf_counter() - start_time), 2)
+            retriever = create_retriever(config, mode_store)
+            results[name] = {"open_ms": open_ms, **await run_queries(retriever, embeddings)}
+            retriever.close()
+            if isinstance(mode_store, FlatVectorStore):
+                mode_store.close()
+
+    print(json.dumps({"chunks": len(chunks), "latency": args.latency, **results}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Load the review daemon with concurrent jobs over its Unix socket.
+
+Starts ReviewServer in-process with FakeReviewChatModel, FakeEmbeddings and
+the local stdio MCP stub, submits `--jobs` reviews of synthetic repositories
+from concurrent clients, cancels one more job while it waits in the queue,
+and prints the server's queue and latency metrics together with the
+latency each client saw until its first progress event and its result.
+
+Usage:
+    python -m benchmarks.server --jobs 16 --workers 4 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fakes import FakeEmbeddings, FakeReviewChatModel, create_bench_config
+from benchmarks.mcp_stub import stub_mcp_servers
+from benchmarks.retrieval import build_knowledge_db, knowledge_chunks
+from benchmarks.synthetic_repo import SOURCE_BRANCH, TARGET_BRANCH, SyntheticRepoSpec, create_synthetic_repo
+from services.review_server import ReviewServer
+
+
+async def request(socket_path: Path, message: dict, stream: bool = False):
+    """Send one request and yield its reply, or with `stream` every event until the job finishes."""
+    reader, writer = await asyncio.open_unix_connection(str(socket_path))
+    writer.write(json.dumps(message).encode("utf-8") + b"\n")
+    await writer.drain()
+    try:
+        while line := await reader.readline():
+            reply = json.loads(line)
+            yield reply
+            if not stream or reply["event"] in ("finished", "error"):
+                return
+    finally:
+        writer.close()
+
+
+async def reply(socket_path: Path, message: dict) -> dict:
+    return [event async for event in request(socket_path, message)][0]
+
+
+async def submit(socket_path: Path, job: dict) -> dict:
+    start_time = time.perf_counter()
+    first_progress = None
+    async for event in request(socket_path, {"op": "submit", "job": job}, stream=True):
+        if first_progress is None and event["event"] == "started":
+            first_progress = time.perf_counter() - start_time
+        if event["event"] == "finished":
+            return {"status": event["status"], "first_progress": first_progress,
+                    "seconds": time.perf_counter() - start_time}
+
+
+async def wait_for_socket(socket_path: Path):
+    while not socket_path.exists():
+        await asyncio.sleep(0.05)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the review daemon under load")
+    parser.add_argument("--jobs", type=int, default=16)
+    parser.add_argument("--repos", type=int, default=4, help="Jobs are spread over this many repositories")
+    parser.add_argument("--files", type=int, default=3, help="Changed files per job")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated provider latency per LLM call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        spec = SyntheticRepoSpec(changed_files=args.files, unchanged_files=20)
+        repos = [create_synthetic_repo(tmp / f"repo_{index}", spec) for index in range(args.repos)]
+
+        config = create_bench_config(
+            vector_db_path=str(tmp / "knowledge_db"),
+            cache_dir=tmp / "cache",
+            review_cache=False,
+            llm_cache=False,
+            chat_model=FakeReviewChatModel(latency=args.latency),
+            embeddings=FakeEmbeddings(),
+            mcp_servers=stub_mcp_servers(),
+        )
+        build_knowledge_db(config, knowledge_chunks(200))
+
+        socket_path = tmp / "revai.sock"
+        server_task = asyncio.create_task(ReviewServer(config, socket_path, workers=args.workers).serve())
+        await wait_for_socket(socket_path)
+
+        def job(index: int) -> dict:
+            return {"project_path": str(repos[index % len(repos)]), "source_branch": SOURCE_BRANCH,
+                    "target_branch": TARGET_BRANCH, "output_file": str(tmp / "out" / f"review_{index}.md")}
+
+        start_time = time.perf_counter()
+        clients = asyncio.gather(*(submit(socket_path, job(index)) for index in range(args.jobs)))
+
+        # Wait until every worker is busy, so the next job stays in the queue long enough to be cancelled
+        while True:
+            metrics = await reply(socket_path, {"op": "metrics"})
+            if metrics["queue_depth"] + metrics["running"] >= min(args.jobs, args.workers + 1):
+                break
+            await asyncio.sleep(0.01)
+
+        queued = await reply(socket_path, {"op": "submit", "job": job(args.jobs), "stream": False})
+        cancelled = await reply(socket_path, {"op": "cancel", "job_id": queued["job_id"]})
+
+        results = await clients
+        total_seconds = time.perf_counter() - start_time
+        metrics = await reply(socket_path, {"op": "metrics"})
+
+        server_task.cancel()
+        await asyncio.gather(server_task, return_exceptions=True)
+
+    print(json.dumps({
+        "jobs": args.jobs,
+        "workers": args.workers,
+        "total_seconds": round(total_seconds, 3),
+        "jobs_per_second": round(args.jobs / total_seconds, 2),
+        "client_seconds_p50": round(statistics.median(result["seconds"] for result in results), 3),
+        "client_first_progress_p50": round(statistics.median(result["first_progress"] for result in results), 3),
+        "statuses": sorted({result["status"] for result in results}),
+        "cancelled_queued_job": cancelled["cancelled"],
+        "server": metrics,
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+Measure CLI startup time and check it for regressions.
+
+Runs `main.py --help` and `main.py` with missing arguments in fresh
+interpreters, and checks that importing `main` does not load any of the heavy
+modules listed in `utils.startup`. Exits with status 1 when a heavy module is
+loaded at import time or the median startup is slower than `--max_seconds`,
+so it can run as a CI check.
+
+Usage:
+    python -m benchmarks.startup --runs 5 --max_seconds 1.0
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from utils.startup import HEAVY_MODULES
+
+COMMANDS = {
+    "help": [sys.executable, "main.py", "--help"],
+    "validation_error": [sys.executable, "main.py", "--no_banner"],
+}
+LOADED_MODULES_SCRIPT = "import json, main; from utils.startup import loaded_heavy_modules; " \
+                        "print(json.dumps(loaded_heavy_modules()))"
+
+
+def time_command(command: list[str], runs: int) -> float:
+    """Median wall time of `command` in seconds."""
+    timings = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.run(command, capture_output=True)
+        timings.append(time.perf_counter() - start_time)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max_seconds", type=float, default=1.0, help="Fail when a median startup is slower")
+    args = parser.parse_args()
+
+    results = {name: round(time_command(command, args.runs), 3) for name, command in COMMANDS.items()}
+
+    output = subprocess.run([sys.executable, "-c", LOADED_MODULES_SCRIPT], capture_output=True, text=True, check=True)
+    loaded_modules = json.loads(output.stdout.strip().splitlines()[-1])
+
+    failures = [f"{name} took {seconds}s" for name, seconds in results.items() if seconds > args.max_seconds]
+    if loaded_modules:
+        failures.append(f"importing main loads {', '.join(loaded_modules)}")
+
+    print(json.dumps({
+        "runs": args.runs,
+        "max_seconds": args.max_seconds,
+        "heavy_modules": len(HEAVY_MODULES),
+        "loaded_at_import": loaded_modules,
+        **results,
+        "failures": failures,
+    }))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+SOURCE_BRANCH = "feature/bench"
+TARGET_BRANCH = "main"
+
+
+@dataclass
+class SyntheticRepoSpec:
+    """Shape of a generated repository."""
+    changed_files: int = 10
+    unchanged_files: int = 0
+    file_lines: int = 200
+    changed_lines: int = 5
+
+
+def _git(args: list, cwd: Path):
+    subprocess.run(["git"] + args, cwd=cwd, check=True, capture_output=True, text=True)
+
+
+def _module_source(index: int, lines: int) -> str:
+    body = [f"# module {index}", "", ""]
+    function_index = 0
+    while len(body) < lines:
+        body.extend([
+            f"def function_{index}_{function_index}(value):",
+            f"    result = value * {function_index}",
+            "    return result",
+            "",
+        ])
+        function_index += 1
+    # Whole functions only, so every module parses and the symbol index covers it
+    return "\n".join(body) + "\n"
+
+
+def create_synthetic_repo(root: Path, spec: SyntheticRepoSpec) -> Path:
+    """
+    Create a git repository with a bare `origin` remote, a target branch and a
+    source branch where `spec.changed_files` modules are edited.
+    """
+    origin = root / "origin.git"
+    project = root / "project"
+    project.mkdir(parents=True)
+
+    _git(["init", "--bare", "-q", str(origin)], cwd=root)
+    _git(["init", "-q", "-b", TARGET_BRANCH], cwd=project)
+    _git(["config", "user.email", "bench@example.com"], cwd=project)
+    _git(["config", "user.name", "bench"], cwd=project)
+    _git(["remote", "add", "origin", str(origin)], cwd=project)
+
+    total_files = spec.changed_files + spec.unchanged_files
+    for index in range(total_files):
+        path = project / "pkg" / f"dir_{index % 10}" / f"module_{index}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(_module_source(index, spec.file_lines), encoding="utf-8")
+
+    _git(["add", "-A"], cwd=project)
+    _git(["commit", "-q", "-m", "initial"], cwd=project)
+
+    _git(["checkout", "-q", "-b", SOURCE_BRANCH], cwd=project)
+    for index in range(spec.changed_files):
+        path = project / "pkg" / f"dir_{index % 10}" / f"module_{index}.py"
+        lines = path.read_text(encoding="utf-8").splitlines()
+        for offset in range(min(spec.changed_lines, len(lines))):
+            line_number = (offset * 7 + 4) % len(lines)
+            lines[line_number] = lines[line_number] + "  # changed"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    _git(["add", "-A"], cwd=project)
+    _git(["commit", "-q", "-m", "change"], cwd=project)
+    _git(["push", "-q", "origin", TARGET_BRANCH, SOURCE_BRANCH], cwd=project)
+
+    return project
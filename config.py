@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Optional
 
 
 @dataclass
@@ -16,5 +17,37 @@ class Config:
     api_key: str
     vector_db_path: str
     vector_db_collection_name: str
+    offline: bool = False
+    max_concurrency: int = 4
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+    cache_dir: Path = Path(".revai_cache")
+    review_cache: bool = True
+    review_cache_max_mb: int = 256
+    llm_cache: bool = True
+    llm_cache_max_mb: int = 256
+    llm_cache_ttl_hours: float = 168
+    summary_token_budget: int = 8000
+    context_token_budget: int = 6000
+    symbol_index: bool = True
+    token_budget: int = 0
+    cost_budget: float = 0.0
+    retrieval_mode: str = "hybrid"
+    query_embedding_cache: bool = True
+    knowledge_prefetch_k: int = 3
+    vector_backend: str = "chroma"
+    chat_model: Optional[Any] = None
+    embeddings: Optional[Any] = None
+    mcp_servers: Optional[dict] = None
+    stream_summary: bool = False
+    checkpoints: bool = True
+    resume_run_id: Optional[str] = None
 
 
+@dataclass
+class BatchJob:
+    """One branch pair of a batch run."""
+    project_path: Path
+    source_branch: str
+    target_branch: str
+    output_file: Path
@@ -1,17 +1,19 @@
 import asyncio
 import os
+import shutil
 import sys
 import uuid
 from pathlib import Path
+from typing import Optional
 
-import pyfiglet
 from loguru import logger as log
 
-from config import Config
+from config import BatchJob, Config
 from utils.errors import ValidationError
-from services.code_diff_analyzer import CodeDiffAnalyzer
+from services.file_writer import FileWriter
 from services.input_validator import InputValidator
 from utils.parser import create_parser
+from utils.startup import format_import_profile, profile_imports
 
 logs_dir = os.getenv("LOGS_DIR", "logs")
 os.makedirs(logs_dir, exist_ok=True)
@@ -20,21 +22,37 @@ log.add(f"{logs_dir}/app.log", rotation="1 MB", retention="10 days", level="DEBU
 
 async def main():
     """Main entry point of the application."""
-    await print_banner()
-
     parser = create_parser()
     args = parser.parse_args()
 
-    try:
-        if not all([args.project_path, args.source_branch, args.target_branch, args.output_file]):
-            parser.error(
-                "project_path, source_branch, target_branch, and output_file are required for direct diff analysis mode.")
+    if args.profile_startup:
+        print(format_import_profile(profile_imports()))
+        return
 
-        log.info("Validating inputs...")
-        project_path = InputValidator.validate_project_path(args.project_path)
-        output_file = InputValidator.validate_output_file(args.output_file)
-        source_branch = InputValidator.validate_branch_name(args.source_branch)
-        target_branch = InputValidator.validate_branch_name(args.target_branch)
+    if args.banner:
+        await print_banner()
+
+    if args.resume and (args.serve or args.batch_manifest):
+        parser.error("--resume can only be used for direct diff analysis mode.")
+
+    try:
+        if args.serve:
+            jobs = [None]
+        elif args.batch_manifest:
+            log.info("Validating batch manifest...")
+            jobs = InputValidator.validate_batch_manifest(args.batch_manifest)
+        else:
+            if not all([args.project_path, args.source_branch, args.target_branch, args.output_file]):
+                parser.error(
+                    "project_path, source_branch, target_branch, and output_file are required for direct diff analysis mode.")
+
+            log.info("Validating inputs...")
+            jobs = [BatchJob(
+                project_path=InputValidator.validate_project_path(args.project_path),
+                output_file=InputValidator.validate_output_file(args.output_file),
+                source_branch=InputValidator.validate_branch_name(args.source_branch),
+                target_branch=InputValidator.validate_branch_name(args.target_branch),
+            )]
 
         # Create configuration
 
@@ -50,19 +68,25 @@ async def main():
         if not vector_db_path.exists():
             raise ValidationError(f"Vector DB path does not exist: {vector_db_path}")
 
-        config = Config(
-            project_path=project_path,
-            source_branch=source_branch,
-            target_branch=target_branch,
-            output_file=output_file,
-            task_id=str(uuid.uuid4()),
-            thread_id=str(uuid.uuid4()),
-            model_name=args.model,
-            embedding_model=args.embedding_model,
-            api_key=api_key,
-            vector_db_path=str(vector_db_path),
-            vector_db_collection_name="knowledge_base"
-        )
+        config = create_config(args, jobs[0], api_key, vector_db_path)
+
+        # Import the review pipeline only once the inputs are valid, it loads LangChain, Chroma and the clients
+        if args.serve:
+            from services.review_server import ReviewServer
+
+            await ReviewServer(config, Path(args.serve), workers=args.server_workers).serve()
+            return
+
+        if args.batch_manifest:
+            from services.batch_runner import BatchReviewRunner
+
+            report = await BatchReviewRunner(config, jobs, parallelism=args.batch_parallelism).run()
+            FileWriter.write_batch_report(Path(args.batch_manifest).with_suffix(".report.json"), report)
+            if report["failed"]:
+                sys.exit(1)
+            return
+
+        from services.code_diff_analyzer import CodeDiffAnalyzer
 
         # Run the summarizer
         summarizer = CodeDiffAnalyzer(config)
@@ -79,8 +103,52 @@ async def main():
         sys.exit(1)
 
 
+def create_config(args, job: Optional[BatchJob], api_key: str, vector_db_path: Path) -> Config:
+    """Config of a run, or with job=None the shared config of a review daemon."""
+    return Config(
+        project_path=job.project_path if job else None,
+        source_branch=job.source_branch if job else None,
+        target_branch=job.target_branch if job else None,
+        output_file=job.output_file if job else None,
+        task_id=str(uuid.uuid4()),
+        thread_id=str(uuid.uuid4()),
+        model_name=args.model,
+        embedding_model=args.embedding_model,
+        api_key=api_key,
+        vector_db_path=str(vector_db_path),
+        vector_db_collection_name="knowledge_base",
+        offline=args.offline,
+        max_concurrency=args.max_concurrency,
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        cache_dir=Path(args.cache_dir).expanduser().resolve(),
+        review_cache=args.review_cache,
+        review_cache_max_mb=args.review_cache_max_mb,
+        llm_cache=args.llm_cache,
+        llm_cache_max_mb=args.llm_cache_max_mb,
+        llm_cache_ttl_hours=args.llm_cache_ttl_hours,
+        summary_token_budget=args.summary_token_budget,
+        context_token_budget=args.context_token_budget,
+        symbol_index=args.symbol_index,
+        token_budget=args.token_budget,
+        cost_budget=args.cost_budget,
+        retrieval_mode=args.retrieval_mode,
+        query_embedding_cache=args.query_embedding_cache,
+        knowledge_prefetch_k=args.knowledge_prefetch_k,
+        vector_backend=args.vector_backend,
+        stream_summary=args.stream_summary,
+        checkpoints=args.checkpoints,
+        resume_run_id=args.resume
+    )
+
+
 async def print_banner():
-    cols = os.get_terminal_size().columns
+    if not sys.stdout.isatty():
+        return
+
+    import pyfiglet
+
+    cols = shutil.get_terminal_size().columns
     banner = pyfiglet.figlet_format("RevAI", font="slant")
     for line in banner.splitlines():
         print(line.center(cols))
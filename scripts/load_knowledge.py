@@ -1,16 +1,27 @@
+import argparse
+import asyncio
 import hashlib
+import json
 import os
+import sys
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any
 
+import chromadb
 from langchain_chroma import Chroma
-from langchain_community.document_loaders import DirectoryLoader, UnstructuredMarkdownLoader
+from langchain_community.document_loaders import UnstructuredMarkdownLoader
 from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from loguru import logger as log
 
+from services.embedding_store import EmbeddingStore, content_hash
+from services.flat_index import FlatVectorIndex, export_collection
+from services.lexical_index import LexicalIndex
+
 DATA_DIR = Path("dummy_knowledge")
 DB_DIR = Path("knowledge_db") 
 CHUNK_SIZE = 1000
@@ -18,17 +29,72 @@ CHUNK_OVERLAP = 200
 BATCH_SIZE = 100
 OPENAI_MODEL='text-embedding-3-small'
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+MANIFEST_FILE = "manifest.json"
+COLLECTION_NAME = "knowledge_base"
+EMBED_CONCURRENCY = 4
+QUEUE_BATCHES = 8
+MAX_RETRIES = 5
+RETRY_BASE_SECONDS = 1.0
+MANIFEST_SAVE_SECONDS = 5.0
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def peak_memory_mb() -> float:
+    """Peak resident memory of the process so far, 0 where the `resource` module is unavailable (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@dataclass
+class PipelineState:
+    """Progress of one ETL run, shared by the pipeline stages."""
+    manifest: Dict[str, Dict[str, Any]]
+    pending_chunks: Dict[str, int] = field(default_factory=dict)
+    completed_files: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    documents_processed: int = 0
+    chunks_created: int = 0
+    chunks_written: int = 0
+    chunks_embedded: int = 0
+    chunks_reused: int = 0
+    vectors_reused: int = 0
+    chunks_deleted: int = 0
+    manifest_saved_at: float = 0.0
 
 
 class MarkdownKnowledgeETL:
-    """ETL pipeline for markdown knowledge base."""
-    def __init__(self):
+    """
+    ETL pipeline for markdown knowledge base.
+
+    Files stream through extract, split, embed and write stages connected by
+    bounded queues, so only a few batches are held in memory at a time while
+    several embedding batches run concurrently. A file is recorded in the
+    manifest once all its chunks are written, so an interrupted run resumes
+    with the files it did not finish.
+    """
+    def __init__(self, batch_size: int = BATCH_SIZE, concurrency: int = EMBED_CONCURRENCY):
         self.data_dir = DATA_DIR
         self.db_dir = DB_DIR
         self.chunk_size = CHUNK_SIZE
         self.chunk_overlap = CHUNK_OVERLAP
+        self.batch_size = batch_size
+        self.concurrency = concurrency
         self.embedding_model = OPENAI_MODEL
         self.embedding_api_key = OPENAI_API_KEY
+        self.manifest_path = self.db_dir / MANIFEST_FILE
+        self.chunking = f"{self.chunk_size}/{self.chunk_overlap}"
 
         self.embeddings = OpenAIEmbeddings(
             model=self.embedding_model,
@@ -42,24 +108,35 @@ class MarkdownKnowledgeETL:
             separators=["\n\n", "\n", " ", ""]
         )
     
-    def extract_markdown_files(self) -> List[Document]:
-        """Extract all markdown files from the dummy_knowledge directory."""
-        log.info(f"Extracting markdown files from {self.data_dir}")
-        
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Content hash and chunk ids of every source file loaded by previous runs."""
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest: Dict[str, Dict[str, Any]]):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        tmp_path.replace(self.manifest_path)
+
+    def scan_source_files(self) -> Dict[str, str]:
+        """Content hash of every markdown file, keyed by its path relative to the data directory."""
         if not self.data_dir.exists():
             raise FileNotFoundError(f"Data directory not found: {self.data_dir}")
-        
-        loader = DirectoryLoader(
-            str(self.data_dir),
-            glob="**/*.md",
-            loader_cls=UnstructuredMarkdownLoader,
-            show_progress=True,
-            use_multithreading=True
-        )
-        
-        documents = loader.load()
-        log.info(f"Loaded {len(documents)} markdown documents")
-        
+
+        return {
+            str(path.relative_to(self.data_dir)): file_sha256(path)
+            for path in sorted(self.data_dir.glob("**/*.md"))
+            if path.is_file()
+        }
+
+    def extract_markdown_file(self, relative_path: str) -> List[Document]:
+        """Extract one markdown file from the data directory."""
+        documents = UnstructuredMarkdownLoader(str(self.data_dir / relative_path)).load()
+
         for doc in documents:
             file_path = Path(doc.metadata.get("source", ""))
             doc.metadata.update({
@@ -72,27 +149,29 @@ class MarkdownKnowledgeETL:
                 ).isoformat(),
                 "extracted_at": datetime.now().isoformat()
             })
-        
-        return documents
 
+        return documents
 
     def transform_documents(self, documents: List[Document]) -> List[Document]:
         """Transform documents by chunking and enriching metadata."""
-        log.info("Transforming documents: chunking and enriching metadata")
-        
         all_chunks = []
         
         for doc in documents:
             chunks = self.text_splitter.split_documents([doc])
             
-            # Enrich each chunk with additional metadata
+            # Chunk ids are derived from the file and the chunk's content, so they do not
+            # shift when text is inserted before them. Repeated chunks are told apart by occurrence.
+            occurrences = {}
             for i, chunk in enumerate(chunks):
-                # Create unique chunk ID
-                content_hash = hashlib.md5(chunk.page_content.encode()).hexdigest()
-                chunk_id = f"{doc.metadata['file_name']}_{i}_{content_hash[:8]}"
-                
+                chunk_hash = content_hash(chunk.page_content)
+                occurrence = occurrences.get(chunk_hash, 0)
+                occurrences[chunk_hash] = occurrence + 1
+                chunk_id = hashlib.sha256(
+                    f"{doc.metadata['relative_path']}\0{chunk_hash}\0{occurrence}".encode("utf-8")).hexdigest()
+
                 chunk.metadata.update({
                     "chunk_id": chunk_id,
+                    "content_hash": chunk_hash,
                     "chunk_index": i,
                     "total_chunks": len(chunks),
                     "chunk_size": len(chunk.page_content),
@@ -102,68 +181,187 @@ class MarkdownKnowledgeETL:
                 
                 all_chunks.append(chunk)
         
-        log.info(f"Created {len(all_chunks)} chunks from {len(documents)} documents")
         return all_chunks
 
-
-    def load_to_chromadb(self, chunks: List[Document]) -> Chroma:
-        """Load chunks into ChromaDB vector store."""
-        log.info(f"Loading {len(chunks)} chunks into ChromaDB at {self.db_dir}")
-        
+    def open_vectorstore(self) -> Chroma:
         self.db_dir.mkdir(parents=True, exist_ok=True)
-        
-        vectorstore = Chroma(
+        return Chroma(
             persist_directory=str(self.db_dir),
             embedding_function=self.embeddings,
-            collection_name="knowledge_base"
+            collection_name=COLLECTION_NAME
         )
-        
+
+    def open_collection(self) -> chromadb.Collection:
+        """
+        The Chroma collection behind the vector store, opened through chromadb's
+        own client. langchain_chroma cannot write precomputed vectors, so the
+        pipeline upserts them here. Open the vector store first so the
+        collection exists.
+        """
+        return chromadb.PersistentClient(path=str(self.db_dir)).get_collection(COLLECTION_NAME)
+
+    def _existing_ids(self, vectorstore: Chroma, chunk_ids: List[str]) -> set:
+        """Ids among `chunk_ids` already stored, looked up without loading the collection."""
         existing_ids = set()
-        try:
-            existing_collection = vectorstore.get()
-            if existing_collection and existing_collection.get("metadatas"):
-                existing_ids = {
-                    metadata.get("chunk_id") 
-                    for metadata in existing_collection["metadatas"] 
-                    if metadata.get("chunk_id")
-                }
-                log.info(f"Found {len(existing_ids)} existing chunks in database")
-        except Exception as e:
-            log.warning(f"Could not check existing documents: {e}")
-        
-        # Filter out existing chunks
-        new_chunks = [
-            chunk for chunk in chunks 
-            if chunk.metadata.get("chunk_id") not in existing_ids
-        ]
-        
-        if not new_chunks:
-            log.info("No new chunks to add - all documents already exist")
-            return vectorstore
-        
-        log.info(f"Adding {len(new_chunks)} new chunks to database")
-        
-        # Add documents in batches to avoid memory issues
-        for i in range(0, len(new_chunks), BATCH_SIZE):
-            batch = new_chunks[i:i + BATCH_SIZE]
-            batch_texts = [chunk.page_content for chunk in batch]
-            batch_metadatas = [chunk.metadata for chunk in batch]
-            batch_ids = [chunk.metadata["chunk_id"] for chunk in batch]
-            
-            vectorstore.add_texts(
-                texts=batch_texts,
-                metadatas=batch_metadatas,
-                ids=batch_ids
+        for i in range(0, len(chunk_ids), self.batch_size):
+            existing_ids.update(vectorstore.get(ids=chunk_ids[i:i + self.batch_size], include=[])["ids"])
+        return existing_ids
+
+    def _delete_chunks(self, vectorstore: Chroma, lexical_index: LexicalIndex, chunk_ids: List[str]):
+        for i in range(0, len(chunk_ids), self.batch_size):
+            vectorstore.delete(ids=chunk_ids[i:i + self.batch_size])
+        lexical_index.delete(chunk_ids)
+
+    def _complete_file(self, state: PipelineState, relative_path: str, force_save: bool = False):
+        state.manifest[relative_path] = state.completed_files.pop(relative_path)
+        state.pending_chunks.pop(relative_path, None)
+
+        if force_save or time.monotonic() - state.manifest_saved_at >= MANIFEST_SAVE_SECONDS:
+            self.save_manifest(state.manifest)
+            state.manifest_saved_at = time.monotonic()
+
+    async def _extract_and_split(
+            self,
+            changed_paths: List[str],
+            source_files: Dict[str, str],
+            vectorstore: Chroma,
+            lexical_index: LexicalIndex,
+            state: PipelineState,
+            batches: asyncio.Queue
+    ):
+        """Split changed files into chunks and queue the ones that are not stored yet in batches."""
+        batch = []
+
+        for relative_path in changed_paths:
+            documents = await asyncio.to_thread(self.extract_markdown_file, relative_path)
+            chunks = self.transform_documents(documents)
+            chunk_ids = [chunk.metadata["chunk_id"] for chunk in chunks]
+            state.documents_processed += len(documents)
+            state.chunks_created += len(chunks)
+
+            previous_ids = state.manifest.get(relative_path, {}).get("chunk_ids", [])
+            stale_ids = sorted(set(previous_ids) - set(chunk_ids))
+            if stale_ids:
+                await asyncio.to_thread(self._delete_chunks, vectorstore, lexical_index, stale_ids)
+                state.chunks_deleted += len(stale_ids)
+
+            # Chunks written by an interrupted run are found here and not embedded again.
+            stored_ids = set(previous_ids) | await asyncio.to_thread(
+                self._existing_ids, vectorstore, [chunk_id for chunk_id in chunk_ids if chunk_id not in previous_ids])
+            new_chunks = [chunk for chunk in chunks if chunk.metadata["chunk_id"] not in stored_ids]
+            state.chunks_reused += len(chunks) - len(new_chunks)
+
+            await asyncio.to_thread(
+                lexical_index.upsert, chunk_ids, [chunk.page_content for chunk in chunks],
+                [chunk.metadata for chunk in chunks])
+
+            state.completed_files[relative_path] = {
+                "sha256": source_files[relative_path],
+                "chunking": self.chunking,
+                "chunk_ids": chunk_ids,
+            }
+            if not new_chunks:
+                self._complete_file(state, relative_path)
+                continue
+
+            state.pending_chunks[relative_path] = len(new_chunks)
+            for chunk in new_chunks:
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    await batches.put(batch)
+                    batch = []
+
+        if batch:
+            await batches.put(batch)
+        for _ in range(self.concurrency):
+            await batches.put(None)
+
+    async def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                return await self.embeddings.aembed_documents(texts)
+            except Exception as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+                log.warning(f"Embedding a batch of {len(texts)} chunks failed ({e}), retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+
+    async def _embed(self, embedding_store: EmbeddingStore, state: PipelineState,
+                     batches: asyncio.Queue, writes: asyncio.Queue):
+        """Embed queued batches, taking vectors of already embedded texts from the embedding store."""
+        while (batch := await batches.get()) is not None:
+            hashes = [chunk.metadata["content_hash"] for chunk in batch]
+            stored = await asyncio.to_thread(embedding_store.get_many, hashes)
+
+            missing = list(dict.fromkeys(key for key in hashes if key not in stored))
+            if missing:
+                texts = {chunk.metadata["content_hash"]: chunk.page_content for chunk in batch}
+                vectors = await self._embed_with_retry([texts[key] for key in missing])
+                embedded = dict(zip(missing, vectors))
+                await asyncio.to_thread(embedding_store.put_many, embedded)
+                stored.update(embedded)
+
+            state.chunks_embedded += len(missing)
+            state.vectors_reused += len(batch) - len(missing)
+            await writes.put((batch, [stored[key] for key in hashes]))
+        await writes.put(None)
+
+    async def _write(self, collection: chromadb.Collection, state: PipelineState, writes: asyncio.Queue):
+        finished_workers = 0
+        while finished_workers < self.concurrency:
+            item = await writes.get()
+            if item is None:
+                finished_workers += 1
+                continue
+
+            batch, vectors = item
+            await asyncio.to_thread(
+                collection.upsert,
+                ids=[chunk.metadata["chunk_id"] for chunk in batch],
+                embeddings=vectors,
+                documents=[chunk.page_content for chunk in batch],
+                metadatas=[chunk.metadata for chunk in batch],
             )
-            
-            log.info(f"Added batch {i//BATCH_SIZE + 1}/{(len(new_chunks)-1)//BATCH_SIZE + 1}")
-        
-        # Persist the database
-        vectorstore.persist()
-        log.info("Successfully persisted vector database")
-        
-        return vectorstore
+            state.chunks_written += len(batch)
+
+            for chunk in batch:
+                relative_path = chunk.metadata["relative_path"]
+                state.pending_chunks[relative_path] -= 1
+                if state.pending_chunks[relative_path] == 0:
+                    self._complete_file(state, relative_path)
+
+            log.info(f"Written {state.chunks_written} chunks")
 
+    async def _run_pipeline(
+            self,
+            changed_paths: List[str],
+            source_files: Dict[str, str],
+            vectorstore: Chroma,
+            lexical_index: LexicalIndex,
+            embedding_store: EmbeddingStore,
+            state: PipelineState
+    ):
+        batches = asyncio.Queue(maxsize=QUEUE_BATCHES)
+        writes = asyncio.Queue(maxsize=QUEUE_BATCHES)
+
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                task_group.create_task(
+                    self._extract_and_split(changed_paths, source_files, vectorstore, lexical_index, state, batches))
+                for _ in range(self.concurrency):
+                    task_group.create_task(self._embed(embedding_store, state, batches, writes))
+                task_group.create_task(self._write(self.open_collection(), state, writes))
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+        finally:
+            # Files finished before a failure are kept, so the next run resumes after them.
+            self.save_manifest(state.manifest)
+
+    def export_flat_index(self, quantize: bool = False):
+        """Export the collection to a memory-mapped flat index for the `flat` vector backend."""
+        self.open_vectorstore()
+        export_collection(self.open_collection(), FlatVectorIndex.default_path(self.db_dir), quantize=quantize)
 
     def run_etl(self) -> Dict[str, Any]:
         """Run the complete ETL pipeline."""
@@ -171,15 +369,35 @@ class MarkdownKnowledgeETL:
         start_time = datetime.now()
 
         try:
-            extracted_docs = self.extract_markdown_files()
+            state = PipelineState(manifest=self.load_manifest())
+            source_files = self.scan_source_files()
 
-            chunks = self.transform_documents(extracted_docs)
+            changed_paths = [
+                path for path, sha in source_files.items()
+                if state.manifest.get(path, {}).get("sha256") != sha
+                or state.manifest[path].get("chunking") != self.chunking
+            ]
+            deleted_paths = [path for path in state.manifest if path not in source_files]
+            log.info(f"{len(changed_paths)} new or changed files, {len(deleted_paths)} deleted, "
+                     f"{len(source_files) - len(changed_paths)} unchanged")
 
-            vectorstore = self.load_to_chromadb(chunks)
-            
-            collection = vectorstore.get()
+            vectorstore = self.open_vectorstore()
+            lexical_index = LexicalIndex(LexicalIndex.default_path(self.db_dir))
+            embedding_store = EmbeddingStore(EmbeddingStore.default_path(self.db_dir), self.embedding_model)
 
-            total_chunks = len(collection["ids"]) if collection and collection.get("ids") else 0
+            try:
+                for path in deleted_paths:
+                    chunk_ids = state.manifest.pop(path).get("chunk_ids", [])
+                    self._delete_chunks(vectorstore, lexical_index, chunk_ids)
+                    state.chunks_deleted += len(chunk_ids)
+
+                asyncio.run(self._run_pipeline(
+                    changed_paths, source_files, vectorstore, lexical_index, embedding_store, state))
+            finally:
+                lexical_index.close()
+                embedding_store.close()
+
+            total_chunks = self.open_collection().count()
             
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
@@ -187,8 +405,17 @@ class MarkdownKnowledgeETL:
             stats = {
                 "status": "success",
                 "duration_seconds": duration,
-                "documents_processed": len(extracted_docs),
-                "chunks_created": len(chunks),
+                "documents_processed": state.documents_processed,
+                "documents_unchanged": len(source_files) - len(changed_paths),
+                "documents_deleted": len(deleted_paths),
+                "chunks_created": state.chunks_created,
+                "chunks_written": state.chunks_written,
+                "chunks_embedded": state.chunks_embedded,
+                "chunks_reused": state.chunks_reused,
+                "vectors_reused": state.vectors_reused,
+                "chunks_deleted": state.chunks_deleted,
+                "chunks_per_second": state.chunks_written / duration if duration else 0.0,
+                "peak_memory_mb": peak_memory_mb(),
                 "total_chunks_in_db": total_chunks,
                 "database_path": str(self.db_dir),
                 "completed_at": end_time.isoformat()
@@ -211,7 +438,13 @@ def pretty_print_results(result: Dict[str, Any]):
     if result["status"] == "success":
         log.success(f"ETL completed successfully!")
         log.success(f"Processed {result['documents_processed']} documents")
-        log.success(f"Created {result['chunks_created']} chunks")
+        log.success(f"Skipped {result['documents_unchanged']} unchanged and removed {result['documents_deleted']} deleted documents")
+        log.success(f"Created {result['chunks_created']} chunks, deleted {result['chunks_deleted']} stale chunks")
+        log.success(f"Wrote {result['chunks_written']} chunks at {result['chunks_per_second']:.1f} chunks/s, "
+                    f"reused {result['chunks_reused']} already stored")
+        log.success(f"Embedded {result['chunks_embedded']} new texts, "
+                    f"reused {result['vectors_reused']} vectors from the embedding store")
+        log.success(f"Peak memory: {result['peak_memory_mb']:.0f} MB")
         log.success(f"Total chunks in database: {result['total_chunks_in_db']}")
         log.success(f"Duration: {result['duration_seconds']:.2f}s")
         log.success(f"Database location: {result['database_path']}")
@@ -224,10 +457,22 @@ def pretty_print_results(result: Dict[str, Any]):
 
 def main():
     """Main entry point for the ETL script."""
-    etl = MarkdownKnowledgeETL()
+    parser = argparse.ArgumentParser(description="Load the markdown knowledge base into the vector database")
+    parser.add_argument("--batch_size", type=int, default=BATCH_SIZE, help=f"Chunks per embedding call (default: {BATCH_SIZE})")
+    parser.add_argument("--concurrency", type=int, default=EMBED_CONCURRENCY,
+                        help=f"Embedding calls in flight at once (default: {EMBED_CONCURRENCY})")
+    parser.add_argument("--export_flat", action="store_true",
+                        help="Also export the collection to a memory-mapped flat index for --vector_backend flat")
+    parser.add_argument("--int8", action="store_true", help="Quantize the exported flat index to int8")
+    args = parser.parse_args()
+
+    etl = MarkdownKnowledgeETL(batch_size=args.batch_size, concurrency=args.concurrency)
     result = etl.run_etl()
     pretty_print_results(result)
 
+    if args.export_flat:
+        etl.export_flat_index(quantize=args.int8)
+
 
 if __name__ == "__main__":
     main()
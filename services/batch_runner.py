@@ -0,0 +1,90 @@
+import asyncio
+import time
+import uuid
+from dataclasses import replace
+
+from loguru import logger as log
+
+from ai.resources import ReviewResources
+from config import BatchJob, Config
+from services.code_diff_analyzer import CodeDiffAnalyzer
+
+
+class BatchReviewRunner:
+    """
+    Reviews many branch pairs in one process.
+
+    All jobs share one set of ReviewResources: the vector store and
+    retriever, the MCP sessions, the LLM client with its cache and rate
+    limiter and the review agent are created once for the batch instead of
+    once per job, so all jobs draw from the same per-minute budgets. Up to
+    `parallelism` jobs run at the same time, each with its own metrics, and a
+    failing job does not stop the others. Jobs of the same project run one
+    after the other.
+    """
+
+    def __init__(self, config: Config, jobs: list[BatchJob], parallelism: int = 1):
+        self.config = config
+        self.jobs = jobs
+        self.parallelism = max(parallelism, 1)
+
+    async def run(self) -> dict:
+        """Run every job and report the outcome and timings of each of them."""
+        start_time = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.parallelism)
+
+        async with ReviewResources(self.config) as resources:
+            setup_seconds = time.perf_counter() - start_time
+            log.info(f"Shared review resources ready in {setup_seconds:.2f}s")
+
+            results = await asyncio.gather(*(
+                self._run_job(index, job, resources, semaphore) for index, job in enumerate(self.jobs)
+            ))
+
+        failed = sum(1 for result in results if result["status"] == "failed")
+        log.info(f"Batch finished: {len(results) - failed} of {len(results)} jobs succeeded")
+        return {
+            "jobs": results,
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "parallelism": self.parallelism,
+            "setup_seconds": round(setup_seconds, 3),
+            "total_seconds": round(time.perf_counter() - start_time, 3),
+        }
+
+    async def _run_job(self, index: int, job: BatchJob, resources: ReviewResources,
+                       semaphore: asyncio.Semaphore) -> dict:
+        config = replace(
+            self.config,
+            project_path=job.project_path,
+            source_branch=job.source_branch,
+            target_branch=job.target_branch,
+            output_file=job.output_file,
+            task_id=str(uuid.uuid4()),
+            thread_id=str(uuid.uuid4()),
+            stream_summary=False,
+        )
+
+        async with semaphore, resources.project_lock(job.project_path):
+            log.info(f"Batch job {index} started: {job.project_path} {job.source_branch}..{job.target_branch}")
+            analyzer = CodeDiffAnalyzer(config, resources=resources)
+            start_time = time.perf_counter()
+            error = None
+            try:
+                await analyzer.execute()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                log.error(f"Batch job {index} failed: {error}")
+
+        return {
+            "index": index,
+            "project_path": job.project_path,
+            "source_branch": job.source_branch,
+            "target_branch": job.target_branch,
+            "output_file": job.output_file,
+            "task_id": config.task_id,
+            "status": "failed" if error else "succeeded",
+            "error": error,
+            "seconds": round(time.perf_counter() - start_time, 3),
+            "stages": dict(analyzer.metrics.stages),
+        }
@@ -1,79 +1,386 @@
+import asyncio
 import sys
+import time
 import traceback
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import TYPE_CHECKING, Callable
 
 from loguru import logger as log
 
-from ai.orchestrator import CodeReviewOrchestrator
+from ai.instrumentation import RunMetrics
+from ai.prompts import create_code_review_prompt
 from config import Config
-from utils.errors import ValidationError, GitError
-from services.file_writer import FileWriter
+from utils.errors import ValidationError, GitError, BudgetExceededError, ReviewIncompleteError
+from services.file_writer import FileWriter, ReviewStreamWriter
 from services.git_manager import GitManager
-from ai.tools.get_file_content import get_file_content_with_project_oath
+from services.review_cache import ReviewCache, fingerprint_path
+from services.run_store import RunStore
+from services.symbol_index import SymbolIndex
 from views.views import CodeReviewRequest, ChangedFile
 
+if TYPE_CHECKING:
+    from ai.orchestrator import CodeReviewOrchestrator
+    from ai.resources import ReviewResources
+
 
 class CodeDiffAnalyzer:
     """Main application class that orchestrates the diff analyzing process."""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, resources: "ReviewResources" = None,
+                 progress: Callable[[dict], None] = None):
         self.config = config
-        self.git_manager = GitManager(config.project_path)
+        self.resources = resources
+        self.progress = progress
+        self.git_manager = GitManager(config.project_path, offline=config.offline)
+        self.review_cache = None
+        self.run_store = None
+        self.review_keys: dict[str, str] = {}
+        self.review_context = ""
+        self.symbol_index = None
+        self.metrics = RunMetrics(config)
+        self.writer = ReviewStreamWriter(config)
 
     async def run(self):
-        """Execute the complete diff analysis workflow."""
+        """Execute the complete diff analysis workflow and exit the process when it fails."""
+        try:
+            await self.execute()
+        except (ValidationError, GitError, BudgetExceededError, ReviewIncompleteError) as e:
+            log.error(f"Operation failed: {e}")
+            sys.exit(1)
+        except Exception as e:
+            log.error(f"Unexpected error: {e}")
+            log.error(f"Traceback: {traceback.format_exc()}")
+            sys.exit(1)
+
+    async def execute(self) -> str:
+        """
+        Execute the complete diff analysis workflow and return the summary, raising when it fails.
+
+        Files whose review fails do not stop the others; the output is still
+        written and ReviewIncompleteError is raised at the end.
+        """
+        run_status = "interrupted"
+        orchestrator = None
         try:
             log.info("Starting Git diff analyzing...")
 
-            self.git_manager.validate_branches(
-                self.config.source_branch,
-                self.config.target_branch
-            )
-            log.info("Validated branches successfully.")
+            # Git and SQLite work runs in threads, so a slow fetch does not stall other runs sharing the event loop
+            with self._stage("git_extraction"):
+                await asyncio.to_thread(
+                    self.git_manager.validate_branches,
+                    self.config.source_branch,
+                    self.config.target_branch
+                )
+                log.info("Validated branches successfully.")
+
+                await asyncio.to_thread(self._open_stores)
+                await asyncio.to_thread(self._start_run)
+
+                object_reader = await asyncio.to_thread(self.git_manager.get_object_reader, self.config.source_branch)
+
+                request = await asyncio.to_thread(self._create_request)
+                self.review_context = await asyncio.to_thread(self._describe_review_context)
+                self.review_keys = {
+                    changed_file.file_path: self._review_cache_key(changed_file)
+                    for changed_file in request.changed_files
+                }
+                log.info("Created request.")
+
+                self.writer.start()
+
+            if self.config.symbol_index:
+                with self._stage("symbol_index"):
+                    self.symbol_index = SymbolIndex(
+                        SymbolIndex.default_path(self.config.cache_dir, self.config.project_path),
+                        object_reader
+                    )
+                    await asyncio.to_thread(self.symbol_index.update)
+
+            with self._stage("orchestrator_setup"):
+                # LangChain, LangGraph and the vector store are loaded only once there is something to review
+                from ai.orchestrator import CodeReviewOrchestrator
 
-            orchestrator = CodeReviewOrchestrator(self.config)
-            log.info("Created orchestrator.")
+                orchestrator = CodeReviewOrchestrator(
+                    self.config,
+                    object_reader=object_reader,
+                    symbol_index=self.symbol_index,
+                    metrics=self.metrics,
+                    resources=self.resources,
+                    on_file_reviewed=self._file_reviewed,
+                    on_summary_token=self._summary_token
+                )
+                log.info("Created orchestrator.")
 
-            request = self._create_request()
-            log.info("Created request.")
+            with self._stage("review_cache"):
+                request = await self._apply_run_results(request, orchestrator)
+                request = await self._apply_review_cache(request, orchestrator)
 
-            response = await orchestrator.review_code(request)
-            log.info(f"Reviewed code successfully. Saving response to {self.config.output_file}...")
+            if request.changed_files:
+                with self._stage("orchestrator_setup"):
+                    await orchestrator.get_code_review_agent()
 
-            FileWriter.write_summary(self.config.output_file, response, self.config)
+                with self._stage("knowledge_prefetch"):
+                    await self._attach_knowledge(request, orchestrator)
+
+            with self._stage("agent_runs"):
+                await orchestrator.review_files(request)
+                for file_name, error in orchestrator.failed_files.items():
+                    await self._file_failed(file_name, error)
+
+            with self._stage("summarization"):
+                response = await orchestrator.summarize()
+                if self.config.stream_summary:
+                    print(flush=True)
+
+            with self._stage("writing"):
+                await asyncio.to_thread(self._store_reviews, request, orchestrator)
+                log.info(f"Reviewed code successfully. Saving response to {self.config.output_file}...")
+
+                self.writer.finish(response)
+
+            if orchestrator.failed_files:
+                run_status = "incomplete"
+                raise ReviewIncompleteError(
+                    f"{len(orchestrator.failed_files)} of {len(self.review_keys)} files could not be reviewed: "
+                    f"{', '.join(orchestrator.failed_files)}. {self._resume_hint()}"
+                )
+
+            run_status = "complete"
             log.info("Git diff summarization completed successfully!")
+            return response
 
-        except (ValidationError, GitError) as e:
-            log.error(f"Operation failed: {e}")
-            sys.exit(1)
+        finally:
+            if orchestrator is not None:
+                orchestrator.resources.forget_run(self.config.task_id)
+            # Resources passed in are shared with other runs, the ones the orchestrator created are this run's
+            if self.resources is None and orchestrator is not None:
+                await orchestrator.resources.close()
+            if self.run_store is not None:
+                self.run_store.finish_run(self.config.task_id, run_status)
+                self.run_store.close()
+            self.git_manager.close()
+            if self.review_cache is not None:
+                self.review_cache.close()
+            if self.symbol_index is not None:
+                self.symbol_index.close()
+
+            # Written last and never raised, so a failing write cannot hide the run's error or skip the cleanup
+            try:
+                FileWriter.write_metrics(self.config.output_file, self.metrics.to_dict(), self.metrics.to_prometheus())
+            except Exception as e:
+                log.error(f"Could not write run metrics: {e}")
+
+    def _open_stores(self):
+        if self.config.review_cache:
+            self.review_cache = ReviewCache(
+                self.config.cache_dir / "review_cache.sqlite",
+                max_bytes=self.config.review_cache_max_mb * 1024 * 1024
+            )
+        if self.config.checkpoints:
+            self.run_store = RunStore(RunStore.default_path(self.config.cache_dir))
+
+    def _start_run(self):
+        """Record the run, or take over the task and thread ids of the run to resume."""
+        if self.run_store is None:
+            if self.config.resume_run_id:
+                raise ValidationError("Resuming a run needs checkpoints, remove --no_checkpoints.")
+            return
+
+        if self.config.resume_run_id:
+            run = self.run_store.get_run(self.config.resume_run_id)
+            if run is None:
+                raise ValidationError(f"Unknown review run: {self.config.resume_run_id}")
+
+            reviewed = (run["project_path"], run["source_branch"], run["target_branch"])
+            requested = (str(self.config.project_path), self.config.source_branch, self.config.target_branch)
+            if reviewed != requested:
+                raise ValidationError(
+                    f"Review run {run['task_id']} reviewed {reviewed[0]} {reviewed[1]}..{reviewed[2]}, "
+                    f"not {requested[0]} {requested[1]}..{requested[2]}"
+                )
+
+            self.config = replace(self.config, task_id=run["task_id"], thread_id=run["thread_id"])
+            log.info(f"Resuming review run {run['task_id']} ({run['status']})")
+
+        self.run_store.start_run(self.config.task_id, self.config.thread_id, self.config.project_path,
+                                 self.config.source_branch, self.config.target_branch)
+        log.info(f"Review run {self.config.task_id}, continue it with --resume {self.config.task_id} if it is interrupted")
+
+    def _resume_hint(self) -> str:
+        if self.run_store is None:
+            return "Run the review again to retry them."
+        return f"Reviewed files are kept, retry the others with --resume {self.config.task_id}"
+
+    @contextmanager
+    def _stage(self, name: str):
+        self._report_progress({"event": "stage", "stage": name})
+        with self.metrics.stage(name):
+            yield
+
+    def _report_progress(self, event: dict):
+        if self.progress is not None:
+            self.progress(event)
+
+    def _record_reviewed(self, file_name: str, findings, cached: bool):
+        self.writer.add(file_name, findings, cached)
+        if self.run_store is not None:
+            self.run_store.record_done(self.config.task_id, file_name, self.review_keys.get(file_name, ""), findings)
+
+    async def _file_reviewed(self, file_name: str, findings, cached: bool):
+        await asyncio.to_thread(self._record_reviewed, file_name, findings, cached)
+        self._report_progress({"event": "file_reviewed", "file_path": file_name, "cached": cached, "findings": findings})
+
+    def _record_failed(self, file_name: str, message: str):
+        self.writer.add_failure(file_name, message)
+        if self.run_store is not None:
+            self.run_store.record_failed(self.config.task_id, file_name, self.review_keys.get(file_name, ""), message)
+
+    async def _file_failed(self, file_name: str, error: Exception):
+        message = f"{type(error).__name__}: {error}"
+        self.metrics.file(file_name).error = message
+        await asyncio.to_thread(self._record_failed, file_name, message)
+        self._report_progress({"event": "file_failed", "file_path": file_name, "error": message})
+
+    def _summary_token(self, token: str):
+        if self.config.stream_summary:
+            print(token, end="", flush=True)
+        self._report_progress({"event": "summary_token", "token": token})
+
+    def _review_cache_key(self, changed_file: ChangedFile) -> str:
+        return ReviewCache.make_key(
+            changed_file.blob_sha,
+            changed_file.changes,
+            self.config.model_name,
+            create_code_review_prompt(),
+            self.review_context
+        )
+
+    def _describe_review_context(self) -> str:
+        """Settings and knowledge base that shape the context of every review, for the review cache keys."""
+        config = self.config
+        return "\n".join([
+            f"context_token_budget={config.context_token_budget}",
+            f"symbol_index={config.symbol_index}",
+            f"retrieval_mode={config.retrieval_mode}",
+            f"knowledge_prefetch_k={config.knowledge_prefetch_k}",
+            f"vector_backend={config.vector_backend}",
+            f"embedding_model={config.embedding_model}",
+            f"collection={config.vector_db_collection_name}",
+            f"knowledge={fingerprint_path(config.vector_db_path)}",
+        ])
+
+    async def _apply_run_results(self, request: CodeReviewRequest, orchestrator: "CodeReviewOrchestrator"):
+        """
+        When resuming, hand the findings of files the run already reviewed to
+        the orchestrator and keep only the others. Agent checkpoints of files
+        that changed since the interrupted run are discarded.
+        """
+        if self.run_store is None:
+            return request
+
+        results = await asyncio.to_thread(self.run_store.results, self.config.task_id) \
+            if self.config.resume_run_id else {}
+        await asyncio.to_thread(self.run_store.register_files, self.config.task_id, self.review_keys)
+        if not self.config.resume_run_id:
+            return request
+
+        remaining_files = []
+        for changed_file in request.changed_files:
+            status, review_key, findings = results.get(changed_file.file_path, (None, None, None))
+            if review_key == self.review_keys[changed_file.file_path]:
+                if status == "done":
+                    log.info(f"Reusing review of file {changed_file.file_path} from run {self.config.task_id}")
+                    await orchestrator.add_cached_review(changed_file.file_path, findings)
+                    continue
+            elif status is not None:
+                log.info(f"File {changed_file.file_path} changed since the interrupted run, reviewing it from scratch")
+                await orchestrator.discard_checkpoint(changed_file.file_path)
+            remaining_files.append(changed_file)
+
+        log.info(f"Resumed run {self.config.task_id}: {len(remaining_files)} of "
+                 f"{len(request.changed_files)} files left to review")
+        return CodeReviewRequest(changed_files=remaining_files)
+
+    async def _apply_review_cache(self, request: CodeReviewRequest, orchestrator: "CodeReviewOrchestrator"):
+        """Hand cached findings to the orchestrator and keep only files that need an agent."""
+        if self.review_cache is None:
+            return request
+
+        cached = await asyncio.to_thread(lambda: [
+            self.review_cache.get(self._review_cache_key(changed_file)) for changed_file in request.changed_files
+        ])
+
+        uncached_files = []
+        for changed_file, findings in zip(request.changed_files, cached):
+            if findings is None:
+                uncached_files.append(changed_file)
+                continue
+
+            log.info(f"Reusing cached review for file {changed_file.file_path}")
+            await orchestrator.add_cached_review(changed_file.file_path, findings)
+
+        return CodeReviewRequest(changed_files=uncached_files)
+
+    async def _attach_knowledge(self, request: CodeReviewRequest, orchestrator: "CodeReviewOrchestrator"):
+        """Retrieve internal knowledge for all files to review in one batch, before the agents start."""
+        if not self.config.knowledge_prefetch_k or self.config.retrieval_mode == "lexical" or not request.changed_files:
+            return
+
+        from ai.retrieval import prefetch_knowledge
+
+        start_time = time.perf_counter()
+        try:
+            knowledge = await prefetch_knowledge(
+                orchestrator.vectorstore, request.changed_files, self.config.knowledge_prefetch_k)
         except Exception as e:
-            log.error(f"Unexpected error: {e}")
-            log.error(f"Traceback: {traceback.format_exc()}")
-            sys.exit(1)
+            log.warning(f"Could not prefetch internal knowledge, agents will retrieve it themselves: {e}")
+            return
 
-    def _create_request(self):
-        changed_files = []
+        for changed_file in request.changed_files:
+            changed_file.knowledge = knowledge.get(changed_file.file_path) or None
+
+        log.info(f"Prefetched internal knowledge for {len(request.changed_files)} files "
+                 f"in {time.perf_counter() - start_time:.2f}s")
 
-        changed_file_paths = self.git_manager.get_diff_names_only(
-            self.config.source_branch, self.config.target_branch)
+    def _store_reviews(self, request: CodeReviewRequest, orchestrator: "CodeReviewOrchestrator"):
+        if self.review_cache is None:
+            return
 
-        log.info(f"Received {len(changed_file_paths)} changed files")
+        for changed_file in request.changed_files:
+            findings = orchestrator.file_results.get(changed_file.file_path)
+            if findings is not None:
+                self.review_cache.put(self._review_cache_key(changed_file), changed_file.file_path, findings)
+
+        report = self.review_cache.report()
+        log.info(f"Review cache: {report['hits']} hits, {report['misses']} misses ({report['hit_rate']:.0%} hit rate)")
+
+    def _create_request(self):
+        changed_files = []
+        object_reader = self.git_manager.get_object_reader(self.config.source_branch)
 
-        for file_path in changed_file_paths:
+        for file_diff in self.git_manager.iter_file_diffs(
+                self.config.source_branch, self.config.target_branch):
 
-            log.info(f"Preprocessing file for analysis: {file_path}")
-            changes = self.git_manager.get_diff_for_file(
-                file_path, self.config.source_branch, self.config.target_branch)
+            log.info(f"Preprocessing file for analysis: {file_diff.file_path}")
 
-            content = get_file_content_with_project_oath(file_path, self.config.project_path)
+            if file_diff.status == "deleted":
+                content = ""
+                blob_sha = None
+            else:
+                content = object_reader.read_text(file_diff.file_path)
+                blob_sha = object_reader.blob_sha(file_diff.file_path)
 
             changed_files.append(ChangedFile(
                 content=content,
-                file_path=file_path,
-                changes=changes
+                file_path=file_diff.file_path,
+                changes=file_diff.diff,
+                blob_sha=blob_sha
             ))
 
-            log.info(f"Preprocessed file for analysis: {file_path}")
+            log.info(f"Preprocessed file for analysis: {file_diff.file_path}")
 
+        log.info(f"Received {len(changed_files)} changed files")
 
         return CodeReviewRequest(
             changed_files=changed_files
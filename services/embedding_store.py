@@ -0,0 +1,66 @@
+import hashlib
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Local store of embedding vectors keyed by model and content hash.
+
+    Vectors are reused for any chunk with the same text, wherever it lives
+    and however it was cut, so moved files and re-chunking runs only embed
+    text that was never seen before.
+    """
+
+    FILE_NAME = "embeddings.sqlite"
+
+    def __init__(self, db_path: Path, model: str):
+        self.db_path = Path(db_path)
+        self.model = model
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, content_hash)
+            ) WITHOUT ROWID;
+        """)
+        self._connection.commit()
+
+    @classmethod
+    def default_path(cls, vector_db_path) -> Path:
+        return Path(vector_db_path) / cls.FILE_NAME
+
+    def get_many(self, hashes: list[str]) -> dict[str, list[float]]:
+        vectors = {}
+        with self._lock:
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT content_hash, vector FROM embeddings WHERE model = ? AND content_hash IN ({placeholders})",
+                    (self.model, *batch)).fetchall()
+                for key, blob in rows:
+                    vectors[key] = array("f", blob).tolist()
+        return vectors
+
+    def put_many(self, vectors: dict[str, list[float]]):
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, content_hash, vector) VALUES (?, ?, ?)",
+                ((self.model, key, array("f", vector).tobytes()) for key, vector in vectors.items()))
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
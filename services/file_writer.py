@@ -1,29 +1,56 @@
+import json
+import threading
 from pathlib import Path
+from typing import Any
 
 from config import Config
 from loguru import logger as log
 
+FINDING_FIELDS = (
+    ("severity", "Severity"),
+    ("comment_type", "Type"),
+    ("description", "Description"),
+    ("recommendation", "Recommendation"),
+    ("reasoning", "Reasoning"),
+)
+
 
 class FileWriter:
     """Handles writing output to files."""
 
     @staticmethod
-    def write_summary(output_path: Path, summary: str, config: Config):
-        """Write the summary to the output file with metadata."""
+    def write_metrics(output_path: Path, report: dict, prometheus_text: str):
+        """Write the run report as JSON and as a Prometheus textfile next to the output file."""
+        json_path = output_path.with_suffix(".metrics.json")
+        prometheus_path = output_path.with_suffix(".prom")
+
         try:
-            content = FileWriter._format_output(summary, config)
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
 
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            with open(prometheus_path, 'w', encoding='utf-8') as f:
+                f.write(prometheus_text)
 
-            log.info(f"Summary was saved to: {output_path}")
+            log.info(f"Run metrics were saved to: {json_path} and {prometheus_path}")
 
         except IOError as e:
-            raise Exception(f"Failed to write output file: {e}")
+            raise Exception(f"Failed to write metrics files: {e}")
 
     @staticmethod
-    def _format_output(summary: str, config: Config) -> str:
-        """Format the output with metadata."""
+    def write_batch_report(report_path: Path, report: dict):
+        """Write the timings and outcome of every job of a batch as JSON."""
+        try:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, default=str)
+
+            log.info(f"Batch report was saved to: {report_path}")
+
+        except IOError as e:
+            raise Exception(f"Failed to write batch report: {e}")
+
+    @staticmethod
+    def format_header(config: Config) -> str:
+        """Format the metadata that opens the output file."""
         separator = "=" * 80
 
         return f"""# Git Branch Diff Summary
@@ -38,12 +65,77 @@ class FileWriter:
 - **AI Model**: {config.model_name}
 - **Generated**: {__import__('datetime').datetime.now().isoformat()}
 
-{separator}
-## Summary
-{separator}
+"""
 
-{summary}
+    @staticmethod
+    def format_section(title: str) -> str:
+        separator = "=" * 80
+        return f"{separator}\n## {title}\n{separator}\n\n"
 
-{separator}
-"""
+    @staticmethod
+    def format_findings(file_path: str, findings: Any, cached: bool = False) -> str:
+        """Format the findings of one file as a markdown section."""
+        lines = [f"### {file_path}{' (cached review)' if cached else ''}", ""]
+        for finding in findings if isinstance(findings, list) else [findings]:
+            if not isinstance(finding, dict):
+                lines.append(f"- {finding}")
+                continue
+            for key, label in FINDING_FIELDS:
+                if finding.get(key):
+                    lines.append(f"- **{label}**: {finding[key]}")
+            lines.append("")
+        return "\n".join(lines).rstrip("\n") + "\n\n"
+
+
+class ReviewStreamWriter:
+    """
+    Writes the output file while the run progresses instead of once at the end.
+
+    The markdown output gets the findings of every file as soon as its review
+    completes and the summary once it is ready. The same findings are
+    appended to a `.findings.jsonl` file next to it, one line per file.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.output_path = Path(config.output_file)
+        self.findings_path = self.output_path.with_suffix(".findings.jsonl")
+        self.files_written = 0
+        # Reviews finish concurrently and are written from worker threads
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Create the output files with the run metadata and an empty findings section."""
+        self._write(self.output_path, "w", FileWriter.format_header(self.config) + FileWriter.format_section("File Reviews"))
+        self._write(self.findings_path, "w", "")
 
+    def add(self, file_path: str, findings: Any, cached: bool = False):
+        """Append the findings of a reviewed file."""
+        with self._lock:
+            self._write(self.output_path, "a", FileWriter.format_findings(file_path, findings, cached))
+            self._write(self.findings_path, "a",
+                        json.dumps({"file_path": file_path, "cached": cached, "findings": findings}, default=str) + "\n")
+            self.files_written += 1
+
+    def add_failure(self, file_path: str, error: str):
+        """Append a file whose review failed."""
+        with self._lock:
+            self._write(self.output_path, "a", f"### {file_path} (review failed)\n\n- **Error**: {error}\n\n")
+            self._write(self.findings_path, "a",
+                        json.dumps({"file_path": file_path, "cached": False, "error": error}) + "\n")
+            self.files_written += 1
+
+    def finish(self, summary: str):
+        """Append the final summary."""
+        if not self.files_written:
+            self._write(self.output_path, "a", "No files needed a review.\n\n")
+        self._write(self.output_path, "a", FileWriter.format_section("Summary") + f"{summary}\n\n{'=' * 80}\n")
+        log.info(f"Summary was saved to: {self.output_path}")
+
+    @staticmethod
+    def _write(path: Path, mode: str, text: str):
+        try:
+            with open(path, mode, encoding='utf-8') as f:
+                f.write(text)
+        except IOError as e:
+            raise Exception(f"Failed to write output file: {e}")
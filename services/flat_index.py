@@ -0,0 +1,184 @@
+import json
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from loguru import logger as log
+
+SEARCH_BLOCK_ROWS = 65536
+# int8 blocks are converted to float32 for the dot product, so they are kept to a few MB
+QUANTIZED_SEARCH_BLOCK_BYTES = 16 * 1024 * 1024
+EXPORT_BATCH_SIZE = 1000
+
+
+class FlatIndexWriter:
+    """
+    Writes a FlatVectorIndex row by row without holding all vectors in memory.
+
+    Rows go to a temporary directory that replaces `directory` on close, so
+    readers never see a partially written index.
+    """
+
+    def __init__(self, directory: Path, count: int, dimensions: int, quantize: bool = False):
+        self.directory = Path(directory)
+        self.count = count
+        self.dimensions = dimensions
+        self.quantize = quantize
+        self.rows = 0
+
+        self._tmp_dir = self.directory.with_name(self.directory.name + ".tmp")
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+        self._tmp_dir.mkdir(parents=True)
+
+        dtype = np.int8 if quantize else np.float32
+        self._vectors = np.lib.format.open_memmap(
+            self._tmp_dir / "vectors.npy", mode="w+", dtype=dtype, shape=(count, dimensions))
+        self._scales = np.lib.format.open_memmap(
+            self._tmp_dir / "scales.npy", mode="w+", dtype=np.float32, shape=(count,)) if quantize else None
+        self._offsets = np.zeros(count, dtype=np.int64)
+        self._rows_file = open(self._tmp_dir / "rows.jsonl", "wb")
+
+    def add(self, ids: list[str], texts: list[str], metadatas: list[dict], vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        rows = slice(self.rows, self.rows + len(ids))
+        if self.quantize:
+            scales = np.abs(vectors).max(axis=1) / 127
+            scales[scales == 0] = 1
+            self._vectors[rows] = np.round(vectors / scales[:, None]).astype(np.int8)
+            self._scales[rows] = scales
+        else:
+            self._vectors[rows] = vectors
+
+        for offset, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+            self._offsets[self.rows + offset] = self._rows_file.tell()
+            line = json.dumps({"id": chunk_id, "text": text, "metadata": metadata or {}}, default=str)
+            self._rows_file.write(line.encode("utf-8") + b"\n")
+        self.rows += len(ids)
+
+    def close(self):
+        if self.rows != self.count:
+            raise ValueError(f"Expected {self.count} rows, got {self.rows}")
+
+        self._vectors.flush()
+        if self._scales is not None:
+            self._scales.flush()
+        self._rows_file.close()
+        del self._vectors, self._scales
+
+        np.save(self._tmp_dir / "offsets.npy", self._offsets)
+        with open(self._tmp_dir / "info.json", "w", encoding="utf-8") as f:
+            json.dump({"count": self.count, "dimensions": self.dimensions, "quantized": self.quantize}, f)
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._tmp_dir.replace(self.directory)
+
+
+class FlatVectorIndex:
+    """
+    Read-only flat vector index in memory-mapped `.npy` files.
+
+    Vectors are normalized, so cosine similarity is a dot product computed
+    block by block over the mapped rows. With int8 quantization every row is
+    stored as int8 with a float scale, a quarter of the float32 size. Chunk
+    texts and metadata are read from a side JSON-lines file only for results.
+    """
+
+    DIRECTORY_NAME = "flat_index"
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / "info.json", "r", encoding="utf-8") as f:
+            self.info = json.load(f)
+
+        self.vectors = np.load(self.directory / "vectors.npy", mmap_mode="r")
+        self.scales = np.load(self.directory / "scales.npy", mmap_mode="r") if self.info["quantized"] else None
+        self.offsets = np.load(self.directory / "offsets.npy", mmap_mode="r")
+
+        self._lock = threading.Lock()
+        self._rows_file = open(self.directory / "rows.jsonl", "rb")
+
+    @classmethod
+    def default_path(cls, vector_db_path) -> Path:
+        return Path(vector_db_path) / cls.DIRECTORY_NAME
+
+    def __len__(self) -> int:
+        return self.info["count"]
+
+    def search(self, queries, k: int) -> list[list[tuple[int, float]]]:
+        """(row, similarity) of the `k` most similar rows for every query vector, best first."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        k = min(k, len(self))
+        if k == 0:
+            return [[] for _ in queries]
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+
+        block_rows = SEARCH_BLOCK_ROWS
+        if self.scales is not None:
+            block_rows = max(QUANTIZED_SEARCH_BLOCK_BYTES // (4 * self.info["dimensions"]), 1)
+
+        for start in range(0, len(self), block_rows):
+            block = np.asarray(self.vectors[start:start + block_rows], dtype=np.float32)
+            scores = queries @ block.T
+            if self.scales is not None:
+                scores *= self.scales[start:start + block_rows]
+
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(
+                np.arange(start, start + block.shape[0]), (len(queries), block.shape[0]))], axis=1)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if scores.shape[1] > k else \
+                np.tile(np.arange(scores.shape[1]), (len(queries), 1))
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_rows = np.take_along_axis(rows, top, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return [
+            [(int(row), float(score)) for row, score in zip(rows, scores)]
+            for rows, scores in zip(best_rows, best_scores)
+        ]
+
+    def row(self, index: int) -> dict:
+        """Chunk id, text and metadata of a row."""
+        with self._lock:
+            self._rows_file.seek(int(self.offsets[index]))
+            return json.loads(self._rows_file.readline())
+
+    def close(self):
+        with self._lock:
+            self._rows_file.close()
+
+
+def export_collection(collection, directory: Path, quantize: bool = False,
+                      batch_size: int = EXPORT_BATCH_SIZE) -> Optional[Path]:
+    """
+    Export a Chroma collection to a FlatVectorIndex page by page.
+
+    Returns the index directory, or None when the collection is empty.
+    """
+    count = collection.count()
+    if count == 0:
+        log.warning("Collection is empty, nothing to export")
+        return None
+
+    writer = None
+    for offset in range(0, count, batch_size):
+        page = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+        vectors = np.asarray(page["embeddings"], dtype=np.float32)
+        if writer is None:
+            writer = FlatIndexWriter(directory, count, vectors.shape[1], quantize=quantize)
+        writer.add(page["ids"], page["documents"], page["metadatas"], vectors)
+
+    writer.close()
+    log.info(f"Exported {count} vectors to {directory}{' with int8 quantization' if quantize else ''}")
+    return Path(directory)
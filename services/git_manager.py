@@ -1,6 +1,10 @@
 import subprocess
+import threading
 from pathlib import Path
+from typing import Iterator
 
+from services.git_object_reader import GitObjectReader
+from utils.diff_parser import FileDiff, parse_unified_diff
 from utils.errors import GitError
 from loguru import logger as log
 
@@ -8,8 +12,11 @@ from loguru import logger as log
 class GitManager:
     """Handles Git operations for branch comparison."""
 
-    def __init__(self, project_path: Path):
+    def __init__(self, project_path: Path, offline: bool = False):
         self.project_path = project_path
+        self.offline = offline
+        self._fetched = False
+        self._object_readers: dict[str, GitObjectReader] = {}
 
 
     def _run_git_command(self, args: list) -> str:
@@ -137,3 +144,81 @@ class GitManager:
         except Exception as e:
             raise GitError(f"Failed to get diff: {e}")
 
+
+    def fetch_latest(self):
+        """Fetch the latest changes from origin at most once per manager."""
+        if self.offline:
+            log.info("Offline mode: skipping fetch.")
+            return
+
+        if self._fetched:
+            return
+
+        log.info("Fetching latest changes...")
+        self._run_git_command(["fetch", "origin"])
+        self._fetched = True
+
+
+    def iter_file_diffs(self, source_branch: str, target_branch: str) -> Iterator[FileDiff]:
+        """Stream per-file diffs between two branches from a single `git diff` process."""
+        self.fetch_latest()
+
+        log.info(f"Getting diff between {target_branch} and {source_branch}...")
+        args = [
+            "git",
+            "-c", "core.quotePath=false",
+            "diff",
+            f"{target_branch}...{source_branch}",
+            "--no-color",
+            "--no-ext-diff",
+            "--src-prefix=a/",
+            "--dst-prefix=b/",
+        ]
+
+        try:
+            process = subprocess.Popen(
+                args,
+                cwd=self.project_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except OSError as e:
+            raise GitError(f"Failed to get diff: {e}")
+
+        # stderr is drained alongside stdout, so git never blocks on a full stderr pipe
+        stderr_chunks = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+
+        with process:
+            try:
+                yield from parse_unified_diff(process.stdout)
+            finally:
+                # Ends git early when the caller stops reading, so stderr reaches EOF
+                process.stdout.close()
+                stderr_reader.join()
+
+        if process.returncode != 0:
+            raise GitError(f"Git command failed: {''.join(stderr_chunks)}")
+
+
+    def get_object_reader(self, ref: str) -> GitObjectReader:
+        """Return the shared blob reader for a ref, starting it on first use."""
+        if ref not in self._object_readers:
+            self._object_readers[ref] = GitObjectReader(self.project_path, ref)
+        return self._object_readers[ref]
+
+
+    def read_file_at_ref(self, file_path: str, ref: str) -> str:
+        """Read a file's content at a ref without checking it out."""
+        return self.get_object_reader(ref).read_text(file_path)
+
+
+    def close(self):
+        """Stop all long-lived git processes."""
+        for reader in self._object_readers.values():
+            reader.close()
+        self._object_readers.clear()
@@ -0,0 +1,155 @@
+import subprocess
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from loguru import logger as log
+
+from utils.errors import GitError
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class TreeEntry(NamedTuple):
+    sha: str
+    size: int
+
+
+class GitObjectReader:
+    """
+    Reads blobs at a fixed ref through one long-lived `git cat-file --batch` process.
+
+    The ref's tree is listed once, so path lookups and blob sizes need no extra
+    processes, and blob contents are kept in an LRU keyed by blob SHA.
+    """
+
+    def __init__(self, project_path: Path, ref: str, cache_bytes: int = DEFAULT_CACHE_BYTES):
+        self.project_path = Path(project_path)
+        self.ref = ref
+        self.cache_bytes = cache_bytes
+
+        self._tree: Optional[dict[str, TreeEntry]] = None
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._cached_bytes = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def tree(self) -> dict[str, TreeEntry]:
+        """Map of every blob path at the ref to its SHA and size."""
+        with self._lock:
+            if self._tree is None:
+                self._tree = self._list_tree()
+            return self._tree
+
+    def _list_tree(self) -> dict[str, TreeEntry]:
+        try:
+            result = subprocess.run(
+                ["git", "ls-tree", "-r", "-l", "-z", "--full-tree", self.ref],
+                cwd=self.project_path,
+                check=True,
+                capture_output=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise GitError(f"Git command failed: {e.stderr.decode('utf-8', errors='replace')}")
+
+        tree = {}
+        for record in result.stdout.split(b"\0"):
+            if not record:
+                continue
+            meta, path = record.split(b"\t", 1)
+            _, object_type, sha, size = meta.split()
+            if object_type != b"blob":
+                continue
+            tree[path.decode("utf-8", errors="surrogateescape")] = TreeEntry(sha.decode(), int(size))
+
+        log.info(f"Indexed {len(tree)} files at {self.ref}")
+        return tree
+
+    def relative_path(self, file_path) -> str:
+        """Normalize an absolute or project-relative path to a tree path."""
+        path_obj = Path(file_path)
+        if path_obj.is_absolute():
+            try:
+                path_obj = path_obj.relative_to(self.project_path)
+            except ValueError:
+                raise FileNotFoundError(f"{file_path} is outside of the project {self.project_path}")
+        return path_obj.as_posix()
+
+    def entry(self, file_path) -> Optional[TreeEntry]:
+        return self.tree().get(self.relative_path(file_path))
+
+    def blob_sha(self, file_path) -> Optional[str]:
+        entry = self.entry(file_path)
+        return entry.sha if entry else None
+
+    def read_bytes(self, file_path) -> bytes:
+        entry = self.entry(file_path)
+        if entry is None:
+            raise FileNotFoundError(f"{file_path} does not exist at {self.ref}")
+        return self.read_blob(entry.sha)
+
+    def read_text(self, file_path) -> str:
+        return self.read_bytes(file_path).decode("utf-8", errors="replace")
+
+    def read_blob(self, sha: str) -> bytes:
+        with self._lock:
+            cached = self._cache.get(sha)
+            if cached is not None:
+                self._cache.move_to_end(sha)
+                return cached
+
+            content = self._cat_file(sha)
+            self._remember(sha, content)
+            return content
+
+    def _cat_file(self, sha: str) -> bytes:
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.project_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+
+        try:
+            self._process.stdin.write(sha.encode() + b"\n")
+            self._process.stdin.flush()
+
+            header = self._process.stdout.readline().split()
+            if len(header) != 3:
+                raise GitError(f"Object {sha} is missing")
+
+            size = int(header[2])
+            content = self._process.stdout.read(size)
+            self._process.stdout.read(1)  # trailing newline
+            return content
+        except (OSError, ValueError) as e:
+            self._terminate()
+            raise GitError(f"Failed to read object {sha}: {e}")
+
+    def _remember(self, sha: str, content: bytes):
+        if len(content) > self.cache_bytes:
+            return
+
+        self._cache[sha] = content
+        self._cached_bytes += len(content)
+        while self._cached_bytes > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
+
+    def _terminate(self):
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+        self._process = None
+
+    def close(self):
+        """Stop the `git cat-file` process."""
+        with self._lock:
+            self._terminate()
@@ -1,5 +1,7 @@
+import json
 from pathlib import Path
 
+from config import BatchJob
 from utils.errors import ValidationError
 
 
@@ -45,3 +47,41 @@ class InputValidator:
             raise ValidationError(f"Invalid branch name: {branch}")
 
         return branch.strip()
+
+    @staticmethod
+    def validate_batch_manifest(path: str) -> list[BatchJob]:
+        """Validate a JSON list of jobs with project_path, source_branch, target_branch and output_file."""
+        manifest_path = Path(path).expanduser().resolve()
+        if not manifest_path.is_file():
+            raise ValidationError(f"Batch manifest does not exist: {path}")
+
+        try:
+            entries = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError as e:
+            raise ValidationError(f"Batch manifest is not valid JSON: {e}")
+
+        if not isinstance(entries, list) or not entries:
+            raise ValidationError("Batch manifest must be a non-empty JSON list of jobs")
+
+        jobs = [InputValidator.validate_batch_job(entry, f"Batch job {index}") for index, entry in enumerate(entries)]
+
+        outputs = [job.output_file for job in jobs]
+        if len(set(outputs)) != len(outputs):
+            raise ValidationError("Batch jobs must write to different output files")
+
+        return jobs
+
+    @staticmethod
+    def validate_batch_job(entry, name: str = "Job") -> BatchJob:
+        """Validate one job with project_path, source_branch, target_branch and output_file."""
+        required = ("project_path", "source_branch", "target_branch", "output_file")
+        missing = [key for key in required if not isinstance(entry, dict) or not entry.get(key)]
+        if missing:
+            raise ValidationError(f"{name} is missing {', '.join(missing)}")
+
+        return BatchJob(
+            project_path=InputValidator.validate_project_path(entry["project_path"]),
+            source_branch=InputValidator.validate_branch_name(entry["source_branch"]),
+            target_branch=InputValidator.validate_branch_name(entry["target_branch"]),
+            output_file=InputValidator.validate_output_file(entry["output_file"]),
+        )
@@ -0,0 +1,130 @@
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+TERM_PATTERN = re.compile(r"\w+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how", "i", "in", "is", "it",
+    "of", "on", "or", "should", "that", "the", "this", "to", "we", "what", "when", "which", "with",
+}
+
+
+class LexicalHit(NamedTuple):
+    chunk_id: str
+    text: str
+    metadata: dict
+    score: float
+
+
+def query_terms(query: str) -> list[str]:
+    """Distinct lowercase query terms without stopwords, in query order."""
+    terms = [term for term in TERM_PATTERN.findall(query.lower()) if term not in STOPWORDS]
+    return list(dict.fromkeys(terms))
+
+
+def _match_expression(terms: list[str], operator: str) -> str:
+    return f" {operator} ".join(f'"{term}"' for term in terms)
+
+
+class LexicalIndex:
+    """
+    BM25 index of the knowledge chunks, stored next to the vector database.
+
+    Backed by SQLite FTS5 with Porter stemming. Chunks are keyed by the same
+    chunk ids as in the vector store, so both can be updated together.
+    """
+
+    FILE_NAME = "lexical.sqlite"
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                chunk_id TEXT UNIQUE NOT NULL,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                text, content='chunks', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS chunks_insert AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_delete AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+        """)
+        self._connection.commit()
+
+    @classmethod
+    def default_path(cls, vector_db_path) -> Path:
+        return Path(vector_db_path) / cls.FILE_NAME
+
+    @classmethod
+    def open_existing(cls, vector_db_path) -> Optional["LexicalIndex"]:
+        """The index the knowledge ETL wrote next to the vector database, if there is one."""
+        path = cls.default_path(vector_db_path)
+        return cls(path) if path.exists() else None
+
+    def upsert(self, chunk_ids: list[str], texts: list[str], metadatas: list[dict]):
+        with self._lock:
+            self._delete(chunk_ids)
+            self._connection.executemany(
+                "INSERT INTO chunks (chunk_id, text, metadata) VALUES (?, ?, ?)",
+                ((chunk_id, text, json.dumps(metadata, default=str))
+                 for chunk_id, text, metadata in zip(chunk_ids, texts, metadatas)))
+            self._connection.commit()
+
+    def delete(self, chunk_ids: list[str]):
+        with self._lock:
+            self._delete(chunk_ids)
+            self._connection.commit()
+
+    def _delete(self, chunk_ids: list[str]):
+        self._connection.executemany("DELETE FROM chunks WHERE chunk_id = ?", ((chunk_id,) for chunk_id in chunk_ids))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def search(self, query: str, k: int = 20) -> list[LexicalHit]:
+        """Best `k` chunks containing any query term, highest BM25 score first."""
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            rows = self._connection.execute("""
+                SELECT c.chunk_id, c.text, c.metadata, -bm25(chunks_fts) AS score
+                FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid
+                WHERE chunks_fts MATCH ?
+                ORDER BY score DESC
+                LIMIT ?
+            """, (_match_expression(terms, "OR"), k)).fetchall()
+
+        return [LexicalHit(chunk_id, text, json.loads(metadata), score) for chunk_id, text, metadata, score in rows]
+
+    def contains_all_terms(self, chunk_id: str, query: str) -> bool:
+        """Whether a chunk contains every query term, after stemming."""
+        terms = query_terms(query)
+        if not terms:
+            return False
+
+        with self._lock:
+            row = self._connection.execute("""
+                SELECT 1 FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid
+                WHERE chunks_fts MATCH ? AND c.chunk_id = ?
+            """, (_match_expression(terms, "AND"), chunk_id)).fetchone()
+        return row is not None
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
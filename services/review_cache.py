@@ -0,0 +1,122 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger as log
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def fingerprint_path(path) -> str:
+    """Hash of the names, sizes and modification times of the files under `path`, empty if it does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return ""
+
+    root = path if path.is_dir() else path.parent
+    files = sorted(f for f in path.rglob("*") if f.is_file()) if path.is_dir() else [path]
+    entries = []
+    for file in files:
+        stat = file.stat()
+        entries.append(f"{file.relative_to(root)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hash_text("\n".join(entries))
+
+
+class ReviewCache:
+    """
+    SQLite cache of per-file review findings shared across runs.
+
+    Entries are keyed by everything that influences a file's review, so a hit
+    is only possible when the reviewed content, the diff, the model, the
+    prompt and the context given to the agent are all unchanged. The least recently used entries are evicted
+    once the stored findings exceed `max_bytes`.
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                key TEXT PRIMARY KEY,
+                file_path TEXT NOT NULL,
+                findings TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS reviews_accessed_at ON reviews (accessed_at)")
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(blob_sha: Optional[str], diff: str, model_name: str, prompt: str, context: str = "") -> str:
+        """
+        Combine the blob SHA, diff hash, model name, prompt hash and context hash
+        into one key. `context` describes everything else the review depends on,
+        such as the context budget and the knowledge base.
+        """
+        parts = [blob_sha or "deleted", hash_text(diff or ""), model_name, hash_text(prompt), hash_text(context)]
+        return hash_text("\n".join(parts))
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connection.execute("SELECT findings FROM reviews WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._connection.execute("UPDATE reviews SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        self._connection.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, file_path: str, findings: Any):
+        serialized = json.dumps(findings)
+        now = time.time()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO reviews (key, file_path, findings, size, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, file_path, serialized, len(serialized), now, now)
+        )
+        self._connection.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits `max_bytes`."""
+        total_size = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM reviews").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        evicted = 0
+        rows = self._connection.execute("SELECT key, size FROM reviews ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if total_size <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM reviews WHERE key = ?", (key,))
+            total_size -= size
+            evicted += 1
+
+        self._connection.commit()
+        log.info(f"Evicted {evicted} entries from review cache")
+
+    def report(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger as log
+
+from ai.resources import ReviewResources
+from config import BatchJob, Config
+from services.code_diff_analyzer import CodeDiffAnalyzer
+from services.input_validator import InputValidator
+from utils.errors import ValidationError
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+LATENCY_WINDOW = 1000
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+@dataclass
+class ServerJob:
+    """State and progress events of one job submitted to the review server."""
+    job_id: str
+    job: BatchJob
+    status: str = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    summary: Optional[str] = None
+    events: list = field(default_factory=list)
+    subscribers: list = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "project_path": str(self.job.project_path),
+            "source_branch": self.job.source_branch,
+            "target_branch": self.job.target_branch,
+            "output_file": str(self.job.output_file),
+            "submitted_at": self.submitted_at,
+            "wait_seconds": _elapsed(self.submitted_at, self.started_at),
+            "run_seconds": _elapsed(self.started_at, self.finished_at),
+            "error": self.error,
+        }
+
+
+def _elapsed(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    return round(end - start, 3) if start is not None and end is not None else None
+
+
+def _percentiles(values) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50": round(statistics.median(values), 3),
+        "p95": round(values[min(int(0.95 * len(values)), len(values) - 1)], 3),
+        "max": round(values[-1], 3),
+    }
+
+
+class ReviewServer:
+    """
+    Long-running review daemon with a JSON-lines job API on a Unix socket.
+
+    Keeps one set of ReviewResources warm for all jobs: the vector store,
+    the MCP sessions, the LLM client with its connection pool and the
+    compiled review agent. Symbol indexes stay on disk and are only updated
+    incrementally. Submitted jobs are queued and reviewed by `workers`
+    workers, each job with a fresh CodeDiffAnalyzer; jobs of the same
+    project run one after the other and wait for their project before
+    they take a worker, so they never hold one back from other projects.
+
+    Every request is one JSON object per line with an `op`:
+
+    - `submit` with a `job` of project_path, source_branch, target_branch and
+      output_file; streams the job's events, including the findings of each
+      file and the summary tokens, until it finishes unless `stream` is false
+    - `watch` with a `job_id`: streams the events of a job from the start;
+      summary tokens are only sent live, the `finished` event carries the
+      whole summary
+    - `status` with a `job_id`, `cancel` with a `job_id`
+    - `metrics`: queue depth, job counts and latencies, as JSON or, with
+      `"format": "prometheus"`, in the Prometheus text format
+    """
+
+    def __init__(self, config: Config, socket_path: Path, workers: int = 2, history: int = 1000):
+        self.config = config
+        self.socket_path = Path(socket_path)
+        self.workers = max(workers, 1)
+        self.history = history
+
+        self.resources: Optional[ReviewResources] = None
+        self.jobs: OrderedDict[str, ServerJob] = OrderedDict()
+        self._worker_slots = asyncio.Semaphore(self.workers)
+        self.started_at = time.time()
+        self.counts = {status: 0 for status in FINISHED_STATUSES}
+        self.wait_seconds = deque(maxlen=LATENCY_WINDOW)
+        self.run_seconds = deque(maxlen=LATENCY_WINDOW)
+
+    async def serve(self):
+        """Serve until cancelled."""
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+        async with ReviewResources(self.config) as resources:
+            self.resources = resources
+            await resources.get_code_review_agent()
+
+            server = await asyncio.start_unix_server(
+                self._handle_client, path=str(self.socket_path), limit=MAX_REQUEST_BYTES)
+            os.chmod(self.socket_path, 0o600)
+            log.info(f"Review server listening on {self.socket_path} with {self.workers} workers")
+
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                pending = [job.task for job in self.jobs.values() if job.task is not None and not job.task.done()]
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                self.socket_path.unlink(missing_ok=True)
+                log.info("Review server stopped")
+
+    def submit(self, job: BatchJob) -> ServerJob:
+        server_job = ServerJob(job_id=uuid.uuid4().hex, job=job)
+        self.jobs[server_job.job_id] = server_job
+        self._forget_old_jobs()
+
+        position = sum(1 for job in self.jobs.values() if job.status == "queued")
+        self._emit(server_job, {"event": "queued", "position": position})
+        server_job.task = asyncio.create_task(self._dispatch(server_job))
+        return server_job
+
+    def cancel(self, server_job: ServerJob) -> bool:
+        """Cancel a queued or running job; False when it already finished."""
+        if server_job.status == "queued":
+            self._finish(server_job, "cancelled")
+            server_job.task.cancel()
+            return True
+        if server_job.status == "running":
+            server_job.task.cancel()
+            return True
+        return False
+
+    def metrics(self) -> dict:
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "workers": self.workers,
+            "queue_depth": sum(1 for job in self.jobs.values() if job.status == "queued"),
+            "running": sum(1 for job in self.jobs.values() if job.status == "running"),
+            "jobs": dict(self.counts),
+            "wait_seconds": _percentiles(self.wait_seconds),
+            "run_seconds": _percentiles(self.run_seconds),
+        }
+
+    def to_prometheus(self) -> str:
+        metrics = self.metrics()
+        lines = [
+            "# HELP revai_server_queue_depth Jobs waiting for a worker.",
+            "# TYPE revai_server_queue_depth gauge",
+            f"revai_server_queue_depth {metrics['queue_depth']}",
+            "# HELP revai_server_running_jobs Jobs being reviewed.",
+            "# TYPE revai_server_running_jobs gauge",
+            f"revai_server_running_jobs {metrics['running']}",
+            "# HELP revai_server_jobs_total Finished jobs by status.",
+            "# TYPE revai_server_jobs_total counter",
+        ]
+        lines += [f'revai_server_jobs_total{{status="{status}"}} {count}' for status, count in metrics["jobs"].items()]
+
+        for name, help_text in (("wait_seconds", "Time jobs waited in the queue"),
+                                ("run_seconds", "Time jobs took to review")):
+            lines += [f"# HELP revai_server_job_{name} {help_text}, over the last {LATENCY_WINDOW} jobs.",
+                      f"# TYPE revai_server_job_{name} summary"]
+            for quantile in ("p50", "p95"):
+                if quantile in metrics[name]:
+                    lines.append(f'revai_server_job_{name}{{quantile="0.{quantile[1:]}"}} {metrics[name][quantile]}')
+            lines.append(f"revai_server_job_{name}_count {metrics[name]['count']}")
+        return "\n".join(lines) + "\n"
+
+    async def _dispatch(self, server_job: ServerJob):
+        """Run a job once its project is free and then a worker is."""
+        async with self.resources.project_lock(server_job.job.project_path), self._worker_slots:
+            if server_job.status == "queued":
+                await self._run_job(server_job)
+
+    async def _run_job(self, server_job: ServerJob):
+        server_job.status = "running"
+        server_job.started_at = time.time()
+        self.wait_seconds.append(server_job.started_at - server_job.submitted_at)
+        self._emit(server_job, {"event": "started"})
+
+        job = server_job.job
+        config = replace(
+            self.config,
+            project_path=job.project_path,
+            source_branch=job.source_branch,
+            target_branch=job.target_branch,
+            output_file=job.output_file,
+            task_id=str(uuid.uuid4()),
+            thread_id=str(uuid.uuid4()),
+            stream_summary=False,
+        )
+        analyzer = CodeDiffAnalyzer(config, resources=self.resources,
+                                    progress=lambda event: self._emit(server_job, event))
+
+        try:
+            server_job.summary = await analyzer.execute()
+            self._finish(server_job, "succeeded")
+        except asyncio.CancelledError:
+            self._finish(server_job, "cancelled")
+        except Exception as e:
+            log.error(f"Job {server_job.job_id} failed: {e}")
+            self._finish(server_job, "failed", error=f"{type(e).__name__}: {e}")
+
+    def _finish(self, server_job: ServerJob, status: str, error: Optional[str] = None):
+        server_job.status = status
+        server_job.error = error
+        server_job.finished_at = time.time()
+        self.counts[status] += 1
+        if server_job.started_at is not None:
+            self.run_seconds.append(server_job.finished_at - server_job.started_at)
+
+        log.info(f"Job {server_job.job_id} {status}")
+        self._emit(server_job, {"event": "finished", **server_job.to_dict(), "summary": server_job.summary})
+
+    def _emit(self, server_job: ServerJob, event: dict):
+        event = {"job_id": server_job.job_id, "time": time.time(), **event}
+        # Summary tokens are not kept for replay, the finished event holds the whole summary
+        if event["event"] != "summary_token":
+            server_job.events.append(event)
+        for subscriber in server_job.subscribers:
+            subscriber.put_nowait(event)
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(len(finished) - self.history, 0)]:
+            del self.jobs[job_id]
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    await self._handle_request(json.loads(line), writer)
+                except (ValidationError, json.JSONDecodeError) as e:
+                    await self._send(writer, {"event": "error", "error": str(e)})
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            log.warning(f"Review server client disconnected: {e}")
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request: dict, writer: asyncio.StreamWriter):
+        op = request.get("op") if isinstance(request, dict) else None
+
+        if op == "submit":
+            server_job = self.submit(InputValidator.validate_batch_job(request.get("job")))
+            if request.get("stream", True):
+                await self._stream(server_job, writer)
+            else:
+                await self._send(writer, server_job.events[0])
+        elif op == "metrics":
+            if request.get("format") == "prometheus":
+                writer.write(self.to_prometheus().encode("utf-8"))
+                await writer.drain()
+            else:
+                await self._send(writer, {"event": "metrics", **self.metrics()})
+        elif op in ("watch", "status", "cancel"):
+            server_job = self.jobs.get(request.get("job_id"))
+            if server_job is None:
+                raise ValidationError(f"Unknown job: {request.get('job_id')}")
+            if op == "watch":
+                await self._stream(server_job, writer)
+            elif op == "status":
+                await self._send(writer, {"event": "status", **server_job.to_dict()})
+            else:
+                await self._send(writer, {"event": "cancel", "job_id": server_job.job_id,
+                                          "cancelled": self.cancel(server_job)})
+        else:
+            raise ValidationError(f"Unknown op: {op}, expected submit, watch, status, cancel or metrics")
+
+    async def _stream(self, server_job: ServerJob, writer: asyncio.StreamWriter):
+        """Send the events of a job so far and then every new one until it finishes."""
+        subscriber = asyncio.Queue()
+        for event in server_job.events:
+            subscriber.put_nowait(event)
+        if server_job.status not in FINISHED_STATUSES:
+            server_job.subscribers.append(subscriber)
+
+        try:
+            while True:
+                event = await subscriber.get()
+                await self._send(writer, event)
+                if event["event"] == "finished":
+                    return
+        finally:
+            if subscriber in server_job.subscribers:
+                server_job.subscribers.remove(subscriber)
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, message: dict):
+        writer.write(json.dumps(message, default=str).encode("utf-8") + b"\n")
+        await writer.drain()
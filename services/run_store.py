@@ -0,0 +1,146 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger as log
+
+RETENTION_DAYS = 14
+
+
+class RunStore:
+    """
+    SQLite record of review runs and the outcome of every file, keyed by task_id.
+
+    A file is recorded as soon as its review finishes or fails, so an
+    interrupted or partly failed run can be resumed with its task_id and only
+    reviews the files that are not done yet. Runs older than
+    `retention_days` are dropped when the store is opened.
+    """
+
+    FILE_NAME = "runs.sqlite"
+
+    def __init__(self, db_path: Path, retention_days: float = RETENTION_DAYS):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                task_id TEXT PRIMARY KEY,
+                thread_id TEXT NOT NULL,
+                project_path TEXT NOT NULL,
+                source_branch TEXT NOT NULL,
+                target_branch TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                task_id TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                review_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                findings TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (task_id, file_path)
+            );
+        """)
+        self._connection.commit()
+        self.prune(retention_days)
+
+    @classmethod
+    def default_path(cls, cache_dir) -> Path:
+        return Path(cache_dir) / cls.FILE_NAME
+
+    def get_run(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connection.execute("""
+                SELECT task_id, thread_id, project_path, source_branch, target_branch, status, created_at
+                FROM runs WHERE task_id = ?
+            """, (task_id,)).fetchone()
+
+        if row is None:
+            return None
+        keys = ("task_id", "thread_id", "project_path", "source_branch", "target_branch", "status", "created_at")
+        return dict(zip(keys, row))
+
+    def start_run(self, task_id: str, thread_id: str, project_path, source_branch: str, target_branch: str):
+        """Record a new run, or mark a resumed one as running again."""
+        now = time.time()
+        with self._lock:
+            self._connection.execute("""
+                INSERT INTO runs (task_id, thread_id, project_path, source_branch, target_branch, status,
+                                  created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, 'running', ?, ?)
+                ON CONFLICT (task_id) DO UPDATE SET status = 'running', updated_at = excluded.updated_at
+            """, (task_id, thread_id, str(project_path), source_branch, target_branch, now, now))
+            self._connection.commit()
+
+    def finish_run(self, task_id: str, status: str):
+        with self._lock:
+            self._connection.execute("UPDATE runs SET status = ?, updated_at = ? WHERE task_id = ?",
+                                     (status, time.time(), task_id))
+            self._connection.commit()
+
+    def register_files(self, task_id: str, review_keys: dict[str, str]):
+        """
+        Record the files of the run as pending. A resumed run keeps the outcome
+        of files whose review key is unchanged.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.executemany("""
+                INSERT INTO results (task_id, file_path, review_key, status, updated_at)
+                VALUES (?, ?, ?, 'pending', ?)
+                ON CONFLICT (task_id, file_path) DO UPDATE SET
+                    review_key = excluded.review_key, status = 'pending', findings = NULL, error = NULL,
+                    updated_at = excluded.updated_at
+                WHERE results.review_key != excluded.review_key
+            """, [(task_id, file_path, review_key, now) for file_path, review_key in review_keys.items()])
+            self._connection.commit()
+
+    def results(self, task_id: str) -> dict[str, tuple[str, str, Any]]:
+        """The status, review key and findings of every file of the run, by file path."""
+        with self._lock:
+            rows = self._connection.execute("""
+                SELECT file_path, status, review_key, findings FROM results WHERE task_id = ?
+            """, (task_id,)).fetchall()
+        return {
+            file_path: (status, review_key, json.loads(findings) if findings is not None else None)
+            for file_path, status, review_key, findings in rows
+        }
+
+    def record_done(self, task_id: str, file_path: str, review_key: str, findings: Any):
+        self._record(task_id, file_path, review_key, "done", json.dumps(findings, default=str), None)
+
+    def record_failed(self, task_id: str, file_path: str, review_key: str, error: str):
+        self._record(task_id, file_path, review_key, "failed", None, error)
+
+    def _record(self, task_id: str, file_path: str, review_key: str, status: str,
+                findings: Optional[str], error: Optional[str]):
+        with self._lock:
+            self._connection.execute("""
+                INSERT OR REPLACE INTO results (task_id, file_path, review_key, status, findings, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (task_id, file_path, review_key, status, findings, error, time.time()))
+            self._connection.commit()
+
+    def prune(self, retention_days: float):
+        """Drop runs, and their results, that were last updated more than `retention_days` ago."""
+        cutoff = time.time() - retention_days * 24 * 3600
+        with self._lock:
+            removed = self._connection.execute("DELETE FROM runs WHERE updated_at < ?", (cutoff,)).rowcount
+            self._connection.execute("DELETE FROM results WHERE task_id NOT IN (SELECT task_id FROM runs)")
+            self._connection.commit()
+
+        if removed:
+            log.info(f"Pruned {removed} review runs older than {retention_days} days")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,316 @@
+import ast
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger as log
+
+from services.git_object_reader import GitObjectReader
+from utils.files import is_binary
+
+MAX_INDEXED_BYTES = 2 * 1024 * 1024
+REGEX_METACHARACTERS = set(".^$*+?{}[]\\|()")
+WORD_PATTERN = re.compile(r"\w+")
+IDENTIFIER_PATTERN = re.compile(r"^\w+$")
+# Names counted per trigram when picking the rarest one, so common trigrams stay cheap
+NAME_TRIGRAM_COUNT_LIMIT = 1000
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _python_symbols(source: str) -> list[tuple[str, str, int]]:
+    """(name, kind, line) for every definition and reference in a Python module."""
+    tree = ast.parse(source)
+    symbols = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.add((node.name, "function", node.lineno))
+        elif isinstance(node, ast.ClassDef):
+            symbols.add((node.name, "class", node.lineno))
+        elif isinstance(node, ast.Name):
+            kind = "assignment" if isinstance(node.ctx, ast.Store) else "reference"
+            symbols.add((node.id, kind, node.lineno))
+        elif isinstance(node, ast.arg):
+            symbols.add((node.arg, "parameter", node.lineno))
+        elif isinstance(node, ast.Attribute):
+            symbols.add((node.attr, "reference", node.lineno))
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                symbols.add((alias.asname or alias.name.split(".")[-1], "import", node.lineno))
+
+    return sorted(symbols)
+
+
+class SymbolIndex:
+    """
+    On-disk index of a project at a git ref, updated incrementally by blob SHA.
+
+    Python files are parsed with `ast` into definitions and references and
+    their words are indexed, along with the trigrams of every word; every
+    other text file is indexed by trigrams.
+    Together they narrow literal searches down to the files that can match,
+    so only those are scanned instead of the whole project. Binary files are
+    skipped and files above MAX_INDEXED_BYTES are always scanned.
+    """
+
+    def __init__(self, db_path: Path, object_reader: GitObjectReader):
+        self.db_path = Path(db_path)
+        self.object_reader = object_reader
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        has_name_trigrams = self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'name_trigrams'").fetchone()
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                blob_sha TEXT NOT NULL,
+                kind TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS names (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS symbols (
+                name_id INTEGER NOT NULL,
+                file_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                line INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name_id);
+            CREATE INDEX IF NOT EXISTS symbols_file ON symbols (file_id);
+            CREATE TABLE IF NOT EXISTS words (
+                name_id INTEGER NOT NULL,
+                file_id INTEGER NOT NULL,
+                PRIMARY KEY (name_id, file_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS words_file ON words (file_id);
+            CREATE TABLE IF NOT EXISTS name_trigrams (
+                trigram TEXT NOT NULL,
+                name_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, name_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS name_trigrams_name ON name_trigrams (name_id);
+            CREATE TABLE IF NOT EXISTS trigrams (
+                trigram TEXT NOT NULL,
+                file_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, file_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS trigrams_file ON trigrams (file_id);
+        """)
+        if not has_name_trigrams:
+            # Indexes built before names had trigrams
+            self._add_name_trigrams(dict(self._connection.execute("SELECT name, id FROM names").fetchall()))
+        self._connection.commit()
+
+    @staticmethod
+    def default_path(cache_dir: Path, project_path: Path) -> Path:
+        project_hash = hashlib.sha256(str(project_path).encode("utf-8")).hexdigest()[:16]
+        return Path(cache_dir) / "symbol_index" / f"{project_hash}.sqlite"
+
+    def update(self):
+        """Re-index files whose blob SHA changed since the last run and drop deleted ones."""
+        start_time = time.perf_counter()
+        tree = self.object_reader.tree()
+
+        with self._lock:
+            stored = dict(self._connection.execute("SELECT path, blob_sha FROM files").fetchall())
+            removed = [path for path in stored if path not in tree]
+            changed = [path for path, entry in tree.items() if stored.get(path) != entry.sha]
+
+            for path in removed:
+                self._remove(path)
+
+            for path in changed:
+                self._remove(path)
+                self._index(path, tree[path].sha, tree[path].size)
+
+            self._connection.execute("DELETE FROM names WHERE id NOT IN (SELECT name_id FROM words) "
+                                     "AND id NOT IN (SELECT name_id FROM symbols)")
+            self._connection.execute("DELETE FROM name_trigrams WHERE name_id NOT IN (SELECT id FROM names)")
+            self._connection.commit()
+
+        duration = time.perf_counter() - start_time
+        log.info(f"Symbol index updated in {duration:.2f}s: {len(changed)} files indexed, {len(removed)} removed")
+
+    def _remove(self, path: str):
+        row = self._connection.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        for table in ("symbols", "words", "trigrams"):
+            self._connection.execute(f"DELETE FROM {table} WHERE file_id = ?", row)
+        self._connection.execute("DELETE FROM files WHERE id = ?", row)
+
+    def _select_name_ids(self, names: list[str]) -> dict[str, int]:
+        ids = {}
+        for i in range(0, len(names), 500):
+            batch = names[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            ids.update(self._connection.execute(
+                f"SELECT name, id FROM names WHERE name IN ({placeholders})", batch).fetchall())
+        return ids
+
+    def _add_name_trigrams(self, name_ids: dict[str, int]):
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO name_trigrams (trigram, name_id) VALUES (?, ?)",
+            ((trigram, name_id) for name, name_id in name_ids.items() for trigram in _trigrams(name)))
+
+    def _name_ids(self, names) -> dict[str, int]:
+        names = list(set(names))
+        ids = self._select_name_ids(names)
+
+        new_names = [name for name in names if name not in ids]
+        self._connection.executemany("INSERT INTO names (name) VALUES (?)", ((name,) for name in new_names))
+        new_ids = self._select_name_ids(new_names)
+        self._add_name_trigrams(new_ids)
+
+        ids.update(new_ids)
+        return ids
+
+    def _index(self, path: str, blob_sha: str, size: int):
+        if size > MAX_INDEXED_BYTES:
+            kind, content = "large", None
+        else:
+            content = self.object_reader.read_blob(blob_sha)
+            kind = "binary" if is_binary(content) else ("python" if path.endswith(".py") else "text")
+
+        text = content.decode("utf-8", errors="replace") if content is not None else ""
+        symbols = []
+        if kind == "python":
+            try:
+                symbols = _python_symbols(text)
+            except (SyntaxError, ValueError):
+                kind = "text"
+
+        file_id = self._connection.execute(
+            "INSERT INTO files (path, blob_sha, kind) VALUES (?, ?, ?)", (path, blob_sha, kind)).lastrowid
+
+        if kind == "python":
+            words = set(WORD_PATTERN.findall(text))
+            name_ids = self._name_ids(words | {name for name, _, _ in symbols})
+            self._connection.executemany(
+                "INSERT INTO symbols (name_id, file_id, kind, line) VALUES (?, ?, ?, ?)",
+                ((name_ids[name], file_id, symbol_kind, line) for name, symbol_kind, line in symbols))
+            self._connection.executemany(
+                "INSERT INTO words (name_id, file_id) VALUES (?, ?)",
+                ((name_ids[word], file_id) for word in words))
+        elif kind == "text":
+            self._connection.executemany(
+                "INSERT INTO trigrams (trigram, file_id) VALUES (?, ?)",
+                ((trigram, file_id) for trigram in _trigrams(text)))
+
+    def lookup_symbol(self, name: str) -> list[tuple[str, int, str]]:
+        """(path, line, kind) of every definition and reference of a Python name."""
+        with self._lock:
+            return self._connection.execute("""
+                SELECT f.path, s.line, s.kind FROM symbols s
+                JOIN names n ON n.id = s.name_id
+                JOIN files f ON f.id = s.file_id
+                WHERE n.name = ?
+                ORDER BY s.kind != 'function' AND s.kind != 'class', f.path, s.line
+            """, (name,)).fetchall()
+
+    def candidate_files(self, literal: str) -> Optional[list[str]]:
+        """
+        Files that can contain `literal`, or None when the index cannot answer,
+        e.g. for regular expressions or literals shorter than a trigram.
+        """
+        if len(literal) < 3 or any(char in REGEX_METACHARACTERS for char in literal):
+            return None
+
+        trigrams = sorted(_trigrams(literal))
+        placeholders = ",".join("?" * len(trigrams))
+
+        with self._lock:
+            if IDENTIFIER_PATTERN.match(literal):
+                # Only the names holding the literal's rarest trigram are checked for the literal itself
+                trigram = self._rarest_name_trigram(trigrams)
+                python_files = self._connection.execute("""
+                    SELECT DISTINCT f.path FROM name_trigrams t
+                    JOIN names n ON n.id = t.name_id
+                    JOIN words w ON w.name_id = n.id
+                    JOIN files f ON f.id = w.file_id
+                    WHERE t.trigram = ? AND instr(n.name, ?) > 0
+                """, (trigram, literal)).fetchall()
+            else:
+                # Python files are indexed by words only, which cannot serve literals spanning several tokens.
+                has_python = self._connection.execute("SELECT 1 FROM files WHERE kind = 'python' LIMIT 1").fetchone()
+                if has_python:
+                    return None
+                python_files = []
+
+            text_files = self._connection.execute(f"""
+                SELECT f.path FROM trigrams t
+                JOIN files f ON f.id = t.file_id
+                WHERE t.trigram IN ({placeholders})
+                GROUP BY t.file_id
+                HAVING COUNT(*) = ?
+            """, (*trigrams, len(trigrams))).fetchall()
+
+            # Files too large to index are always scanned.
+            large_files = self._connection.execute("SELECT path FROM files WHERE kind = 'large'").fetchall()
+
+        return sorted(path for path, in python_files + text_files + large_files)
+
+    def _rarest_name_trigram(self, trigrams: list[str]) -> str:
+        counts = {
+            trigram: self._connection.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM name_trigrams WHERE trigram = ? LIMIT ?)",
+                (trigram, NAME_TRIGRAM_COUNT_LIMIT)).fetchone()[0]
+            for trigram in trigrams
+        }
+        return min(trigrams, key=counts.get)
+
+    def search(self, query: str, context_lines: int = 0) -> Optional[str]:
+        """
+        Answer a literal search from the index in ripgrep's output format,
+        or return None so the caller falls back to ripgrep.
+        """
+        candidates = self.candidate_files(query)
+        if candidates is None:
+            return None
+
+        output = []
+        for path in candidates:
+            lines = self.object_reader.read_text(path).splitlines()
+            matches = [number for number, line in enumerate(lines) if query in line]
+            if not matches:
+                continue
+
+            if output and context_lines:
+                output.append("--")
+            output.extend(_format_matches(path, lines, matches, context_lines))
+
+        return "\n".join(output) if output else "No matches found."
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def _format_matches(path: str, lines: list[str], matches: list[int], context_lines: int) -> list[str]:
+    """Format matches like `rg -n`, with `--` between non-adjacent context blocks when there is context."""
+    formatted = []
+    matched = set(matches)
+    next_line = 0
+
+    for match in matches:
+        start = max(match - context_lines, next_line)
+        end = min(match + context_lines, len(lines) - 1)
+        if context_lines and formatted and start > next_line:
+            formatted.append("--")
+        for number in range(start, end + 1):
+            separator = ":" if number in matched else "-"
+            formatted.append(f"{path}{separator}{number + 1}{separator}{lines[number]}")
+        next_line = max(next_line, end + 1)
+
+    return formatted
@@ -0,0 +1,114 @@
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+DIFF_HEADER = "diff --git "
+NULL_PATH = "/dev/null"
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+@dataclass
+class FileDiff:
+    """Unified diff of a single file as produced by `git diff`."""
+    file_path: str
+    old_path: Optional[str] = None
+    status: str = "modified"
+    lines: list[str] = field(default_factory=list)
+
+    @property
+    def diff(self) -> str:
+        return "\n".join(self.lines)
+
+
+def _strip_prefix(path: str, prefix: str) -> str:
+    path = path.strip()
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1]
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+
+def _paths_from_header(header: str) -> tuple[str, str]:
+    """Best-effort split of `diff --git a/<old> b/<new>` for diffs without ---/+++ lines."""
+    rest = header[len(DIFF_HEADER):]
+    separator = rest.rfind(" b/")
+    if separator == -1:
+        return rest, rest
+    return _strip_prefix(rest[:separator], "a/"), _strip_prefix(rest[separator + 1:], "b/")
+
+
+def _finalize(current: FileDiff) -> FileDiff:
+    if current.old_path == current.file_path:
+        current.old_path = None
+    return current
+
+
+def parse_unified_diff(lines: Iterable[str]) -> Iterator[FileDiff]:
+    """
+    Stream-parse a multi-file unified diff into per-file diffs.
+
+    Lines are consumed one by one, so the parser can be fed straight from the
+    stdout of a `git diff` process without buffering the whole output.
+    """
+    current: Optional[FileDiff] = None
+    in_hunk = False
+
+    for raw_line in lines:
+        line = raw_line.rstrip("\n")
+
+        if line.startswith(DIFF_HEADER):
+            if current is not None:
+                yield _finalize(current)
+
+            old_path, new_path = _paths_from_header(line)
+            current = FileDiff(file_path=new_path, old_path=old_path, lines=[line])
+            in_hunk = False
+            continue
+
+        if current is None:
+            continue
+
+        current.lines.append(line)
+
+        if line.startswith("@@"):
+            in_hunk = True
+        elif in_hunk:
+            continue
+        elif line.startswith("--- "):
+            path = line[4:]
+            if path != NULL_PATH:
+                current.old_path = _strip_prefix(path, "a/")
+        elif line.startswith("+++ "):
+            path = line[4:]
+            if path == NULL_PATH:
+                current.status = "deleted"
+                current.file_path = current.old_path
+            else:
+                current.file_path = _strip_prefix(path, "b/")
+        elif line.startswith("new file mode"):
+            current.status = "added"
+        elif line.startswith("deleted file mode"):
+            current.status = "deleted"
+        elif line.startswith("rename from "):
+            current.status = "renamed"
+            current.old_path = line[len("rename from "):]
+        elif line.startswith("rename to "):
+            current.file_path = line[len("rename to "):]
+
+    if current is not None:
+        yield _finalize(current)
+
+
+def changed_line_ranges(diff: str) -> list[tuple[int, int]]:
+    """
+    Return 1-based inclusive line ranges of the new file touched by each hunk.
+    Pure deletions map to the line where the removed block used to be.
+    """
+    ranges = []
+    for line in diff.splitlines():
+        match = HUNK_HEADER.match(line)
+        if not match:
+            continue
+        start = int(match.group(1))
+        length = int(match.group(2)) if match.group(2) is not None else 1
+        ranges.append((max(start, 1), max(start + length - 1, start, 1)))
+    return ranges
@@ -7,3 +7,13 @@ class GitError(Exception):
     """Raised when Git operations fail."""
     pass
 
+
+
+class BudgetExceededError(Exception):
+    """Raised when a run spends more tokens or money than its budget allows."""
+    pass
+
+
+class ReviewIncompleteError(Exception):
+    """Raised when some files could not be reviewed; the run can be resumed with its task_id."""
+    pass
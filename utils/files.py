@@ -0,0 +1,6 @@
+BINARY_SNIFF_BYTES = 8000
+
+
+def is_binary(content: bytes) -> bool:
+    """Whether file content looks binary, judged like git by a NUL byte near the start."""
+    return b"\0" in content[:BINARY_SNIFF_BYTES]
@@ -68,4 +68,217 @@ Examples:
         help="API key for OpenAI model (default: None)"
     )
 
+    parser.add_argument(
+        "--offline",
+        dest="offline",
+        action="store_true",
+        help="Do not fetch from origin before computing the diff (default: False)"
+    )
+
+    parser.add_argument(
+        "--max_concurrency",
+        dest="max_concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of files reviewed at the same time (default: 4)"
+    )
+
+    parser.add_argument(
+        "--requests_per_minute",
+        dest="requests_per_minute",
+        type=int,
+        default=0,
+        help="Budget of LLM requests sent per minute, 0 for unlimited (default: 0)"
+    )
+
+    parser.add_argument(
+        "--tokens_per_minute",
+        dest="tokens_per_minute",
+        type=int,
+        default=0,
+        help="Budget of prompt tokens sent per minute, counting the whole prompt of every LLM request, 0 for unlimited (default: 0)"
+    )
+
+    parser.add_argument(
+        "--cache_dir",
+        dest="cache_dir",
+        default=".revai_cache",
+        help="Directory for caches persisted between runs (default: .revai_cache)"
+    )
+
+    parser.add_argument(
+        "--no_review_cache",
+        dest="review_cache",
+        action="store_false",
+        help="Review every file again instead of reusing findings of unchanged files"
+    )
+
+    parser.add_argument(
+        "--review_cache_max_mb",
+        dest="review_cache_max_mb",
+        type=int,
+        default=256,
+        help="Size cap of the review cache in megabytes (default: 256)"
+    )
+
+    parser.add_argument(
+        "--no_llm_cache",
+        dest="llm_cache",
+        action="store_false",
+        help="Send every LLM call to the provider instead of answering repeated calls from the cache"
+    )
+
+    parser.add_argument(
+        "--llm_cache_max_mb",
+        dest="llm_cache_max_mb",
+        type=int,
+        default=256,
+        help="Size cap of the LLM response cache in megabytes (default: 256)"
+    )
+
+    parser.add_argument(
+        "--llm_cache_ttl_hours",
+        dest="llm_cache_ttl_hours",
+        type=float,
+        default=168,
+        help="Hours before a cached LLM response expires, 0 to keep forever (default: 168)"
+    )
+
+    parser.add_argument(
+        "--summary_token_budget",
+        dest="summary_token_budget",
+        type=int,
+        default=8000,
+        help="Token budget of each summarization prompt before findings are summarized in groups (default: 8000)"
+    )
+
+    parser.add_argument(
+        "--context_token_budget",
+        dest="context_token_budget",
+        type=int,
+        default=6000,
+        help="Token budget of the per-file review prompt; larger files are sent as excerpts (default: 6000)"
+    )
+
+    parser.add_argument(
+        "--no_symbol_index",
+        dest="symbol_index",
+        action="store_false",
+        help="Answer code searches with ripgrep only instead of the incremental symbol index"
+    )
+
+    parser.add_argument(
+        "--token_budget",
+        dest="token_budget",
+        type=int,
+        default=0,
+        help="Fail the run once it spends more prompt and completion tokens, 0 for unlimited (default: 0)"
+    )
+
+    parser.add_argument(
+        "--cost_budget",
+        dest="cost_budget",
+        type=float,
+        default=0.0,
+        help="Fail the run once its estimated cost in USD is higher, 0 for unlimited (default: 0)"
+    )
+
+    parser.add_argument(
+        "--retrieval_mode",
+        dest="retrieval_mode",
+        choices=["hybrid", "vector", "lexical"],
+        default="hybrid",
+        help="How internal knowledge is searched: BM25 fused with vector search, or either alone (default: hybrid)"
+    )
+
+    parser.add_argument(
+        "--no_query_embedding_cache",
+        dest="query_embedding_cache",
+        action="store_false",
+        help="Embed every knowledge query again instead of reusing embeddings of repeated queries"
+    )
+
+    parser.add_argument(
+        "--knowledge_prefetch_k",
+        dest="knowledge_prefetch_k",
+        type=int,
+        default=3,
+        help="Internal knowledge chunks retrieved for every changed file before review, 0 to disable (default: 3)"
+    )
+
+    parser.add_argument(
+        "--vector_backend",
+        dest="vector_backend",
+        choices=["chroma", "flat"],
+        default="chroma",
+        help="Vector store of internal knowledge: the Chroma database or the memory-mapped flat index "
+             "exported by the knowledge ETL (default: chroma)"
+    )
+
+    parser.add_argument(
+        "--no_stream_summary",
+        dest="stream_summary",
+        action="store_false",
+        help="Do not print the summary to the terminal while it is generated"
+    )
+
+    parser.add_argument(
+        "--resume",
+        dest="resume",
+        metavar="RUN_ID",
+        help="Resume an interrupted or partly failed run: files it reviewed are reused and the agents of the "
+             "others continue from their last checkpoint"
+    )
+
+    parser.add_argument(
+        "--no_checkpoints",
+        dest="checkpoints",
+        action="store_false",
+        help="Do not record runs and agent checkpoints in the cache directory; such runs cannot be resumed"
+    )
+
+    parser.add_argument(
+        "--batch_manifest",
+        dest="batch_manifest",
+        help="JSON list of jobs with project_path, source_branch, target_branch and output_file to review in one "
+             "process; a report is written next to the manifest"
+    )
+
+    parser.add_argument(
+        "--batch_parallelism",
+        dest="batch_parallelism",
+        type=int,
+        default=2,
+        help="Batch jobs reviewed at the same time, each with up to --max_concurrency files (default: 2)"
+    )
+
+    parser.add_argument(
+        "--serve",
+        dest="serve",
+        metavar="SOCKET_PATH",
+        help="Run as a review daemon that accepts JSON-lines jobs on this Unix socket"
+    )
+
+    parser.add_argument(
+        "--server_workers",
+        dest="server_workers",
+        type=int,
+        default=2,
+        help="Jobs the review daemon reviews at the same time (default: 2)"
+    )
+
+    parser.add_argument(
+        "--no_banner",
+        dest="banner",
+        action="store_false",
+        help="Do not print the banner (it is only printed to a terminal anyway)"
+    )
+
+    parser.add_argument(
+        "--profile_startup",
+        dest="profile_startup",
+        action="store_true",
+        help="Print the import time of the heavy modules a review run loads, then exit"
+    )
+
     return parser
@@ -0,0 +1,50 @@
+import importlib
+import sys
+import time
+
+# Modules that make up most of the startup time, in the order a review run imports them.
+HEAVY_MODULES = (
+    "numpy",
+    "pydantic",
+    "langchain_core",
+    "langchain_openai",
+    "langchain",
+    "langgraph",
+    "chromadb",
+    "langchain_chroma",
+    "mcp",
+    "pyfiglet",
+    "ai.retrieval",
+    "ai.orchestrator",
+    "services.code_diff_analyzer",
+)
+
+
+def loaded_heavy_modules() -> list[str]:
+    """Heavy modules that are already imported by the current process."""
+    return [module for module in HEAVY_MODULES if module in sys.modules]
+
+
+def profile_imports(modules: tuple[str, ...] = HEAVY_MODULES) -> list[tuple[str, float]]:
+    """
+    Seconds spent importing each module, in order.
+
+    Dependencies shared by several modules are counted for the first one
+    that imports them, so the times add up to the total startup cost.
+    """
+    timings = []
+    for module in modules:
+        start_time = time.perf_counter()
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            continue
+        timings.append((module, time.perf_counter() - start_time))
+    return timings
+
+
+def format_import_profile(timings: list[tuple[str, float]]) -> str:
+    width = max((len(module) for module, _ in timings), default=0)
+    lines = [f"{module:<{width}}  {seconds * 1000:>9.1f} ms" for module, seconds in timings]
+    lines.append(f"{'total':<{width}}  {sum(seconds for _, seconds in timings) * 1000:>9.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,45 @@
+from functools import lru_cache
+
+from loguru import logger as log
+
+CHARS_PER_TOKEN = 4
+FALLBACK_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(encoding_name: str):
+    """Load an encoding once per process; a failed load (e.g. no network to fetch it) is not retried."""
+    import tiktoken
+
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        log.warning(f"Could not load tokenizer {encoding_name}, estimating tokens instead: {e}")
+        return None
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: str):
+    try:
+        from tiktoken.model import encoding_name_for_model
+    except ImportError:
+        return None
+
+    try:
+        encoding_name = encoding_name_for_model(model_name)
+    except KeyError:
+        encoding_name = FALLBACK_ENCODING
+
+    return _load_encoding(encoding_name)
+
+
+def count_tokens(text: str, model_name: str = "gpt-4.1-mini") -> int:
+    """Count tokens with the model's tokenizer, or estimate them when it is unavailable."""
+    if not text:
+        return 0
+
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+    return len(encoding.encode(text, disallowed_special=()))
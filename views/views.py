@@ -8,6 +8,8 @@ class ChangedFile(BaseModel):
     file_path: str
     content: str
     changes: Optional[str] = None
+    blob_sha: Optional[str] = None
+    knowledge: Optional[List[str]] = None
 
 
 class CodeReviewRequest(BaseModel):